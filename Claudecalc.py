@@ -1,8 +1,14 @@
 from tkinter import *
 
+from calcdisplay import bind_paste
+from calcengine import BinaryEngine, OperationError, clean_paste
+from calcnumeric import DEFAULT_PRECISION, make_backend
+
 class Calculator:
-    def __init__(self, root):
+    def __init__(self, root, numeric_mode="float", precision=DEFAULT_PRECISION):
         self.root = root
+        self.backend = make_backend(numeric_mode, precision)
+        self.core = BinaryEngine(self.backend)
         self.root.title("Calculator")
         
         # Color scheme
@@ -12,11 +18,6 @@ class Calculator:
         self.EQUAL_COLOR = "#4CAF50"  # Green
         self.BUTTON_TEXT_COLOR = "#000000"  # Black
         
-        # Initialize variables
-        self.current_number = ""
-        self.first_number = 0
-        self.operation = ""
-        
         # Create and configure entry widget
         self.display = Entry(root, width=35, borderwidth=5, justify=RIGHT)
         self.display.grid(row=0, column=0, columnspan=3, padx=10, pady=10)
@@ -75,6 +76,7 @@ class Calculator:
         self.root.bind('<Return>', lambda event: self.button_equal())
         self.root.bind('<Escape>', lambda event: self.button_clear())
         self.root.bind('<BackSpace>', self.handle_backspace)
+        bind_paste(self.root, self.display, self.handle_paste)
 
     def handle_keypress(self, event):
         valid_chars = '0123456789+-*/.='
@@ -87,58 +89,67 @@ class Calculator:
                 self.button_equal()
 
     def handle_backspace(self, event):
-        current = self.display.get()
-        self.display.delete(0, END)
-        self.display.insert(0, current[:-1])
+        self.core.start_operand()
+        length = self.display.index(END)
+        if length:
+            self.display.delete(length - 1)
+
+    def handle_paste(self, event):
+        # Validate the whole clipboard at once and insert it in one go.
+        try:
+            text = clean_paste(self.root.clipboard_get(), numbers_only=True)
+        except TclError:
+            return "break"
+        if text:
+            if self.core.start_operand():
+                self.display.delete(0, END)
+            self.display.insert(END, text)
+        return "break"
 
     def button_click(self, number):
-        current = self.display.get()
-        self.display.delete(0, END)
-        self.display.insert(0, current + str(number))
+        if self.core.start_operand():
+            self.display.delete(0, END)
+        self.display.insert(END, str(number))
 
     def button_clear(self):
         self.display.delete(0, END)
-        self.first_number = 0
-        self.operation = ""
+        self.core.clear()
 
     def button_operator(self, op):
         try:
-            self.first_number = float(self.display.get())
-            self.operation = op
+            total = self.core.press_operator(op, self.display.get())
+            self.display.delete(0, END)
+            if total is not None:
+                self.show_result(total)
+        except OperationError as e:
             self.display.delete(0, END)
+            self.display.insert(0, f"Error: {e}")
         except ValueError:
             self.display.delete(0, END)
             self.display.insert(0, "Error")
 
     def button_equal(self):
         try:
-            second_number = float(self.display.get())
+            result = self.core.press_equals(self.display.get())
             self.display.delete(0, END)
-            
-            result = 0
-            if self.operation == "+":
-                result = self.first_number + second_number
-            elif self.operation == "-":
-                result = self.first_number - second_number
-            elif self.operation == "*":
-                result = self.first_number * second_number
-            elif self.operation == "/":
-                if second_number != 0:
-                    result = self.first_number / second_number
-                else:
-                    self.display.insert(0, "Error: Div by 0")
-                    return
-                
-            # Format result to remove trailing zeros if it's a whole number
-            if result.is_integer():
-                self.display.insert(0, int(result))
-            else:
-                self.display.insert(0, result)
-                
+            if result is not None:
+                self.show_result(result)
+        except OperationError as e:
+            self.display.delete(0, END)
+            self.display.insert(0, f"Error: {e}")
         except ValueError:
             self.display.delete(0, END)
             self.display.insert(0, "Error")
 
+    def show_result(self, result):
+        # Format result to remove trailing zeros if it's a whole number
+        if type(result) is not float:
+            self.display.insert(0, self.backend.format(result))
+        elif result.is_integer():
+            self.display.insert(0, int(result))
+        else:
+            self.display.insert(0, result)
+
 if __name__ == "__main__":
     root = Tk()
     calculator = Calculator(root)
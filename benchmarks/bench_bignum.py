@@ -0,0 +1,52 @@
+"""Compare str() with calcbignum's conversions on growing integers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bignum [--max-digits N]
+
+For each size it times scientific() (what the display shows at once),
+to_digits() (the viewer's background conversion) and str() with the
+interpreter's digit limit lifted, checking that the digits agree. str()
+is skipped above a million digits, where it takes minutes.
+"""
+import argparse
+import sys
+import time
+
+from calcbignum import digit_count, scientific, to_digits
+
+STR_LIMIT = 1_000_000
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-digits", type=int, default=3_000_000)
+    args = parser.parse_args()
+    sys.set_int_max_str_digits(0)
+
+    print(f"{'digits':>10} {'scientific':>11} {'to_digits':>10} {'str':>10}")
+    digits = 10_000
+    while digits <= args.max_digits:
+        n = 7 ** int(digits / 0.845098)  # log10(7)
+        sci, text = timed(scientific, n)
+        fast, full = timed(to_digits, n)
+        assert len(full) == digit_count(n)
+        assert text.startswith(full[0]) and text.endswith(f"e+{len(full) - 1}")
+        if len(full) <= STR_LIMIT:
+            slow, reference = timed(str, n)
+            assert reference == full
+            slow_text = f"{slow:9.3f}s"
+        else:
+            slow_text = f"{'-':>10}"
+        print(f"{len(full):>10,} {sci * 1e3:9.2f}ms {fast:9.3f}s {slow_text}")
+        digits *= 3
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Throughput of the shared binary-operator core, calcengine.BinaryEngine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_binary [--rounds N]
+
+Each round is what the six binary front-ends hand to the core for
+"12.5 + 3 * 4 - 1 = =" (61, then 60): three operator presses with the
+display text, then "=" twice. Reported per numeric mode.
+"""
+import argparse
+import time
+
+from calcengine import BinaryEngine
+from calcnumeric import NUMERIC_MODES, make_backend
+
+PRESSES = (("+", "12.5"), ("*", "3"), ("-", "4"), ("=", "1"), ("=", "61"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50_000)
+    args = parser.parse_args()
+
+    for mode in NUMERIC_MODES:
+        core = BinaryEngine(make_backend(mode))
+        operator, equals = core.press_operator, core.press_equals
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            core.clear()
+            for key, text in PRESSES:
+                result = equals(text) if key == "=" else operator(key, text)
+        elapsed = time.perf_counter() - start
+        print(f"{mode:9} {elapsed / args.rounds * 1e6:7.2f} us/round  "
+              f"{elapsed / args.rounds / len(PRESSES) * 1e9:6.0f} ns/press  last={core.backend.format(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Measure the shared result cache on a workload of repeated expressions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cache
+"""
+import random
+import time
+
+from calccache import ResultCache
+
+DISTINCT = [f"({i} + {i % 7}) * {i % 13} ^ 2 - {i} / 3" for i in range(200)]
+
+
+def run(cache, workload):
+    start = time.perf_counter()
+    for text in workload:
+        cache.evaluate(text)
+    return time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(0)
+    workload = [rng.choice(DISTINCT) for _ in range(50000)]
+
+    cache = ResultCache(maxsize=1024)
+    cache.enabled = False
+    uncached = run(cache, workload)
+
+    cache.enabled = True
+    cached = run(cache, workload)
+
+    small = ResultCache(maxsize=50)
+    thrashing = run(small, workload)
+
+    n = len(workload)
+    print(f"cache disabled   {uncached / n * 1e6:8.2f} us/expr")
+    print(f"cache enabled    {cached / n * 1e6:8.2f} us/expr  {cache.stats()}")
+    print(f"maxsize=50       {thrashing / n * 1e6:8.2f} us/expr  {small.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Time a batch run with no disk cache, with a cold one and with a warm one.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_diskcache [--lines N] [--distinct N] [--jobs N]
+
+The input mixes cheap one-liners with big-integer expressions that take
+around a millisecond each. Every run goes through calcbatch with fresh
+worker processes, so their in-memory caches start empty and only the
+disk cache carries over: the cold run fills it (the workers sharing one
+file concurrently), the warm run reads it. All three outputs must match.
+"""
+import argparse
+import io
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import calcbatch
+
+
+def workload(lines, distinct, rng):
+    heavy = [f"{rng.randrange(3, 999)} ** {rng.randrange(30000, 50000)} % {rng.randrange(2, 10**6)}"
+             for _ in range(distinct)]
+    out = []
+    for _ in range(lines):
+        if rng.random() < 0.25:
+            out.append(rng.choice(heavy))
+        else:
+            out.append(f"{rng.randrange(100)} * ({rng.random():.3f} + {rng.randrange(10)}) - 1")
+    return "\n".join(out) + "\n"
+
+
+def timed(path, jobs, disk_cache):
+    out = io.BytesIO()
+    start = time.perf_counter()
+    calcbatch.run(path, out, jobs, disk_cache=disk_cache)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--distinct", type=int, default=500,
+                        help="different expensive expressions")
+    parser.add_argument("--jobs", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "input.txt")
+        database = os.path.join(directory, "cache.sqlite")
+        with open(path, "w") as f:
+            f.write(workload(args.lines, args.distinct, random.Random(0)))
+
+        plain, expected = timed(path, args.jobs, None)
+        cold, cold_out = timed(path, args.jobs, database)
+        warm, warm_out = timed(path, args.jobs, database)
+        rows, stored = sqlite3.connect(database).execute(
+            "SELECT count(*), total(size) FROM entries").fetchone()
+        size = sum(os.path.getsize(os.path.join(directory, name))
+                   for name in os.listdir(directory) if name.startswith("cache.sqlite"))
+
+    assert cold_out == expected and warm_out == expected, "results differ"
+    n = args.lines
+    print(f"{n} lines, {args.distinct} distinct expensive, {args.jobs} workers")
+    print(f"no disk cache  {plain:7.3f} s  {plain / n * 1e6:8.1f} us/line")
+    print(f"cold           {cold:7.3f} s  {cold / n * 1e6:8.1f} us/line  x{cold / plain:.2f}")
+    print(f"warm           {warm:7.3f} s  {warm / n * 1e6:8.1f} us/line  x{warm / plain:.2f}")
+    print(f"{rows} entries stored, {stored / 1024:.0f} KiB counted, {size / 1024:.0f} KiB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Drive calckenda's handle_keypress with thousands of synthetic keys.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_display [--keys N]
+
+No display is needed: a minimal stand-in for tkinter is installed in
+sys.modules, and its Entry counts the characters every insert, delete and
+get touches, which is what costs Tk time on a real widget. Runs:
+
+* rewrite    the old Display.update, delete(0, "end") + insert(0, text)
+* per-key    DisplayWriter, with the event loop going idle after each key
+* burst      DisplayWriter, idle once per 50 keys (auto-repeat, fast typing)
+* paste      the same keys as one clipboard paste through handle_paste,
+             then one more key, which rebuilds the preview states
+"""
+import argparse
+import sys
+import time
+import types
+
+KEYS = "12+34*(5-6)/7-"
+
+
+class _Widget:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def grid(self, **kwargs):
+        pass
+
+    def pack(self, **kwargs):
+        pass
+
+    def config(self, **kwargs):
+        pass
+
+    configure = config
+
+
+class FakeRoot(_Widget):
+    def __init__(self):
+        self.idle = []
+
+    def title(self, text):
+        pass
+
+    def geometry(self, spec):
+        pass
+
+    def rowconfigure(self, index, **kwargs):
+        pass
+
+    columnconfigure = rowconfigure
+
+    def bind(self, sequence, func):
+        pass
+
+    def bind_class(self, class_name, sequence, func):
+        pass
+
+    def clipboard_get(self):
+        return self.clipboard
+
+    def after_idle(self, func, *args):
+        self.idle.append((func, args))
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for func, args in idle:
+            func(*args)
+
+
+ROOT = FakeRoot()
+
+
+class FakeEntry(_Widget):
+    work = 0
+
+    def __init__(self, *args, **kwargs):
+        self.text = ""
+
+    def _index(self, index):
+        return len(self.text) if index == "end" else index
+
+    def get(self):
+        FakeEntry.work += len(self.text)
+        return self.text
+
+    def index(self, index):
+        return self._index(index)
+
+    def insert(self, index, value):
+        value = str(value)
+        i = self._index(index)
+        FakeEntry.work += len(value)
+        self.text = self.text[:i] + value + self.text[i:]
+
+    def delete(self, first, last=None):
+        first = self._index(first)
+        last = first + 1 if last is None else self._index(last)
+        FakeEntry.work += last - first
+        self.text = self.text[:first] + self.text[last:]
+
+    def icursor(self, index):
+        pass
+
+    def after_idle(self, func, *args):
+        ROOT.after_idle(func, *args)
+
+
+def install_fake_tkinter():
+    tk = types.ModuleType("tkinter")
+    tk.Tk = FakeRoot
+    tk.Frame = tk.Label = tk.Button = _Widget
+    tk.Entry = FakeEntry
+    tk.END = "end"
+    tk.RIGHT = "right"
+    sys.modules["tkinter"] = tk
+
+
+class Event:
+    def __init__(self, char="", widget=None):
+        self.char = char
+        self.widget = widget
+
+
+def run(keys, idle_every, rewrite=False):
+    import calckenda
+
+    ui = calckenda.CalculatorUI(ROOT)
+    entry = ui.display.entry
+    if rewrite:
+        def update(value):
+            entry.delete(0, "end")
+            entry.insert(0, str(value))
+        ui.display.update = update
+    FakeEntry.work = 0
+    start = time.perf_counter()
+    for i, char in enumerate(keys, 1):
+        ui.handle_keypress(Event(char))
+        if i % idle_every == 0:
+            ROOT.run_idle()
+    ROOT.run_idle()
+    elapsed = time.perf_counter() - start
+    assert entry.text == ui.engine.expression
+    return elapsed, FakeEntry.work
+
+
+def run_paste(keys):
+    import calckenda
+
+    ui = calckenda.CalculatorUI(ROOT)
+    entry = ui.display.entry
+    ROOT.clipboard = keys
+    FakeEntry.work = 0
+    start = time.perf_counter()
+    ui.handle_paste(Event(widget=ROOT))
+    ROOT.run_idle()
+    pasted = time.perf_counter() - start
+    ui.handle_keypress(Event("1"))
+    ROOT.run_idle()
+    elapsed = time.perf_counter() - start
+    assert entry.text == ui.engine.expression
+    return pasted, elapsed, FakeEntry.work
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=5000)
+    args = parser.parse_args()
+    install_fake_tkinter()
+    keys = (KEYS * (args.keys // len(KEYS) + 1))[:args.keys]
+
+    for name, idle_every, rewrite in (("rewrite", 1, True), ("per-key", 1, False),
+                                      ("burst", 50, False)):
+        elapsed, work = run(keys, idle_every, rewrite)
+        print(f"{name:8} {len(keys)} keys  {elapsed * 1e3:8.1f} ms  "
+              f"{elapsed / len(keys) * 1e6:7.1f} us/key  {work:>12,} chars touched in Tk")
+    pasted, elapsed, work = run_paste(keys)
+    print(f"paste    {len(keys)} chars {pasted * 1e3:8.1f} ms  "
+          f"(+ next key {(elapsed - pasted) * 1e3:.1f} ms)  {work:>12,} chars touched in Tk")
+
+
+if __name__ == "__main__":
+    main()
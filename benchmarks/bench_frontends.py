@@ -0,0 +1,370 @@
+"""Headless benchmark of all nine calculator front-ends.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_frontends [--sessions N] [--output report.json]
+                                         [--baseline old.json] [--tolerance 0.25]
+                                         [--fail-on-regression]
+
+A stand-in tkinter is installed in sys.modules: a root that queues
+``after``/``after_idle`` callbacks, an Entry that holds its text, and
+Buttons that remember their commands. Each front-end is built on it and
+driven the way a user would: keys go to the root's ``<Key>`` binding
+when the module has one and otherwise to the Button with that label,
+and "=" is always the "=" Button. usingDuckType is composed through its
+DisplayProtocol/EngineProtocol seams, as its ``__main__`` does.
+
+For every front-end it reports:
+
+* construct_ms  median time to build the UI (for t.py, which builds its
+                window at import, a fresh import)
+* key_us        keypress-to-display latency: the handler plus the idle
+                callbacks and timers it leaves behind (p50, p99)
+* equals_us     the same for "=" (p50, p99)
+* peak_kib      tracemalloc peak over one construction and session
+
+The report is JSON, written to --output (and a table to stdout). With
+--baseline, each metric is compared with the saved report and ratios
+above 1 + tolerance are flagged; --fail-on-regression turns a flagged
+run into exit status 1.
+"""
+import argparse
+import heapq
+import importlib
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+
+# --- stand-in tkinter ----------------------------------------------------
+
+
+class TclError(Exception):
+    pass
+
+
+class FakeTk:
+    def __init__(self, *args, **kwargs):
+        self.root = self
+        self.bindings = {}
+        self.buttons = {}
+        self.entries = []
+        self.idle = []
+        self.timers = []
+        self._order = itertools.count()
+        self.clipboard = ""
+        _tk._default_root = self
+
+    # window management, all no-ops
+    def title(self, *args):
+        pass
+
+    def geometry(self, *args):
+        pass
+
+    def configure(self, **kwargs):
+        pass
+
+    config = configure
+
+    def rowconfigure(self, index, **kwargs):
+        pass
+
+    columnconfigure = grid_columnconfigure = grid_rowconfigure = rowconfigure
+
+    def mainloop(self):
+        pass
+
+    def bind(self, sequence, func=None):
+        self.bindings[sequence] = func
+
+    def bind_class(self, class_name, sequence, func=None):
+        pass
+
+    def clipboard_get(self):
+        return self.clipboard
+
+    # event loop
+    def after_idle(self, func, *args):
+        self.idle.append((func, args))
+
+    def after(self, ms, func=None, *args):
+        due = time.perf_counter() + ms / 1000
+        heapq.heappush(self.timers, (due, next(self._order), func, args))
+
+    def pump(self, timeout=30.0):
+        """Run idle callbacks and timers until nothing is left."""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self.idle:
+                idle, self.idle = self.idle, []
+                for func, args in idle:
+                    func(*args)
+            elif self.timers:
+                due, _, func, args = heapq.heappop(self.timers)
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                func(*args)
+            else:
+                return
+        raise RuntimeError("front-end never went idle")
+
+
+class FakeWidget:
+    def __init__(self, master=None, *args, **kwargs):
+        if master is None:
+            master = kwargs.get("master") or _tk._default_root
+        self.master = master
+        self.root = master.root
+        self.options = kwargs
+
+    def grid(self, **kwargs):
+        pass
+
+    pack = place = grid
+
+    def configure(self, **kwargs):
+        self.options.update(kwargs)
+
+    config = configure
+
+    def bind(self, sequence, func=None):
+        pass
+
+    def focus_set(self):
+        pass
+
+    def after_idle(self, func, *args):
+        self.root.after_idle(func, *args)
+
+    def after(self, ms, func=None, *args):
+        self.root.after(ms, func, *args)
+
+
+class FakeButton(FakeWidget):
+    def __init__(self, master=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.root.buttons[str(kwargs.get("text"))] = kwargs.get("command")
+
+
+class FakeEntry(FakeWidget):
+    def __init__(self, master=None, *args, **kwargs):
+        super().__init__(master, *args, **kwargs)
+        self.text = ""
+        self.root.entries.append(self)
+
+    def _index(self, index):
+        return len(self.text) if index == "end" else int(index)
+
+    def get(self):
+        return self.text
+
+    def index(self, index):
+        return self._index(index)
+
+    def insert(self, index, value):
+        i = self._index(index)
+        self.text = self.text[:i] + str(value) + self.text[i:]
+
+    def delete(self, first, last=None):
+        first = self._index(first)
+        last = first + 1 if last is None else self._index(last)
+        self.text = self.text[:first] + self.text[last:]
+
+    def icursor(self, index):
+        pass
+
+
+_tk = types.ModuleType("tkinter")
+_tk._default_root = None
+_tk.Tk = FakeTk
+_tk.TclError = TclError
+_tk.Entry = FakeEntry
+_tk.Button = FakeButton
+_tk.Frame = _tk.Label = _tk.Canvas = _tk.Scrollbar = FakeWidget
+_tk.Event = object
+_tk.END = "end"
+_tk.RIGHT = "right"
+_tk.LEFT = "left"
+
+
+def install_fake_tkinter():
+    sys.modules["tkinter"] = _tk
+
+
+# --- front-ends -----------------------------------------------------------
+
+EXPRESSION_KEYS = list("12+34*5-6") + ["="]
+# Chained operations and a repeated "=": ((12 + 34) * 5 - 6) = 224, then 218.
+BINARY_KEYS = ["1", "2", "+", "3", "4", "*", "5", "-", "6", "=", "="]
+
+
+def _build_t():
+    sys.modules.pop("t", None)
+    return importlib.import_module("t").root
+
+
+def _build(module, factory):
+    def build():
+        root = FakeTk()
+        factory(importlib.import_module(module), root)
+        return root
+    return build
+
+
+def _duck(module, root):
+    from calcengine import CalculatorEngine
+
+    module.CalculatorUI(root, module.Display(root), CalculatorEngine())
+
+
+FRONTENDS = {
+    "t": (_build_t, BINARY_KEYS),
+    "calc": (_build("calc", lambda m, root: m.CalculatorApp(root)), BINARY_KEYS),
+    "calculator": (_build("calculator", lambda m, root: m.Calculator(root)), EXPRESSION_KEYS),
+    "calckenda": (_build("calckenda", lambda m, root: m.CalculatorUI(root)), EXPRESSION_KEYS),
+    "Claudecalc": (_build("Claudecalc", lambda m, root: m.Calculator(root)), BINARY_KEYS),
+    "typenotationclac": (_build("typenotationclac", lambda m, root: m.Calculator(root)),
+                         BINARY_KEYS),
+    "catCalculator": (_build("catCalculator", lambda m, root: m.Calculator(root)), BINARY_KEYS),
+    "notationDuckCalc": (_build("notationDuckCalc", lambda m, root: m.Calculator(root)),
+                         BINARY_KEYS),
+    "usingDuckType": (_build("usingDuckType", _duck), EXPRESSION_KEYS),
+}
+
+
+class KeyEvent:
+    def __init__(self, char, widget):
+        self.char = char
+        self.keysym = char
+        self.widget = widget
+
+
+def press(root, key):
+    if key != "=" and "<Key>" in root.bindings:
+        root.bindings["<Key>"](KeyEvent(key, root))
+    else:
+        root.buttons[key]()
+    root.pump()
+
+
+def clear(root):
+    for label in ("C", "Clear", "clear"):
+        if label in root.buttons:
+            root.buttons[label]()
+            break
+    root.pump()
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {"p50": round(samples[len(samples) // 2] * 1e6, 2),
+            "p99": round(samples[min(len(samples) * 99 // 100, len(samples) - 1)] * 1e6, 2)}
+
+
+def measure(build, keys, sessions, constructs):
+    build()  # import the module and warm caches outside the timings
+    tracemalloc.start()
+    root = build()
+    key_times, equals_times = [], []
+    for _ in range(sessions):
+        clear(root)
+        for key in keys:
+            start = time.perf_counter()
+            press(root, key)
+            (equals_times if key == "=" else key_times).append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    display = root.entries[0].text
+
+    construct_times = []
+    for _ in range(constructs):
+        start = time.perf_counter()
+        build()
+        construct_times.append(time.perf_counter() - start)
+    return {
+        "construct_ms": round(statistics.median(construct_times) * 1e3, 3),
+        "key_us": percentiles(key_times),
+        "equals_us": percentiles(equals_times),
+        "peak_kib": round(peak / 1024, 1),
+        "display": display,
+    }
+
+
+# --- reporting ------------------------------------------------------------
+
+
+def flatten(result):
+    for metric, value in result.items():
+        if isinstance(value, dict):
+            for part, number in value.items():
+                yield f"{metric}.{part}", number
+        elif isinstance(value, (int, float)):
+            yield metric, value
+
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for name, result in report["frontends"].items():
+        old = baseline.get("frontends", {}).get(name)
+        if old is None:
+            continue
+        old_metrics = dict(flatten(old))
+        for metric, value in flatten(result):
+            before = old_metrics.get(metric)
+            if not before:
+                continue
+            ratio = value / before
+            flag = "REGRESSION" if ratio > 1 + tolerance else ""
+            print(f"  {name:17} {metric:14} {before:11.2f} -> {value:11.2f}  x{ratio:5.2f}  {flag}")
+            if flag:
+                regressions.append((name, metric, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200,
+                        help="key sequences typed per front-end")
+    parser.add_argument("--constructs", type=int, default=20)
+    parser.add_argument("--only", nargs="*", choices=sorted(FRONTENDS))
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+    install_fake_tkinter()
+
+    report = {"python": platform.python_version(), "sessions": args.sessions,
+              "frontends": {}}
+    print(f"{'front-end':17} {'build ms':>9} {'key p50':>9} {'key p99':>9} "
+          f"{'= p50':>9} {'= p99':>9} {'peak KiB':>9}  display")
+    for name in args.only or FRONTENDS:
+        build, keys = FRONTENDS[name]
+        result = measure(build, keys, args.sessions, args.constructs)
+        report["frontends"][name] = result
+        print(f"{name:17} {result['construct_ms']:9.3f} {result['key_us']['p50']:9.1f} "
+              f"{result['key_us']['p99']:9.1f} {result['equals_us']['p50']:9.1f} "
+              f"{result['equals_us']['p99']:9.1f} {result['peak_kib']:9.1f}  "
+              f"{result['display']!r}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        regressions = compare(report, baseline, args.tolerance)
+        print(f"{len(regressions)} regression(s)")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Time the big-number functions against a naive running product.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_functions [--workers N]
+
+Factorials go through calcfunctions (binary splitting, optionally split
+across --workers forked processes) and are checked against math; the
+naive loop multiplies 1..n into one accumulator, and is only run up to
+n = 100000, where it already takes several seconds. The last rows are
+full calculator round trips, parse to formatted result.
+"""
+import argparse
+import math
+import time
+
+from calcengine import CalculatorEngine
+from calcfunctions import binomial, factorial, permutations, powmod
+
+NAIVE_LIMIT = 100_000
+
+
+def naive_factorial(n):
+    result = 1
+    for i in range(2, n + 1):
+        result *= i
+    return result
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes for factorials of 200000 and more")
+    args = parser.parse_args()
+
+    print(f"{'n!':>10} {'product tree':>13} {'naive loop':>11}")
+    for n in (10_000, 30_000, 100_000, 300_000, 1_000_000):
+        fast, value = timed(factorial, n, args.workers)
+        assert value == math.factorial(n)
+        if n <= NAIVE_LIMIT:
+            slow, _ = timed(naive_factorial, n)
+            slow_text = f"{slow:10.3f}s"
+        else:
+            slow_text = f"{'-':>11}"
+        print(f"{n:>10,} {fast:12.3f}s {slow_text}")
+
+    print()
+    for label, func, call in (
+            ("nCr(200000, 100000)", binomial, (200_000, 100_000)),
+            ("nPr(200000, 100000)", permutations, (200_000, 100_000, args.workers)),
+            ("powmod(3, 10**100, 10**9 + 7)", powmod, (3, 10**100, 10**9 + 7))):
+        seconds, _ = timed(func, *call)
+        print(f"{label:32} {seconds * 1e3:9.2f} ms")
+
+    engine = CalculatorEngine()
+    for expression in ("100000!", "nCr(52, 5) * 4!", "powmod(2, 10**18, 97)"):
+        engine.cache.clear()
+        seconds, result = timed(engine.calculate, expression)
+        print(f"{'= ' + expression:32} {seconds * 1e3:9.2f} ms  {result[:30]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Append throughput and open time of the calculation history.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_history [--entries N]
+
+Writes N entries to a history in a temporary directory, then times
+re-opening it and reading the most recent 50 entries. Opening maps the
+files and checks only the last record, so it should not grow with N.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from calchistory import History
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history")
+        with History(path) as history:
+            start = time.perf_counter()
+            for i in range(args.entries):
+                history.append(f"({i} + 1.5) * {i % 13} ^ 2", str(i * 1.5), i * 1.5)
+            written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        history = History(path)
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        recent = history.recent(50)
+        read = time.perf_counter() - start
+        assert len(history) == args.entries and len(recent) == min(50, args.entries)
+        size = os.path.getsize(path + ".idx") + os.path.getsize(path + ".log")
+        history.close()
+
+    n = args.entries
+    print(f"append      {n} entries  {written / n * 1e6:6.2f} us/entry  ({size / 1e6:.1f} MB on disk)")
+    print(f"open        {opened * 1e3:8.3f} ms")
+    print(f"recent(50)  {read * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Guard the cold-start cost of importing the engine.
+
+Runs ``python -X importtime -c "import calcengine"`` in fresh interpreters,
+reports the median cumulative import time and fails when it exceeds the
+budget or when a heavy module (tkinter, typing_extensions, numpy) shows up
+in the import graph. Run from the repository root:
+
+    python -m benchmarks.bench_import [--budget-ms 25] [--runs 7]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+FORBIDDEN = ("tkinter", "_tkinter", "typing_extensions", "numpy")
+
+
+def import_profile(module):
+    """Return ``(cumulative_us, imported_module_names)`` for one cold import."""
+    # Measure what users get: a fresh interpreter with bytecode caches.
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line[12:].split("|"))
+        if cumulative_us.isdigit():
+            cumulative[name] = int(cumulative_us)
+    return cumulative[module], set(cumulative)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="engine import-time guard")
+    parser.add_argument("--module", default="calcengine")
+    parser.add_argument("--budget-ms", type=float, default=25.0)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    import_profile(args.module)  # warm-up run writes the .pyc files
+    times = []
+    modules = set()
+    for _ in range(args.runs):
+        us, imported = import_profile(args.module)
+        times.append(us)
+        modules |= imported
+    median_ms = statistics.median(times) / 1000
+    reference_ms = statistics.median(import_profile("tkinter")[0] for _ in range(3)) / 1000
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms; import tkinter alone: {reference_ms:.1f} ms)")
+    heavy = sorted(name for name in modules if name.split(".")[0] in FORBIDDEN)
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported: {', '.join(heavy)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
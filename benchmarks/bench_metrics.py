@@ -0,0 +1,49 @@
+"""Cost of engine instrumentation, off and on.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics [--rounds N]
+
+Types a short expression key by key and calculates it (served from the
+result cache after the first round) with the default no-op metrics and
+with a live :class:`calcmetrics.Metrics`, and reports time per round for
+each. Disabled instrumentation should be indistinguishable from noise.
+"""
+import argparse
+import time
+
+from calcengine import CalculatorEngine
+from calcmetrics import Metrics
+
+KEYS = "12+34*5-6"
+
+
+def run(engine, rounds):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            engine.clear()
+            for key in KEYS:
+                engine.append(key)
+            engine.calculate()
+        best = min(best, time.perf_counter() - start)
+    return best / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    off = run(CalculatorEngine(), args.rounds)
+    metrics = Metrics()
+    on = run(CalculatorEngine(metrics=metrics), args.rounds)
+    print(f"metrics off  {off * 1e6:7.2f} us/round")
+    print(f"metrics on   {on * 1e6:7.2f} us/round  (+{(on - off) / off:.1%})")
+    print(f"recorded     {metrics.counters.get('calculate_total', 0)} calculations, "
+          f"{metrics.counters.get('append_total', 0)} appends")
+
+
+if __name__ == "__main__":
+    main()
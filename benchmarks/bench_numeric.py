@@ -0,0 +1,48 @@
+"""Compare the numeric backends on the same expressions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_numeric
+
+Each mode evaluates integer-only, decimal-literal and mixed workloads from
+pre-parsed trees, so the numbers are the arithmetic plus the postfix
+compile and not the parser.
+"""
+import time
+
+from calcexpr import parse
+from calcnumeric import NUMERIC_MODES, make_backend
+
+WORKLOADS = {
+    "integer": [f"({i} + {i % 7}) * {i % 13} - {i} % 5 + 2 ^ {i % 9}" for i in range(200)],
+    "decimal": [f"0.{i} + 0.{i % 7 + 1} * 1.{i % 13} - {i}.25" for i in range(200)],
+    "mixed": [f"{i} / {i % 7 + 1} + 0.1 * {i} - 1e{i % 5}" for i in range(200)],
+}
+REPEAT = 25
+
+
+def run(backend, nodes):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for node in nodes:
+            backend.evaluate(node)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'mode':10}" + "".join(f"{name:>14}" for name in WORKLOADS))
+    for mode in NUMERIC_MODES:
+        backend = make_backend(mode)
+        row = []
+        for texts in WORKLOADS.values():
+            nodes = [parse(text) for text in texts]
+            elapsed = run(backend, nodes)
+            row.append(elapsed / (REPEAT * len(nodes)) * 1e6)
+        line = f"{mode:10}" + "".join(f"{us:11.2f} us" for us in row)
+        if mode == "adaptive":
+            line += f"   ({backend.redone} redone in Decimal)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
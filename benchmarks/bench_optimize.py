@@ -0,0 +1,87 @@
+"""Time optimized against plain programs for formulas evaluated repeatedly.
+
+Run from the repository root (the array rows need numpy):
+
+    python -m benchmarks.bench_optimize [--rounds N] [--size N]
+
+Each formula is compiled once both ways and executed --rounds times with
+changing variables, as the engine does with a kept formula; the array
+rows evaluate it once over --size elements, unoptimized (the ufunc per
+AST node that calcvector used to apply) against VectorizedExpression.
+The optimized form is printed as calcbatch --dump-optimized shows it.
+"""
+import argparse
+import time
+
+from calcexpr import compile_node, execute, parse
+from calcoptimize import compile_optimized, dump, optimize
+
+FORMULAS = (
+    "P * (1 + r / 12) ** (12 * 30) * (r / 12) / ((1 + r / 12) ** (12 * 30) - 1)",
+    "(x - 0.5)**2 + (y - 0.5)**2 + 2 * (x - 0.5) * (y - 0.5) * 1 + 0",
+    "x**4 - 3*x**3 + x**2 * (1 + 2*3) - 4",
+)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def run_program(program, rounds):
+    for i in range(rounds):
+        execute(program, {"P": 1000 + i, "r": 0.05, "x": i * 0.25, "y": 0.5})
+
+
+def unoptimized_arrays(np, node, arrays):
+    from calcexpr import Binary, Name, Num, postorder
+    from calcvector import _BINARY_UFUNCS, _UNARY_UFUNCS
+
+    stack = []
+    for current in postorder(node):
+        kind = type(current)
+        if kind is Num:
+            stack.append(current.value)
+        elif kind is Name:
+            stack.append(arrays[current.id])
+        elif kind is Binary:
+            right = stack.pop()
+            stack[-1] = getattr(np, _BINARY_UFUNCS[current.op])(stack[-1], right)
+        else:
+            stack[-1] = getattr(np, _UNARY_UFUNCS[current.op])(stack[-1])
+    return stack[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50_000)
+    parser.add_argument("--size", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    try:
+        import numpy as np
+        from calcvector import VectorizedExpression
+    except ImportError:
+        np = None
+
+    for formula in FORMULAS:
+        node = parse(formula)
+        optimized = optimize(node)
+        plain, _ = timed(run_program, compile_node(node), args.rounds)
+        fast, _ = timed(run_program, compile_optimized(optimized), args.rounds)
+        print(formula)
+        print(f"  -> {dump(optimized)}")
+        print(f"  execute    {plain / args.rounds * 1e6:8.2f} us  "
+              f"optimized {fast / args.rounds * 1e6:8.2f} us")
+        if np is not None:
+            rng = np.random.default_rng(0)
+            arrays = {name: rng.random(args.size) for name in ("P", "r", "x", "y")}
+            slow, expected = timed(unoptimized_arrays, np, node, arrays)
+            vector, result = timed(lambda: VectorizedExpression(node)(**arrays))
+            assert np.allclose(result, expected)
+            print(f"  arrays     {slow:8.3f} s   optimized {vector:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
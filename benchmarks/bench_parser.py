@@ -0,0 +1,43 @@
+"""Compare calcexpr against the eval() path the engines used to take.
+
+"cold" parses, compiles and runs every time, as a first evaluate() of an
+input does; evaluate() keeps the program by text, so "repeat" is what
+every later call of the same input costs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parser
+"""
+import timeit
+
+from calcexpr import compile_node, evaluate, execute, parse
+
+SHORT = "12+34*5"
+MEDIUM = "(1.5+2)*3-4/5**2+(6%4)"
+LONG = "+".join(f"({i}*{i + 1}-{i}/7)" for i in range(200))
+
+CASES = [("short", SHORT), ("medium", MEDIUM), ("long", LONG)]
+
+
+def bench(label, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    per_call = best / number * 1e6
+    print(f"  {label:<22}{per_call:>12.2f} us")
+    return per_call
+
+
+def main():
+    for name, text in CASES:
+        assert evaluate(text) == eval(text), name
+        number = 20000 if len(text) < 100 else 200
+        print(f"{name} ({len(text)} chars)")
+        baseline = bench("eval", lambda: eval(text), number)
+        cold = bench("cold parse+execute", lambda: execute(compile_node(parse(text))),
+                     number)
+        ours = bench("repeat evaluate", lambda: evaluate(text), number)
+        print(f"  cold vs eval         {baseline / cold:>12.2f}x")
+        print(f"  repeat vs eval       {baseline / ours:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Headless latency check for the evaluation scheduler.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_scheduler
+
+A fake root runs ``after`` callbacks from a heap and a fake display
+records when results arrive, so no Tk or display is needed. Reports:
+
+* inline latency of "=" for ordinary expressions,
+* latency of a heavy expression sent to the background,
+* the longest stall of a 5 ms UI tick while that job runs,
+* that a job superseded by new input never reaches the display.
+"""
+import heapq
+import itertools
+import time
+
+from calcengine import CalculatorEngine
+from calccache import ResultCache
+from calcscheduler import EvaluationScheduler
+
+HEAVY = "3 ** 1500000 % 1000"
+
+
+class FakeRoot:
+    def __init__(self):
+        self._queue = []
+        self._order = itertools.count()
+
+    def after(self, ms, func, *args):
+        due = time.perf_counter() + ms / 1000
+        heapq.heappush(self._queue, (due, next(self._order), func, args))
+
+    def run_until(self, done, timeout=30.0):
+        deadline = time.perf_counter() + timeout
+        while not done() and self._queue and time.perf_counter() < deadline:
+            due, _, func, args = heapq.heappop(self._queue)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            func(*args)
+
+
+class FakeDisplay:
+    """Implements DisplayProtocol from usingDuckType."""
+
+    def __init__(self):
+        self.updates = []
+
+    def update(self, value):
+        self.updates.append((time.perf_counter(), value))
+
+    def clear(self):
+        self.update("")
+
+    def show_preview(self, value):
+        pass
+
+
+def engine_for(text):
+    engine = CalculatorEngine(cache=ResultCache())
+    engine.expression = text
+    return engine
+
+
+def inline_latency(scheduler, display, n=2000):
+    engines = [engine_for(f"({i} + 1.5) * {i % 13} ^ 2 - {i} / 3") for i in range(n)]
+    start = time.perf_counter()
+    for engine in engines:
+        assert scheduler.calculate(engine, display.update)
+    return (time.perf_counter() - start) / n
+
+
+def background_latency(root, scheduler, display):
+    ticks = []
+
+    def tick():
+        ticks.append(time.perf_counter())
+        if scheduler.pending:
+            root.after(5, tick)
+
+    display.updates.clear()
+    start = time.perf_counter()
+    assert not scheduler.calculate(engine_for(HEAVY), display.update)
+    root.after(5, tick)
+    root.run_until(lambda: display.updates)
+    latency = display.updates[0][0] - start
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    return latency, max(gaps, default=0.0), display.updates[0][1]
+
+
+def superseded(root, scheduler, display):
+    display.updates.clear()
+    scheduler.calculate(engine_for(HEAVY), display.update)
+    scheduler.calculate(engine_for("1 + 1"), display.update)
+    root.after(500, lambda: None)
+    root.run_until(lambda: False, timeout=0.5)
+    return [value for _, value in display.updates]
+
+
+def main():
+    root = FakeRoot()
+    display = FakeDisplay()
+    scheduler = EvaluationScheduler(root)
+    try:
+        per_call = inline_latency(scheduler, display)
+        latency, stall, value = background_latency(root, scheduler, display)
+        delivered = superseded(root, scheduler, display)
+    finally:
+        scheduler.shutdown()
+    print(f"inline '='             {per_call * 1e6:8.1f} us")
+    print(f"background '='         {latency * 1e3:8.1f} ms  -> {value}")
+    print(f"longest 5 ms tick gap  {stall * 1e3:8.1f} ms")
+    print(f"superseded job         delivered {delivered}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Build and query times of the history search indexes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search [--entries N]
+
+Writes N entries to a history in a temporary directory, times the first
+query (which builds the indexes), a set of prefix, substring and range
+queries, and indexing a further 1% of entries appended afterwards, which
+extends the indexes instead of rebuilding them.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from calchistory import History
+from calcsearch import HistorySearch
+
+QUERIES = (
+    ("prefix", "(12"), ("prefix", "(99999 "), ("prefix", "zzz"),
+    ("substring", "77 +"), ("substring", ") * 5 ^"), ("substring", "+"), ("substring", "xyz"),
+    ("value_range", (100.0, 200.0)), ("value_range", (0.0, 1e12)), ("value_range", (-5.0, -1.0)),
+)
+
+
+def fill(history, start, stop):
+    for i in range(start, stop):
+        history.append(f"({i} + 1.5) * {i % 13} ^ 2", str(i * 1.5), i * 1.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.entries
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with History(os.path.join(tmp, "history")) as history:
+            fill(history, 0, n)
+            search = HistorySearch(history)
+            start = time.perf_counter()
+            search.prefix("1")
+            built = time.perf_counter() - start
+            print(f"build       {n} entries  {built * 1e3:9.1f} ms  ({built / n * 1e6:.2f} us/entry)")
+
+            for kind, query in QUERIES:
+                args = query if isinstance(query, tuple) else (query,)
+                start = time.perf_counter()
+                found = getattr(search, kind)(*args)
+                elapsed = time.perf_counter() - start
+                print(f"{kind:11} {str(query):18} {len(found):4} hits  {elapsed * 1e3:8.3f} ms")
+
+            extra = max(n // 100, 1)
+            fill(history, n, n + extra)
+            start = time.perf_counter()
+            search.substring("+ 1.5")
+            elapsed = time.perf_counter() - start
+            print(f"catch up    {extra} new entries  {elapsed * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
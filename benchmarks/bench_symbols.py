@@ -0,0 +1,56 @@
+"""Time re-evaluating formulas after their variables change.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_symbols [--rounds N]
+
+A session defines a few variables and a function, then alternates
+assigning a variable with evaluating formulas that use it. The engine
+runs the kept programs; the comparison parses and compiles each formula
+again every time, as evaluating the text from scratch would.
+"""
+import argparse
+import time
+
+from calccache import ResultCache
+from calcengine import CalculatorEngine
+from calcexpr import compile_node, execute, parse
+
+SETUP = ("P = 1000", "r = 0.05", "n = 12", "f(t) = P * (1 + r / n) ** (n * t)")
+FORMULAS = ("f(10) - P", "P * r / n / (1 - (1 + r / n) ** -(n * 30))", "f(1) / P - 1")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    engine = CalculatorEngine(cache=ResultCache())
+    for statement in SETUP:
+        engine.calculate(statement)
+    symbols = engine.symbols
+    rates = [f"r = 0.0{i % 9 + 1}" for i in range(args.rounds)]
+
+    start = time.perf_counter()
+    for rate in rates:
+        engine.calculate(rate)
+        for formula in FORMULAS:
+            engine.calculate(formula)
+    kept = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for rate in rates:
+        engine.calculate(rate)
+        for formula in FORMULAS:
+            node = parse(formula, symbols.functions)
+            execute(compile_node(node, engine.backend, symbols.functions),
+                    symbols.variables)
+    reparsed = time.perf_counter() - start
+
+    per_round = 1e6 / args.rounds
+    print(f"kept programs     {kept * per_round:8.2f} us/round")
+    print(f"parse every time  {reparsed * per_round:8.2f} us/round")
+
+
+if __name__ == "__main__":
+    main()
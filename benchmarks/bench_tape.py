@@ -0,0 +1,133 @@
+"""Scroll the calctape panel over a large history with a stand-in Tk.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_tape [--entries N] [--scrolls N]
+
+Fills a temporary history with N entries, builds a TapePanel on a fake
+Canvas that counts the items it holds and the rows it refills, and then
+times wheel steps, page steps and scrollbar jumps, each followed by the
+idle redraw. Also reports what filling a Listbox with every row would
+have read from the history, for comparison.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+from calchistory import History
+
+
+class _Widget:
+    def __init__(self, *args, **kwargs):
+        self.idle = []
+
+    def pack(self, **kwargs):
+        pass
+
+    def grid(self, **kwargs):
+        pass
+
+    def bind(self, sequence, func):
+        pass
+
+    def set(self, first, last):
+        pass
+
+    def after_idle(self, func, *args):
+        self.idle.append((func, args))
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for func, args in idle:
+            func(*args)
+
+
+class FakeCanvas(_Widget):
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.items = {}
+        self.next_id = 1
+        self.fills = 0
+
+    def create_text(self, x, y, **options):
+        item = self.next_id
+        self.next_id += 1
+        self.items[item] = ""
+        return item
+
+    def delete(self, item):
+        del self.items[item]
+
+    def itemconfigure(self, item, text):
+        self.fills += 1
+        self.items[item] = text
+
+    def coords(self, item, x, y):
+        pass
+
+
+def install_fake_tkinter():
+    tk = types.ModuleType("tkinter")
+    tk.Frame = tk.Scrollbar = _Widget
+    tk.Canvas = FakeCanvas
+    sys.modules["tkinter"] = tk
+
+
+class Event:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--scrolls", type=int, default=2000)
+    args = parser.parse_args()
+    install_fake_tkinter()
+    from calctape import TapePanel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with History(os.path.join(tmp, "history")) as history:
+            for i in range(args.entries):
+                history.append(f"({i} + 1.5) * {i % 13}", str((i + 1.5) * (i % 13)), 0)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            tape = TapePanel(None, history)
+            canvas = tape.canvas
+            tape._resize(Event(width=240, height=600))
+            canvas.run_idle()
+            built = time.perf_counter() - start
+            print(f"build       {args.entries} entries  {built * 1e3:8.2f} ms  "
+                  f"{len(canvas.items)} canvas items")
+
+            rnd = random.Random(1)
+            for name, step in (("wheel", lambda: tape.scroll(rnd.choice((-3, 3)))),
+                               ("page", lambda: tape.yview("scroll", rnd.choice((-1, 1)), "pages")),
+                               ("jump", lambda: tape.yview("moveto", rnd.random()))):
+                canvas.fills = 0
+                start = time.perf_counter()
+                for _ in range(args.scrolls):
+                    step()
+                    canvas.run_idle()
+                elapsed = time.perf_counter() - start
+                print(f"{name:6} {args.scrolls} scrolls  {elapsed / args.scrolls * 1e6:8.1f} us/scroll  "
+                      f"{canvas.fills / args.scrolls:5.1f} rows refilled/scroll")
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"peak traced memory  {peak / 1024:.0f} KiB, {len(canvas.items)} canvas items")
+
+            start = time.perf_counter()
+            rows = [f"{entry.expression} = {entry.result}" for entry in history]
+            naive = time.perf_counter() - start
+            print(f"naive: reading all {len(rows)} rows for a Listbox takes {naive * 1e3:.0f} ms "
+                  f"before Tk inserts any")
+
+
+if __name__ == "__main__":
+    main()
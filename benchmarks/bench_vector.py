@@ -0,0 +1,52 @@
+"""Vectorized array evaluation against looping calculate() in Python.
+
+Run from the repository root (needs numpy):
+
+    python -m benchmarks.bench_vector [N]
+"""
+import sys
+import time
+
+import numpy as np
+
+from calcvector import VectorizedExpression
+from calcengine import CalculatorEngine
+
+EXPRESSION = "x**2 + 3*x - y/2"
+LOOP_SAMPLE = 20000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    rng = np.random.default_rng(0)
+    x = rng.random(n)
+    y = rng.random(n)
+
+    compiled = VectorizedExpression(EXPRESSION)
+    start = time.perf_counter()
+    result = compiled(x=x, y=y)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = x**2 + 3*x - y/2
+    handwritten = time.perf_counter() - start
+    assert np.allclose(result, expected)
+
+    # The old way: substitute each pair into the text and call calculate().
+    engine = CalculatorEngine()
+    engine.cache.enabled = False
+    start = time.perf_counter()
+    for i in range(LOOP_SAMPLE):
+        engine.expression = f"{x[i]!r}**2 + 3*{x[i]!r} - {y[i]!r}/2"
+        engine.calculate()
+    looped = (time.perf_counter() - start) / LOOP_SAMPLE * n
+
+    print(f"{EXPRESSION!r} over {n:,} pairs")
+    print(f"  VectorizedExpression    {vectorized:10.3f} s")
+    print(f"  handwritten numpy       {handwritten:10.3f} s")
+    print(f"  calculate() loop (est.) {looped:10.3f} s")
+    print(f"  speedup vs loop         {looped / vectorized:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
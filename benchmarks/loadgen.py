@@ -0,0 +1,109 @@
+"""Load generator for calcserver: latency percentiles and throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.loadgen [--connections 16] [--requests 500] [--batch 1]
+                                 [--heavy 0.0] [--address HOST:PORT]
+
+Without --address a server is started on a free port for the run. Each
+connection is a keep-alive client sending its requests back to back and
+timing each one from write to complete response. --batch puts that many
+expressions in every request; --heavy is the fraction of requests that
+carry one expression big enough to go to the worker pool.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+CHEAP = ("1+2*3", "(4.5 - 1) / 3", "2 ^ 10 - 1", "12 * (3 + 4) - 5 / 2", "1/0", "((7))")
+HEAVY = "3 ** 400000 % 1000"
+
+
+async def client(host, port, requests, batch, heavy, rnd, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            expressions = [rnd.choice(CHEAP) for _ in range(batch)]
+            if heavy and rnd.random() < heavy:
+                expressions[0] = HEAVY
+            body = json.dumps({"expressions": expressions}).encode()
+            request = (f"POST /evaluate HTTP/1.1\r\nHost: {host}\r\n"
+                       f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                       ).encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            payload = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200"):
+                raise RuntimeError(f"server said {head.splitlines()[0]!r}: {payload!r}")
+    finally:
+        writer.close()
+
+
+async def run(host, port, args):
+    latencies = []
+    rnd = random.Random(1)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, args.requests, args.batch, args.heavy,
+                                  random.Random(rnd.random()), latencies)
+                           for _ in range(args.connections)))
+    return time.perf_counter() - start, latencies
+
+
+def start_server():
+    server = subprocess.Popen([sys.executable, "calcserver.py", "--port", "0"],
+                              stdout=subprocess.PIPE, text=True)
+    line = server.stdout.readline()
+    if not line.startswith("listening on "):
+        server.kill()
+        raise RuntimeError(f"server did not start: {line!r}")
+    host, port = line.split()[-1].rsplit(":", 1)
+    return server, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="per connection")
+    parser.add_argument("--batch", type=int, default=1, help="expressions per request")
+    parser.add_argument("--heavy", type=float, default=0.0,
+                        help="fraction of requests with a worker-pool expression")
+    parser.add_argument("--address", help="HOST:PORT of a running server")
+    args = parser.parse_args()
+
+    server = None
+    if args.address:
+        host, port = args.address.rsplit(":", 1)
+        port = int(port)
+    else:
+        server, host, port = start_server()
+    try:
+        elapsed, latencies = asyncio.run(run(host, port, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    n = len(latencies)
+    p99 = latencies[min(n * 99 // 100, n - 1)]
+    print(f"{args.connections} connections x {args.requests} requests x {args.batch} expressions"
+          f"  (heavy {args.heavy:.0%})")
+    print(f"p50 {latencies[n // 2] * 1e3:8.2f} ms   p99 {p99 * 1e3:8.2f} ms"
+          f"   max {latencies[-1] * 1e3:8.2f} ms")
+    print(f"{n / elapsed:,.0f} requests/s   {n * args.batch / elapsed:,.0f} expressions/s"
+          f"   over {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
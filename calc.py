@@ -1,5 +1,7 @@
 from tkinter import *
 
+from calcengine import BinaryEngine
+
 class CalculatorApp:
     def __init__(self, root):
         self.root = root
@@ -9,9 +11,8 @@ class CalculatorApp:
         self.entry = Entry(root, width=35, borderwidth=5)
         self.entry.grid(row=0, column=0, columnspan=4, padx=10, pady=10)
         
-        # Variables for calculations
-        self.f_num = None
-        self.math = None
+        # First number, pending operation and running total
+        self.core = BinaryEngine()
         
         # Create buttons
         self.create_buttons()
@@ -35,45 +36,45 @@ class CalculatorApp:
             row = i // 4 + 1
             col = i % 4
             if text in "+-*/":
-                btn = Button(self.root, text=text, padx=20, pady=10, bg=operator_color, command=lambda t=text: command(t))
+                btn = Button(self.root, text=text, padx=20, pady=10, bg=operator_color, command=lambda t=text, c=command: c(t))
             elif text == "C":
                 btn = Button(self.root, text=text, padx=20, pady=10, bg=clear_color, command=command)
             elif text == "=":
                 btn = Button(self.root, text=text, padx=20, pady=10, bg=equal_color, command=command)
             else:
-                btn = Button(self.root, text=text, padx=20, pady=10, command=lambda t=text: command(t))
+                btn = Button(self.root, text=text, padx=20, pady=10, command=lambda t=text, c=command: c(t))
             btn.grid(row=row, column=col)
 
     def button_click(self, number):
-        current = self.entry.get()
-        self.entry.delete(0, END)
-        self.entry.insert(0, str(current) + str(number))
+        if self.core.start_operand():
+            self.entry.delete(0, END)
+        self.entry.insert(END, str(number))
     
     def button_clear(self):
         self.entry.delete(0, END)
+        self.core.clear()
     
     def button_operator(self, operator) -> int:
-        self.f_num = self.entry.get()
-        self.math = operator
+        first_number = self.entry.get()
         self.entry.delete(0, END)
+        try:
+            total = self.core.press_operator(operator, first_number)
+        except ValueError:
+            self.entry.insert(0, "Error")
+            return
+        if total is not None:
+            self.entry.insert(0, total)
     
     def button_equal(self) -> int:
         second_number = self.entry.get()
         self.entry.delete(0, END)
         try:
-            if self.math == "+":
-                self.entry.insert(0, self.f_num + second_number)
-            elif self.math == "-":
-                self.entry.insert(0, self.f_num - second_number)
-            elif self.math == "*":
-                self.entry.insert(0, self.f_num * second_number)
-            elif self.math == "/":
-                if second_number != 0:
-                    self.entry.insert(0, self.f_num / second_number)
-                else:
-                    self.entry.insert(0, "Error")
-        except Exception as e:
+            result = self.core.press_equals(second_number)
+        except ValueError:
             self.entry.insert(0, "Error")
+            return
+        if result is not None:
+            self.entry.insert(0, result)
 
 # Initialize the application
 if __name__ == "__main__":
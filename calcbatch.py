@@ -0,0 +1,153 @@
+"""Evaluate a file of expressions, one per line, without opening a window.
+
+    python calcbatch.py expressions.txt -o results.txt
+
+The input is memory-mapped and cut into chunks whose boundaries fall on
+newlines. Each worker process maps the file itself and only touches its
+own byte range, so the parent never reads or ships the data. Results are
+written in input order, one line per input line, using the same "Error"
+convention as the desktop engines. Each worker keeps its own symbol
+table, so a line like ``r = 0.05`` is only seen by the lines after it
+that the same worker evaluates; run a file that builds on its own
+definitions with ``--jobs 1``.
+
+``--dump-optimized`` writes each line as :mod:`calcoptimize` rewrites it
+instead of its result, to see what constant folding and shared
+subexpressions make of it.
+
+With ``--disk-cache PATH`` every worker reads and writes one shared
+:class:`calcdiskcache.DiskCache`, so a rerun over expressions seen before
+(by this or any other engine using the file) skips the expensive ones.
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from calccache import ResultCache
+from calcdiskcache import DiskCache
+from calcengine import CalculatorEngine
+from calcnumeric import DEFAULT_PRECISION, NUMERIC_MODES
+
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+_engine = None
+_dump_optimized = False
+
+
+def chunk_bounds(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> list[tuple[int, int]]:
+    """Split ``path`` into ``(start, end)`` byte ranges ending on newlines."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    bounds = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            newline = mm.find(b"\n", min(start + chunk_bytes, size) - 1)
+            end = size if newline == -1 else newline + 1
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def _init_worker(mode: str, precision: int, disk_cache: str | None = None,
+                 dump_optimized: bool = False) -> None:
+    global _engine, _dump_optimized
+    _dump_optimized = dump_optimized
+    cache = None
+    if disk_cache is not None:
+        cache = ResultCache(store=DiskCache(disk_cache))
+    _engine = CalculatorEngine(cache=cache, mode=mode, precision=precision)
+
+
+def evaluate_lines(lines: list[bytes], engine: CalculatorEngine,
+                   dump_optimized: bool = False) -> list[str]:
+    results = []
+    for line in lines:
+        engine.expression = line.decode("utf-8", "replace").strip()
+        if not dump_optimized:
+            results.append(engine.calculate())
+            continue
+        try:
+            results.append(engine.optimized())
+        except Exception:
+            results.append("Error")
+        if "=" in engine.expression:
+            # Later lines may use what this one defines.
+            engine.calculate()
+    return results
+
+
+def _evaluate_chunk(task: tuple[str, int, int]) -> tuple[int, bytes]:
+    path, start, end = task
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = mm[start:end].split(b"\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    results = evaluate_lines(lines, _engine, _dump_optimized)
+    return len(results), "".join(r + "\n" for r in results).encode("utf-8")
+
+
+def run(path: str, out, jobs: int | None = None,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES, mode: str = "float",
+        precision: int = DEFAULT_PRECISION, disk_cache: str | None = None,
+        dump_optimized: bool = False) -> int:
+    """Evaluate every line of ``path`` into the binary stream ``out``.
+
+    ``disk_cache`` is the path of a shared :class:`calcdiskcache.DiskCache`.
+    With ``dump_optimized`` the optimized form of each line is written
+    instead of its result. Returns the number of expressions evaluated.
+    """
+    tasks = [(path, start, end) for start, end in chunk_bounds(path, chunk_bytes)]
+    count = 0
+    # Not a multiprocessing.Pool: its workers are daemons, which may not
+    # start the processes calclimits evaluates heavy expressions in.
+    with ProcessPoolExecutor(jobs or os.cpu_count(), initializer=_init_worker,
+                             initargs=(mode, precision, disk_cache, dump_optimized)) as pool:
+        for lines, data in pool.map(_evaluate_chunk, tasks):
+            out.write(data)
+            count += lines
+    return count
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="file with one expression per line")
+    parser.add_argument("-o", "--output", help="result file (default: stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_BYTES,
+                        help="target bytes per chunk (default: %(default)s)")
+    parser.add_argument("--mode", choices=NUMERIC_MODES, default="float",
+                        help="arithmetic to use (default: %(default)s)")
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION,
+                        help="significant digits for decimal/adaptive (default: %(default)s)")
+    parser.add_argument("--disk-cache", metavar="PATH",
+                        help="persistent result cache shared with other runs and engines")
+    parser.add_argument("--dump-optimized", action="store_true",
+                        help="write the optimized form of each line instead of its result")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, "wb") as out:
+            count = run(args.input, out, args.jobs, args.chunk_size,
+                        args.mode, args.precision, args.disk_cache, args.dump_optimized)
+    else:
+        count = run(args.input, sys.stdout.buffer, args.jobs, args.chunk_size,
+                    args.mode, args.precision, args.disk_cache, args.dump_optimized)
+        sys.stdout.buffer.flush()
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"{count} expressions in {elapsed:.2f} s ({rate:,.0f} expr/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
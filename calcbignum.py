@@ -0,0 +1,270 @@
+"""Showing integers too long to print.
+
+``str()`` of an int is quadratic in its length, and since Python 3.11 it
+refuses outright past ``sys.get_int_max_str_digits()`` (4300 by default),
+so a result like ``2 ** 10000000`` used to come out as "Error". Integers
+(and fractions with such parts) above :data:`DIRECT_BITS` are instead
+shown by :func:`scientific` as ``d.ddd…e+N``: the leading digits and the
+exponent come from the top bits and ``bit_length``, which is immediate
+at any size.
+
+The full digits are produced on demand by :func:`to_digits`, a divide
+and conquer conversion: the number is split in two at a power of two,
+both halves are converted recursively and recombined with one Decimal
+fused multiply-add, ``hi * 2**k + lo``. Decimal multiplies large numbers
+with a number-theoretic transform, so the whole conversion is well under
+quadratic (3 million digits take about a second and a half), and
+``str()`` of the resulting Decimal is linear. :class:`DigitViewer` runs
+it on a background thread and pages through the digits without ever
+putting them all in a widget.
+
+decimal and tkinter are imported on first use.
+"""
+from __future__ import annotations
+
+import math
+import threading
+
+# Integers up to about this many digits are printed whole by str(), which
+# is still fast there and stays under the interpreter's default limit.
+DIRECT_DIGITS = 4000
+DIRECT_BITS = int(DIRECT_DIGITS * math.log2(10))
+SIGNIFICANT_DIGITS = 15
+# Bits converted by Decimal() directly at the bottom of the recursion.
+_LEAF_BITS = 1024
+# Top bits kept when working out leading digits: far more than the
+# significant digits shown, so rounding is exact but for pathological runs
+# of nines.
+_TOP_BITS = 192
+
+
+def is_big(value) -> bool:
+    """True for an int, or a Fraction with a part, too long for str()."""
+    if type(value) is int:
+        return value.bit_length() > DIRECT_BITS
+    numerator = getattr(value, "numerator", None)
+    if type(numerator) is not int:
+        return False
+    return max(numerator.bit_length(), value.denominator.bit_length()) > DIRECT_BITS
+
+
+def _context():
+    import decimal
+
+    return decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX,
+                           Emin=decimal.MIN_EMIN)
+
+
+def _log10(n: int, context):
+    """log10 of a positive int to the context's precision, from its top bits."""
+    shift = max(n.bit_length() - _TOP_BITS, 0)
+    top = context.create_decimal(n >> shift)
+    return context.add(context.log10(top), context.multiply(shift, context.log10(2)))
+
+
+def _split(log, digits: int, context) -> tuple[str, int]:
+    """Mantissa text rounded to ``digits`` digits, and exponent, of ``10**log``."""
+    exponent = int(log.to_integral_value(rounding="ROUND_FLOOR"))
+    mantissa = context.power(10, context.subtract(log, exponent))
+    text = f"{mantissa.quantize(context.create_decimal(1).scaleb(1 - digits)):f}"
+    if text.startswith("10"):
+        # 9.99…9 rounded up; also catches exact powers of ten, whose
+        # truncated top bits put the logarithm a hair below the integer.
+        return "1." + "0" * (digits - 1), exponent + 1
+    return text, exponent
+
+
+def digit_count(n: int) -> int:
+    """Number of decimal digits of ``abs(n)``, without converting it."""
+    n = abs(n)
+    if n.bit_length() <= DIRECT_BITS:
+        return len(str(n))
+    import decimal
+
+    context = decimal.Context(prec=60)
+    log = _log10(n, context)
+    exponent = int(log.to_integral_value(rounding="ROUND_HALF_EVEN"))
+    if abs(context.subtract(log, exponent)) > context.create_decimal("1e-30"):
+        return int(log.to_integral_value(rounding="ROUND_FLOOR")) + 1
+    # Within rounding of a power of ten: settle it exactly.
+    return exponent + 1 if n >= 10 ** exponent else exponent
+
+
+def scientific(value, digits: int = SIGNIFICANT_DIGITS) -> str:
+    """``value`` (an int or Fraction) as ``d.ddd…e+N`` with ``digits`` digits."""
+    import decimal
+
+    context = decimal.Context(prec=digits + 45)
+    numerator = getattr(value, "numerator", value)
+    denominator = getattr(value, "denominator", 1)
+    if numerator == 0:
+        return "0"
+    log = _log10(abs(numerator), context)
+    if denominator != 1:
+        log = context.subtract(log, _log10(denominator, context))
+    mantissa, exponent = _split(log, digits, context)
+    sign = "-" if numerator < 0 else ""
+    return f"{sign}{mantissa.rstrip('0').rstrip('.')}e{exponent:+d}"
+
+
+def to_digits(n: int) -> str:
+    """``str(n)`` for any size of int, in subquadratic time."""
+    if n.bit_length() <= DIRECT_BITS:
+        return str(n)
+    import decimal
+
+    D = decimal.Decimal
+    context = _context()
+    powers = {}
+
+    def power_of_two(bits):
+        power = powers.get(bits)
+        if power is None:
+            power = powers[bits] = context.power(D(2), bits)
+        return power
+
+    def convert(n, bits):
+        if bits <= _LEAF_BITS:
+            return D(n)
+        low_bits = bits >> 1
+        high = n >> low_bits
+        low = n - (high << low_bits)
+        return context.fma(convert(high, bits - low_bits), power_of_two(low_bits),
+                           convert(low, low_bits))
+
+    magnitude = abs(n)
+    digits = f"{convert(magnitude, magnitude.bit_length()):f}"
+    return "-" + digits if n < 0 else digits
+
+
+class DigitConversion:
+    """:func:`to_digits` of ``n`` on a daemon thread.
+
+    ``digits`` is None until :attr:`done`. Decimal holds the GIL while it
+    multiplies, so the UI can stall for a fraction of a second at the
+    largest steps, but never for the whole conversion.
+    """
+
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.digits: str | None = None
+        self.error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, name="calc-digits", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.digits = to_digits(self.n)
+        except Exception as error:  # MemoryError on a tiny machine
+            self.error = error
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+
+class DigitViewer:
+    """A window paging through the digits of a big integer.
+
+    Shows :func:`scientific` straight away and the digits once the
+    background conversion finishes, one page of :attr:`LINES` lines of
+    :attr:`WIDTH` digits at a time. Only the visible page is ever in the
+    Text widget.
+    """
+
+    WIDTH = 100
+    LINES = 20
+    GROUP = 10
+
+    def __init__(self, root, value: int, title: str = "Digits") -> None:
+        import tkinter as tk
+
+        self.value = value
+        self.page = 0
+        # Digits of the magnitude; the sign goes in the status line.
+        self.conversion = DigitConversion(abs(value))
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.status = tk.Label(self.window, anchor="w",
+                               text=f"{scientific(value)}   converting…")
+        self.status.pack(fill="x", padx=5, pady=(5, 0))
+        self.text = tk.Text(self.window, font=("Courier", 11), wrap="none",
+                            height=self.LINES,
+                            width=self.WIDTH + self.WIDTH // self.GROUP)
+        self.text.pack(fill="both", expand=True, padx=5, pady=5)
+        controls = tk.Frame(self.window)
+        controls.pack(fill="x", padx=5, pady=(0, 5))
+        for label, command in (("|<", self.first), ("<", self.previous),
+                               (">", self.next), (">|", self.last)):
+            tk.Button(controls, text=label, width=3, command=command).pack(side="left")
+        tk.Label(controls, text="  go to digit").pack(side="left")
+        self.target = tk.Entry(controls, width=12)
+        self.target.pack(side="left")
+        self.target.bind("<Return>", self.go_to)
+        self.window.bind("<Prior>", self.previous)
+        self.window.bind("<Next>", self.next)
+        self.window.bind("<Home>", self.first)
+        self.window.bind("<End>", self.last)
+        self.window.bind("<Escape>", lambda event: self.window.destroy())
+        self.window.after(50, self.poll)
+
+    @property
+    def page_size(self) -> int:
+        return self.WIDTH * self.LINES
+
+    @property
+    def pages(self) -> int:
+        digits = self.conversion.digits
+        return 0 if digits is None else -(-len(digits) // self.page_size)
+
+    def poll(self) -> None:
+        if not self.window.winfo_exists():
+            return
+        if not self.conversion.done:
+            self.window.after(50, self.poll)
+        elif self.conversion.error is not None:
+            self.status.configure(text=f"{scientific(self.value)}   "
+                                       f"could not convert: {self.conversion.error!r}")
+        else:
+            self.show(self.page)
+
+    def show(self, page: int) -> None:
+        digits = self.conversion.digits
+        if digits is None:
+            return
+        self.page = page = max(0, min(page, self.pages - 1))
+        start = page * self.page_size
+        chunk = digits[start:start + self.page_size]
+        lines = []
+        for i in range(0, len(chunk), self.WIDTH):
+            line = chunk[i:i + self.WIDTH]
+            lines.append(" ".join(line[j:j + self.GROUP] for j in range(0, len(line), self.GROUP)))
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.configure(state="disabled")
+        end = start + len(chunk)
+        sign = "negative, " if self.value < 0 else ""
+        self.status.configure(text=f"{sign}{len(digits):,} digits   "
+                                   f"showing {start + 1:,}–{end:,}   "
+                                   f"page {page + 1:,} of {self.pages:,}")
+
+    def first(self, event=None) -> None:
+        self.show(0)
+
+    def previous(self, event=None) -> None:
+        self.show(self.page - 1)
+
+    def next(self, event=None) -> None:
+        self.show(self.page + 1)
+
+    def last(self, event=None) -> None:
+        self.show(self.pages - 1)
+
+    def go_to(self, event=None) -> str:
+        try:
+            digit = int(self.target.get().replace(",", "").replace("_", ""))
+        except ValueError:
+            return "break"
+        self.show((max(digit, 1) - 1) // self.page_size)
+        return "break"
@@ -0,0 +1,102 @@
+"""Gap buffer holding the expression being edited.
+
+The text is two lists of characters: everything left of the cursor in
+order, and everything right of it reversed, so both ends of the gap are
+list tails. Typing, backspace and forward delete at the cursor are
+amortized O(1) and moving the cursor by k is O(k); nothing is copied.
+
+Readers that only need what changed ask for :meth:`GapBuffer.tail` from
+the lowest edited index, which :meth:`GapBuffer.take_dirty` reports, so
+the display and the preview do work proportional to the edit rather than
+to the expression. The full string is joined only on demand and cached
+until the next edit.
+"""
+from __future__ import annotations
+
+
+class GapBuffer:
+    def __init__(self, text: str = "") -> None:
+        self._before: list[str] = list(text)
+        # Right of the cursor, reversed: _after[-1] is the next character.
+        self._after: list[str] = []
+        self._text: str | None = text
+        # Lowest index changed since the last take_dirty().
+        self._dirty = 0
+
+    def __len__(self) -> int:
+        return len(self._before) + len(self._after)
+
+    def __str__(self) -> str:
+        return self.text
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._before) + "".join(reversed(self._after))
+        return self._text
+
+    @property
+    def cursor(self) -> int:
+        return len(self._before)
+
+    def _touch(self, index: int) -> None:
+        self._text = None
+        if index < self._dirty:
+            self._dirty = index
+
+    def take_dirty(self) -> int:
+        """Return the lowest index edited since the last call, and reset it."""
+        dirty = self._dirty
+        self._dirty = len(self)
+        return dirty
+
+    def tail(self, start: int) -> str:
+        """The text from index ``start`` to the end."""
+        before = self._before
+        cursor = len(before)
+        if start <= cursor:
+            return "".join(before[start:]) + "".join(reversed(self._after))
+        after = self._after
+        return "".join(reversed(after[:len(after) - (start - cursor)]))
+
+    def insert(self, text: str) -> None:
+        """Insert ``text`` at the cursor and move the cursor past it."""
+        if text:
+            self._touch(len(self._before))
+            self._before.extend(text)
+
+    def delete_before(self, count: int = 1) -> None:
+        """Delete up to ``count`` characters left of the cursor (backspace)."""
+        before = self._before
+        count = min(count, len(before))
+        if count > 0:
+            del before[len(before) - count:]
+            self._touch(len(before))
+
+    def delete_after(self, count: int = 1) -> None:
+        """Delete up to ``count`` characters right of the cursor."""
+        after = self._after
+        count = min(count, len(after))
+        if count > 0:
+            del after[len(after) - count:]
+            self._touch(len(self._before))
+
+    def move(self, offset: int) -> None:
+        """Move the cursor ``offset`` characters, clamped to the text."""
+        before, after = self._before, self._after
+        if offset < 0:
+            for _ in range(min(-offset, len(before))):
+                after.append(before.pop())
+        else:
+            for _ in range(min(offset, len(after))):
+                before.append(after.pop())
+
+    def move_to(self, position: int) -> None:
+        self.move(position - len(self._before))
+
+    def replace(self, text: str) -> None:
+        """Replace the whole content; the cursor ends up at the end."""
+        self._before = list(text)
+        self._after = []
+        self._touch(0)
+        self._text = text
@@ -0,0 +1,122 @@
+"""Size-bounded LRU cache of evaluated expressions.
+
+Entries are keyed on the numeric backend plus :func:`calcexpr.canonical`,
+so ``"2 ^ 3"`` and ``"(2**3)"`` or ``"1+2"`` and ``"2+1"`` share one slot
+per mode. The calckenda and usingDuckType engines share
+:data:`default_cache` unless they are given their own.
+
+A cache may sit on a ``store``, normally a :class:`calcdiskcache.DiskCache`
+shared between processes: misses are looked up there before evaluating,
+and results are offered to it with their evaluation time so it can keep
+only the expensive ones. :data:`default_cache` gets one when
+``$CALC_DISK_CACHE`` names a file.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+from calcdiskcache import open_default_disk_cache
+from calcexpr import canonical, parse
+from calcnumeric import FLOAT, FloatBackend
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 1024, store=None) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.store = store
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], object] = OrderedDict()
+        # Raw input -> canonical key, so exact repeats skip parsing too.
+        self._aliases: dict[str, str] = {}
+        # Held only around bookkeeping, never while evaluating.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def evaluate(self, text: str, backend: FloatBackend = FLOAT) -> object:
+        """Evaluate ``text`` with ``backend``, serving repeats from the cache.
+
+        Errors propagate and are not cached. With ``enabled`` off every call
+        is evaluated and the counters are left alone. Safe to call from
+        several threads; the evaluation itself runs outside the lock.
+        """
+        if not self.enabled:
+            return backend.evaluate(parse(text))
+        entries = self._entries
+        form = self._aliases.get(text)
+        if form is not None:
+            key = (backend.key, form)
+            with self._lock:
+                if key in entries:
+                    self.hits += 1
+                    entries.move_to_end(key)
+                    return entries[key]
+        node = parse(text)
+        form = canonical(node)
+        key = (backend.key, form)
+        with self._lock:
+            aliases = self._aliases
+            if len(aliases) >= 4 * self.maxsize:
+                aliases.clear()
+            aliases[text] = form
+            if key in entries:
+                self.hits += 1
+                entries.move_to_end(key)
+                return entries[key]
+            self.misses += 1
+        store = self.store
+        if store is None:
+            value = backend.evaluate(node)
+        else:
+            value = store.get(key)
+            if value is None:
+                start = time.perf_counter()
+                value = backend.evaluate(node)
+                store.put(key, value, time.perf_counter() - start)
+        with self._lock:
+            entries[key] = value
+            entries.move_to_end(key)
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def resize(self, maxsize: int) -> None:
+        """Change the capacity, evicting least recently used entries."""
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+        if self.store is not None:
+            stats.update(self.store.stats())
+        return stats
+
+
+default_cache = ResultCache(store=open_default_disk_cache())
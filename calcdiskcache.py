@@ -0,0 +1,300 @@
+"""Persistent result cache shared by every engine on the machine.
+
+A :class:`DiskCache` is a second level under :class:`calccache.ResultCache`:
+when an expression misses in memory it is looked up on disk, and results
+that took long enough to compute are written back. Keys are the same as
+in memory, the backend key (mode and precision) plus the canonical form,
+so any process that canonicalises an expression the same way finds it.
+
+The store is one SQLite database in WAL mode. Readers never block on a
+writer, writes are short ``BEGIN IMMEDIATE`` transactions, and a busy
+timeout makes concurrent writers queue instead of failing, so any number
+of engines in any number of processes can share a file. A connection
+belongs to the process that opened it; after a fork the child opens its
+own. sqlite3 is imported on first use.
+
+Values are stored by kind (int, float, complex, Decimal, Fraction) in a
+plain encoding that is decoded without running anything, never pickled.
+A running byte total is kept alongside the rows; once a write takes it
+over ``max_bytes`` the least recently used entries are deleted down to
+nine tenths of that. The database records :data:`ENGINE_VERSION` and is
+emptied when opened by an engine with a different one.
+
+The cache is best-effort: if the file cannot be opened or a statement
+fails, the lookup is a miss, the write is dropped and the error is
+counted, and evaluation goes on as if there were no disk cache.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+# Bump whenever parsing, canonical forms or arithmetic change what an
+# expression evaluates to; older databases are then cleared on open.
+ENGINE_VERSION = 2
+DEFAULT_MAX_BYTES = 64 << 20
+# Only results that took at least this long are written: anything
+# quicker costs less to recompute than to store.
+DEFAULT_MIN_SECONDS = 1e-4
+BUSY_TIMEOUT_MS = 5000
+# A hit refreshes an entry's last-used time at most this often, so
+# steady hits stay reads.
+TOUCH_SECONDS = 60.0
+# Rough per-row overhead counted towards max_bytes.
+ROW_OVERHEAD = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS entries (
+    mode TEXT NOT NULL,
+    expression TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (mode, expression)
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+
+def default_disk_cache_path() -> str | None:
+    """``$CALC_DISK_CACHE``, or None: the shared cache is opt-in."""
+    return os.environ.get("CALC_DISK_CACHE") or None
+
+
+def open_default_disk_cache() -> DiskCache | None:
+    """A :class:`DiskCache` on :func:`default_disk_cache_path`, if one is set."""
+    path = default_disk_cache_path()
+    return None if path is None else DiskCache(path)
+
+
+def _int_bytes(value: int) -> bytes:
+    return value.to_bytes(value.bit_length() // 8 + 1, "little", signed=True)
+
+
+def _bytes_int(data: bytes) -> int:
+    return int.from_bytes(data, "little", signed=True)
+
+
+def encode(value) -> tuple[str, bytes] | None:
+    """``(kind, data)`` for a result, or None if it cannot be stored."""
+    kind = type(value).__name__
+    if kind == "int":
+        return "int", _int_bytes(value)
+    if kind in ("float", "complex"):
+        return kind, repr(value).encode("ascii")
+    if kind == "Decimal":
+        return kind, str(value).encode("ascii")
+    if kind == "Fraction":
+        numerator = _int_bytes(value.numerator)
+        denominator = _int_bytes(value.denominator)
+        return kind, len(numerator).to_bytes(4, "little") + numerator + denominator
+    return None
+
+
+def decode(kind: str, data: bytes):
+    if kind == "int":
+        return _bytes_int(data)
+    if kind == "float":
+        return float(data)
+    if kind == "complex":
+        return complex(data.decode("ascii"))
+    if kind == "Decimal":
+        from decimal import Decimal
+
+        return Decimal(data.decode("ascii"))
+    if kind == "Fraction":
+        from fractions import Fraction
+
+        split = 4 + int.from_bytes(data[:4], "little")
+        return Fraction(_bytes_int(data[4:split]), _bytes_int(data[split:]))
+    raise ValueError(f"unknown kind {kind!r}")
+
+
+class DiskCache:
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 min_seconds: float = DEFAULT_MIN_SECONDS) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.min_seconds = min_seconds
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+        self._connection = None
+        self._pid = None
+        self._broken = False
+        # One connection per process, used from any of its threads.
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """The connection for this process, opened on first use."""
+        if self._pid == os.getpid():
+            return self._connection
+        # A connection inherited over fork must not be used (or closed).
+        self._connection = None
+        self._pid = os.getpid()
+        import sqlite3
+
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000,
+                                     isolation_level=None, check_same_thread=False)
+        try:
+            connection.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(_SCHEMA)
+            self._check_version(connection)
+        except Exception:
+            connection.close()
+            # Not a usable database; stop trying.
+            self._broken = True
+            raise
+        self._connection = connection
+        return connection
+
+    def _check_version(self, connection) -> None:
+        row = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is not None and row[0] == ENGINE_VERSION:
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have got here first.
+            row = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != ENGINE_VERSION:
+                connection.execute("DELETE FROM entries")
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('bytes', 0)")
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                                   (ENGINE_VERSION,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def get(self, key: tuple[str, str]):
+        """The stored value for ``(backend key, canonical form)``, or None."""
+        if self._broken:
+            return None
+        with self._lock:
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT kind, data, used FROM entries WHERE mode = ? AND expression = ?",
+                    key).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                kind, data, used = row
+                value = decode(kind, data)
+                now = time.time()
+                if now - used > TOUCH_SECONDS:
+                    connection.execute(
+                        "UPDATE entries SET used = ? WHERE mode = ? AND expression = ?",
+                        (now, *key))
+            except Exception:
+                self.errors += 1
+                return None
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple[str, str], value, seconds: float = float("inf")) -> bool:
+        """Store ``value`` if it took at least ``min_seconds``; True if written."""
+        if self._broken or seconds < self.min_seconds:
+            return False
+        encoded = encode(value)
+        if encoded is None:
+            return False
+        kind, data = encoded
+        size = len(key[0]) + len(key[1]) + len(data) + ROW_OVERHEAD
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            try:
+                connection = self._connect()
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    added = connection.execute(
+                        "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                        (*key, kind, data, size, time.time())).rowcount
+                    if added:
+                        connection.execute(
+                            "UPDATE meta SET value = value + ? WHERE name = 'bytes'", (size,))
+                        total = connection.execute(
+                            "SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+                        if total > self.max_bytes:
+                            self._evict(connection, total)
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+            except Exception:
+                self.errors += 1
+                return False
+            if added:
+                self.writes += 1
+            return bool(added)
+
+    def _evict(self, connection, total: int) -> None:
+        """Delete least recently used rows until ``total`` is under 90%."""
+        target = self.max_bytes * 9 // 10
+        freed = 0
+        while total - freed > target:
+            rows = connection.execute(
+                "SELECT rowid, size FROM entries ORDER BY used LIMIT 256").fetchall()
+            if not rows:
+                break
+            doomed = []
+            for rowid, size in rows:
+                doomed.append((rowid,))
+                freed += size
+                if total - freed <= target:
+                    break
+            connection.executemany("DELETE FROM entries WHERE rowid = ?", doomed)
+            self.evictions += len(doomed)
+        connection.execute("UPDATE meta SET value = value - ? WHERE name = 'bytes'", (freed,))
+
+    def size(self) -> int:
+        """Bytes of entries currently counted against ``max_bytes``."""
+        with self._lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT value FROM meta WHERE name = 'bytes'").fetchone()
+            except Exception:
+                self.errors += 1
+                return 0
+        return row[0] if row else 0
+
+    def clear(self) -> None:
+        """Delete every entry, for every process sharing the file."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM entries")
+            connection.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+            connection.execute("COMMIT")
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "disk_hits": self.hits,
+            "disk_misses": self.misses,
+            "disk_writes": self.writes,
+            "disk_evictions": self.evictions,
+            "disk_errors": self.errors,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+            self._pid = None
+
+    def __enter__(self) -> DiskCache:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,138 @@
+"""Coalesced, diff-based writes to the calculator's Entry and preview Label.
+
+Rewriting an Entry with ``delete(0, "end")`` plus ``insert(0, text)`` on
+every key is O(len(text)) Tk work per character. :class:`DisplayWriter`
+records only the latest wanted text and flushes once per event-loop turn
+from ``after_idle``; the flush keeps the common prefix of what is shown
+and what is wanted, and deletes and inserts only the differing tail. A
+typed character therefore costs one one-character insert, and a burst of
+auto-repeat keys handled in one turn costs a single write.
+
+The engines keep their expression in a :class:`calcbuffer.GapBuffer`;
+:meth:`DisplayWriter.set_buffer` mirrors one by writing only its tail
+from the lowest edited index, without ever joining the full text.
+
+The writer remembers what it last put in the Entry instead of reading the
+text back from Tk. If the length Tk reports differs (someone typed into
+the focused Entry directly) it falls back to a full rewrite.
+"""
+from __future__ import annotations
+
+
+# Ctrl+V is normally delivered as <<Paste>> already; binding it as well
+# covers Tk builds and keymaps where it is not.
+PASTE_SEQUENCES = ("<<Paste>>", "<Control-v>", "<Control-V>")
+
+
+def bind_paste(root, entry, handler) -> None:
+    """Route pastes in the calculator window to ``handler``.
+
+    ``entry``, the calculator's display, gets its own binding, which runs
+    before the Entry class binding; ``handler`` should return "break" so
+    the focused display does not also insert the clipboard itself. Entries
+    in other windows (search, digit viewer) keep their normal paste.
+    """
+    for sequence in PASTE_SEQUENCES:
+        root.bind(sequence, handler)
+        entry.bind(sequence, handler)
+
+
+def common_prefix(a: str, b: str) -> int:
+    """Length of the longest common prefix of ``a`` and ``b``."""
+    if b.startswith(a):
+        return len(a)
+    # Binary search with C-level slice compares rather than a Python loop
+    # over characters.
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class DisplayWriter:
+    def __init__(self, entry, label=None) -> None:
+        self.entry = entry
+        self.label = label
+        # What the Entry holds: its length, plus the text itself when it
+        # was written with set_text, or the buffer it mirrors.
+        self._length = 0
+        self._shown: str | None = ""
+        self._source = None
+        self._wanted = None
+        self._shown_preview = ""
+        self._wanted_preview: str | None = None
+        self._scheduled = False
+        self.flushes = 0
+
+    def set_text(self, text: str) -> None:
+        self._wanted = text
+        self._schedule()
+
+    def set_buffer(self, buffer) -> None:
+        """Mirror a :class:`calcbuffer.GapBuffer`, cursor included.
+
+        Only the buffer's tail from its lowest edited index is written, so
+        the full text is never joined.
+        """
+        self._wanted = buffer
+        self._schedule()
+
+    def set_preview(self, text: str) -> None:
+        self._wanted_preview = text
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if not self._scheduled:
+            self._scheduled = True
+            self.entry.after_idle(self.flush)
+
+    def flush(self) -> None:
+        """Apply pending changes now; normally called from after_idle."""
+        self._scheduled = False
+        self.flushes += 1
+        wanted = self._wanted
+        if wanted is not None:
+            self._wanted = None
+            if type(wanted) is str:
+                self._write_text(wanted)
+            else:
+                self._write_buffer(wanted)
+        preview = self._wanted_preview
+        if preview is not None:
+            self._wanted_preview = None
+            if preview != self._shown_preview and self.label is not None:
+                self.label.config(text=preview)
+                self._shown_preview = preview
+
+    def _intact(self) -> bool:
+        return self.entry.index("end") == self._length
+
+    def _write_text(self, text: str) -> None:
+        shown = self._shown
+        if shown is None or not self._intact():
+            keep = 0
+        else:
+            keep = common_prefix(shown, text)
+        self._replace(keep, text[keep:])
+        self._shown = text
+        self._source = None
+
+    def _write_buffer(self, buffer) -> None:
+        start = buffer.take_dirty()
+        if buffer is not self._source or not self._intact():
+            start = 0
+        self._replace(start, buffer.tail(start))
+        self._shown = None
+        self._source = buffer
+        self.entry.icursor(buffer.cursor)
+
+    def _replace(self, start: int, tail: str) -> None:
+        if start < self._length:
+            self.entry.delete(start, "end")
+        if tail:
+            self.entry.insert("end", tail)
+        self._length = start + len(tail)
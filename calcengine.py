@@ -0,0 +1,453 @@
+"""Calculator engines with no GUI dependencies.
+
+Importing this module pulls in neither tkinter nor typing_extensions, so
+batch jobs, services and benchmarks get at the engines without paying for
+Tk or needing a display. The desktop front-ends import from here and only
+load tkinter when they build a window.
+"""
+from __future__ import annotations
+
+import math
+import operator
+import re
+import time
+
+from calcbuffer import GapBuffer
+from calccache import ResultCache, default_cache
+from calcexpr import Call, Name, parse, parse_statement, postorder
+from calcfunctions import FUNCTIONS
+from calclimits import (DEFAULT_LIMITS, TOO_LARGE, BoundedBackend,
+                        EvaluationCancelled, Limits, ResultTooLarge, estimate_bits)
+from calcmetrics import NULL_METRICS
+from calcnumeric import DEFAULT_PRECISION, FLOAT, FloatBackend, make_backend
+from calcoptimize import compile_optimized, dump, optimize
+from calcpreview import IncrementalEvaluator
+from calcsymbols import SymbolTable
+from calcvector import evaluate_arrays
+
+# Shown for a function definition, which has no value.
+DEFINED = "Defined"
+# Statements kept parsed and compiled per engine, by input text.
+_MAX_STATEMENTS = 1024
+# Input without letters or "=" cannot involve the symbol table.
+_NAMELESS = re.compile(r"[^A-Za-z_=]*")
+
+
+class CalculatorEngine:
+    """Expression engine behind the calckenda and usingDuckType UIs.
+
+    ``mode`` picks the arithmetic, one of :data:`calcnumeric.NUMERIC_MODES`;
+    ``precision`` is the significant digits used by decimal and adaptive.
+    ``limits`` bounds the work one calculation may do (see :mod:`calclimits`).
+    ``history``, if given, is anything with an ``append(expression, result,
+    value)`` method, normally a :class:`calchistory.History`; every
+    calculation is recorded there. ``metrics``, if given, is a
+    :class:`calcmetrics.Metrics` that counts edits and times calculations;
+    the default no-op costs next to nothing.
+
+    Assignments (``r = 0.05``) and definitions (``f(x) = x**2 + 1``) go
+    into :attr:`symbols`, a :class:`calcsymbols.SymbolTable` kept across
+    calculations. A formula using them is parsed, optimized (see
+    :mod:`calcoptimize`) and compiled on first use and kept, so running it
+    again after an assignment only executes its program; such formulas
+    bypass the result cache, since their value depends on the symbols.
+    """
+
+    def __init__(self, cache: ResultCache | None = None, mode: str = "float",
+                 precision: int = DEFAULT_PRECISION,
+                 limits: Limits = DEFAULT_LIMITS, history=None, metrics=None) -> None:
+        self.backend = make_backend(mode, precision)
+        self.history = history
+        self.limits = limits
+        self._bounded = BoundedBackend(self.backend, limits)
+        # Previews never wait on a worker process: too big is just blank.
+        self._preview_backend = BoundedBackend(
+            self.backend, Limits(max_bits=min(limits.inline_bits, limits.max_bits)))
+        # Edited in place at a cursor; see calcbuffer.
+        self.buffer = GapBuffer()
+        self._preview = IncrementalEvaluator(self.backend)
+        # Assigning expression wholesale (batch use) defers the preview
+        # work until someone actually asks for it.
+        self._preview_synced = True
+        # Value of the last calculation, for views that need more than the
+        # formatted result (calcbignum.DigitViewer); None after an error.
+        self.value = None
+        self.cache: ResultCache = default_cache if cache is None else cache
+        self.symbols = SymbolTable(self.backend)
+        # text -> (target, params, postorder of the node, program or None
+        # if it does not use the symbols); dropped
+        # whenever a definition changes what the names in it mean.
+        self._statements: dict[str, tuple] = {}
+        self._generation = self.symbols.generation
+        self.metrics = NULL_METRICS if metrics is None else metrics
+        self.metrics.attach_cache(self.cache)
+
+    @property
+    def expression(self) -> str:
+        return self.buffer.text
+
+    @expression.setter
+    def expression(self, value: str) -> None:
+        self.buffer.replace(value)
+        self._preview_synced = False
+
+    @property
+    def cursor(self) -> int:
+        return self.buffer.cursor
+
+    def _edited(self, start: int) -> None:
+        # The preview keeps one state per character; rewind it to the edit
+        # and replay what follows, which is nothing when typing at the end.
+        if self._preview_synced:
+            self._preview.truncate(start)
+            self._preview.feed(self.buffer.tail(start))
+        else:
+            # Interactive editing resumed after a paste or a wholesale
+            # assignment: rebuild the per-character states once.
+            self._preview.sync(self.buffer.text)
+            self._preview_synced = True
+
+    def append(self, value: str) -> None:
+        """Insert ``value`` at the cursor."""
+        self.metrics.count("append_total")
+        if value == "^":
+            value = "**"
+        start = self.buffer.cursor
+        self.buffer.insert(value)
+        self._edited(start)
+
+    def backspace(self) -> None:
+        """Delete the character left of the cursor."""
+        self.buffer.delete_before()
+        self._edited(self.buffer.cursor)
+
+    def delete(self) -> None:
+        """Delete the character right of the cursor."""
+        self.buffer.delete_after()
+        self._edited(self.buffer.cursor)
+
+    def paste(self, text: str) -> bool:
+        """Insert a block of text at the cursor as a single edit.
+
+        ``text`` is checked with :func:`clean_paste`; returns False, and
+        changes nothing, if it is rejected. The preview is not replayed
+        character by character: the next :meth:`preview` evaluates the
+        whole expression once and the per-character states are rebuilt
+        only if editing continues.
+        """
+        text = clean_paste(text)
+        if text is None:
+            return False
+        start = self.buffer.cursor
+        self.buffer.insert(text)
+        if self._preview_synced:
+            self._preview.truncate(start)
+            self._preview_synced = False
+        return True
+
+    def move_cursor(self, offset: int) -> None:
+        self.buffer.move(offset)
+
+    def clear(self) -> None:
+        self.metrics.count("clear_total")
+        self.buffer.replace("")
+        self._preview.reset()
+        self._preview_synced = True
+
+    def percentage(self) -> str:
+        try:
+            if self.expression.endswith('%'):
+                value = self.backend.parse_number(self.expression[:-1])
+                return self.backend.format(self.backend.apply('/', value, 100))
+            value = self.cache.evaluate(self.expression, self._bounded)
+            return self.backend.format(self.backend.apply('/', value, 100))
+        except Exception:
+            return 'Errror'
+
+    def sqrt(self) -> str:
+        try:
+            if self.expression('✓'):
+                value = float(self.expression)
+                return str(math.sqrt(value))
+            elif self.expression:
+                value = float(self.expression[:-1])
+                return str(math.sqrt(value))
+            else:
+                return "Error"
+        except Exception:
+            return 'Errror'
+
+    def cost(self, expression: str | None = None) -> float:
+        """Estimated bits of the largest intermediate result.
+
+        Raises like :meth:`calculate` would fail: ExpressionError for bad
+        input, ResultTooLarge past the engine's limits.
+        """
+        text = self.expression if expression is None else expression
+        if _NAMELESS.fullmatch(text):
+            return estimate_bits(parse(text), self.backend, max_bits=self.limits.max_bits)
+        _, params, order, _ = self._statement(text)
+        if params is not None:
+            return 0.0
+        symbols = self.symbols
+        return estimate_bits(order, self.backend, symbols.variables,
+                             self.limits.max_bits, symbols.functions)
+
+    def optimized(self, expression: str | None = None) -> str:
+        """``expression`` as :mod:`calcoptimize` leaves it, for inspection.
+
+        Raises ExpressionError for bad input.
+        """
+        text = self.expression if expression is None else expression
+        symbols = self.symbols
+        target, params, node = parse_statement(text, symbols.functions)
+        form = dump(optimize(node, self.backend, symbols.functions))
+        if target is None:
+            return form
+        if params is not None:
+            target = f"{target}({', '.join(params)})"
+        return f"{target} = {form}"
+
+    def _statement(self, text: str) -> tuple:
+        symbols = self.symbols
+        statements = self._statements
+        if self._generation != symbols.generation:
+            statements.clear()
+            self._generation = symbols.generation
+        statement = statements.get(text)
+        if statement is None:
+            target, params, node = parse_statement(text, symbols.functions)
+            order = postorder(node)
+            dynamic = any(type(current) is Name
+                          or (type(current) is Call and current.name not in FUNCTIONS)
+                          for current in order)
+            program = None
+            if params is None and (dynamic or target is not None):
+                optimized = optimize(node, self.backend, symbols.functions)
+                program = compile_optimized(optimized, self.backend, symbols.functions)
+            if len(statements) >= _MAX_STATEMENTS:
+                statements.clear()
+            statement = statements[text] = (target, params, order, program)
+        return statement
+
+    def _evaluate(self, text: str, backend: BoundedBackend):
+        """Value of ``text``, updating :attr:`symbols` for a statement.
+
+        A definition has no value and returns None.
+        """
+        if _NAMELESS.fullmatch(text):
+            return self.cache.evaluate(text, backend)
+        target, params, order, program = self._statement(text)
+        symbols = self.symbols
+        node = order[-1]
+        if params is not None:
+            symbols.define(target, params, node)
+            return None
+        if program is None:
+            return self.cache.evaluate(text, backend)
+        bits = estimate_bits(order, self.backend, symbols.variables,
+                             self.limits.max_bits, symbols.functions)
+        if bits <= self.limits.inline_bits:
+            value = self.backend.run(program, node, symbols.variables, symbols.functions)
+        else:
+            value = backend.evaluate(node, symbols.variables, symbols.functions)
+        if target is not None:
+            symbols.assign(target, value)
+        return value
+
+    def calculate(self, expression: str | None = None, cancel_event=None) -> str:
+        """Evaluate ``expression`` (default: the current one) for display.
+
+        ``cancel_event`` lets another thread abandon a calculation that had
+        to go to a worker process.
+        """
+        text = self.expression if expression is None else expression
+        metrics = self.metrics
+        start = time.perf_counter() if metrics.enabled else 0.0
+        backend = self._bounded
+        if cancel_event is not None:
+            backend = BoundedBackend(self.backend, self.limits, cancel_event)
+        value = None
+        outcome = "ok"
+        try:
+            value = self._evaluate(text, backend)
+            result = DEFINED if value is None else self.backend.format(value)
+        except ResultTooLarge:
+            result, outcome = TOO_LARGE, "too_large"
+        except EvaluationCancelled:
+            result, outcome = "Error", "cancelled"
+        except Exception:
+            result, outcome = "Error", "error"
+        self.value = value if outcome == "ok" else None
+        if metrics.enabled:
+            metrics.record_calculation(text, time.perf_counter() - start, result, outcome)
+        if outcome == "cancelled":
+            # Nobody is waiting for this one; leave it out of the history.
+            return result
+        if self.history is not None and text:
+            self.history.append(text, result, value)
+        return result
+
+    def calculate_arrays(self, **arrays: object) -> object:
+        """Evaluate the expression with its names bound to NumPy arrays."""
+        return evaluate_arrays(self.expression, **arrays)
+
+    def preview(self) -> str:
+        if not self._preview_synced:
+            try:
+                value = self.cache.evaluate(self.buffer.text, self._preview_backend)
+            except Exception:
+                return ""
+            return self.backend.format(value)
+        value = self._preview.value
+        return "" if value is None else self.backend.format(value)
+
+
+_EXPRESSION_PASTE = re.compile(
+    r"(?:[0-9.+\-*/%^()!,\s]|" + "|".join(map(re.escape, FUNCTIONS)) + ")*")
+_NUMBER_PASTE = re.compile(r"[0-9.\s]*")
+
+
+def clean_paste(text: str, numbers_only: bool = False) -> str | None:
+    """Validate pasted text in one regex pass and strip its whitespace.
+
+    Returns the text to insert, with ``^`` spelled ``**``, or None if it
+    contains anything the keypad could not have typed. ``numbers_only``
+    restricts it to digits and ".", for the binary-operator calculators.
+    """
+    pattern = _NUMBER_PASTE if numbers_only else _EXPRESSION_PASTE
+    if pattern.fullmatch(text) is None:
+        return None
+    text = "".join(text.split())
+    return text if numbers_only else text.replace("^", "**")
+
+
+# --- Binary-operator calculators -------------------------------------------
+
+class OperationError(ValueError):
+    """A binary operation could not be carried out; str() is user-facing."""
+
+
+OPERATIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+
+class BinaryEngine:
+    """The first-number/operation/second-number core of the binary GUIs.
+
+    Claudecalc, typenotationclac, catCalculator, notationDuckCalc, calc and
+    t all keep a display of the operand being typed and hand it here as
+    text when an operator or "=" is pressed. Each operand is parsed once,
+    with ``backend.parse_number``, and dispatched through the class-level
+    :attr:`OPERATIONS` table (or ``backend.apply`` for exact modes).
+
+    Operations chain left to right: ``1 + 2 * 3 - 4 =`` is
+    ``((1 + 2) * 3) - 4``, each step computed when the next operator is
+    pressed. :meth:`press_operator` returns that running total for the
+    display; until :meth:`start_operand` reports the next key, the display
+    is taken to hold it, and its (possibly rounded) text is not read back.
+    Pressing "=" again repeats the last operation on the shown result, so
+    ``2 + 3 = = =`` runs 5, 8, 11.
+
+    Errors are raised as :class:`OperationError` (bad operation, division
+    by zero, or any other arithmetic error such as a Decimal overflow) or
+    ValueError (unparsable operand) and leave the engine cleared.
+    """
+
+    OPERATIONS = OPERATIONS
+
+    def __init__(self, backend: FloatBackend = FLOAT) -> None:
+        self.backend = backend
+        if backend is FLOAT:
+            self._dispatch = self.OPERATIONS
+        else:
+            self._dispatch = {op: (lambda a, b, op=op: backend.apply(op, a, b))
+                              for op in self.OPERATIONS}
+        self.clear()
+
+    def clear(self) -> None:
+        # Running result, and the operation waiting for its right operand.
+        self.total = None
+        self.operation = None
+        # What "=" repeats once the pending operation has been applied.
+        self._repeat: tuple[str, object] | None = None
+        # The display shows ``total``, not an operand being typed.
+        self._showing_total = False
+
+    def start_operand(self) -> bool:
+        """Note that the user edits the display.
+
+        Returns True if it showed the running total, which a typed digit
+        should replace rather than extend.
+        """
+        showing, self._showing_total = self._showing_total, False
+        return showing
+
+    def _apply(self, operation: str, first, second):
+        func = self._dispatch.get(operation)
+        if func is None:
+            self.clear()
+            raise OperationError("Invalid operation")
+        if operation == '/' and second == 0:
+            self.clear()
+            raise OperationError("Division by zero")
+        try:
+            return func(first, second)
+        except ZeroDivisionError:
+            self.clear()
+            raise OperationError("Division by zero") from None
+        except ArithmeticError:
+            # Decimal overflow or an undefined result such as inf - inf.
+            self.clear()
+            raise OperationError("Math error") from None
+
+    def _parse(self, text: str):
+        showing, self._showing_total = self._showing_total, False
+        if not text or showing:
+            return None
+        try:
+            return self.backend.parse_number(text)
+        except ValueError:
+            self.clear()
+            raise
+
+    def press_operator(self, operation: str, text: str):
+        """An operator key, with ``text`` on the display; returns the running total."""
+        if operation not in self._dispatch:
+            self.clear()
+            raise OperationError("Invalid operation")
+        operand = self._parse(text)
+        if operand is not None:
+            if self.operation is not None and self.total is not None:
+                self.total = self._apply(self.operation, self.total, operand)
+            else:
+                self.total = operand
+        self.operation = operation
+        self._repeat = None
+        self._showing_total = self.total is not None
+        return self.total
+
+    def press_equals(self, text: str):
+        """The "=" key, with ``text`` on the display; returns the result.
+
+        With nothing pending it repeats the last operation, using the
+        display as its left operand, or else just echoes the display.
+        """
+        operand = self._parse(text)
+        if self.operation is not None and self.total is not None:
+            second = self.total if operand is None else operand
+            result = self._apply(self.operation, self.total, second)
+            self._repeat = (self.operation, second)
+        elif self._repeat is not None:
+            first = self.total if operand is None else operand
+            operation, second = self._repeat
+            result = self._apply(operation, first, second)
+        else:
+            result = operand
+        self.total = result
+        self.operation = None
+        return result
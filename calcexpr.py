@@ -0,0 +1,469 @@
+"""Arithmetic expressions for the calculator engines.
+
+Input is tokenized in one regex pass, parsed into a small AST by an
+operator-precedence parser and compiled to a flat postfix program that runs on a value
+stack. Nothing here hands user input to eval().
+
+Supported syntax: numbers, variable names, ``+ - * / % ** ( )``, ``^`` as
+an alias for ``**`` and unary ``-``/``+``, with Python's precedence rules;
+postfix ``!`` (factorial), which binds tightest of all, so ``-3!`` is
+``-(3!)`` and ``2**3!`` is ``2**6``; and calls of the functions in
+:data:`calcfunctions.FUNCTIONS`, e.g. ``nCr(52, 5)``.
+
+:func:`parse_statement` also accepts assignments, ``r = 0.05``, and
+function definitions, ``f(x) = x**2 + 1``; :mod:`calcsymbols` keeps what
+they define. ``functions`` arguments below are mappings shaped like
+FUNCTIONS, name to ``(number of arguments, callable)``, and default to it.
+"""
+from __future__ import annotations
+
+import operator
+import re
+
+from calcfunctions import FUNCTIONS, factorial
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be tokenized or parsed."""
+
+
+# --- AST -----------------------------------------------------------------
+
+class Node:
+    __slots__ = ()
+
+
+class Num(Node):
+    __slots__ = ("value", "text")
+
+    def __init__(self, value: int | float, text: str | None = None) -> None:
+        self.value = value
+        # The literal as typed, for numeric backends that must not go
+        # through a binary float first (Decimal("0.1") vs Decimal(0.1)).
+        self.text = text
+
+    def __eq__(self, other: object) -> bool:
+        # 1 and 1.0 are different literals for the calculator.
+        return (type(other) is Num and type(other.value) is type(self.value)
+                and other.value == self.value)
+
+    def __hash__(self) -> int:
+        return hash((Num, type(self.value), self.value))
+
+    def __repr__(self) -> str:
+        return f"Num({self.value!r})"
+
+
+class Name(Node):
+    __slots__ = ("id",)
+
+    def __init__(self, id: str) -> None:
+        self.id = id
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is Name and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash((Name, self.id))
+
+    def __repr__(self) -> str:
+        return f"Name({self.id!r})"
+
+
+class Unary(Node):
+    __slots__ = ("op", "operand")
+
+    def __init__(self, op: str, operand: Node) -> None:
+        self.op = op
+        self.operand = operand
+
+    def __eq__(self, other: object) -> bool:
+        return (type(other) is Unary and other.op == self.op
+                and other.operand == self.operand)
+
+    def __hash__(self) -> int:
+        return hash((Unary, self.op, self.operand))
+
+    def __repr__(self) -> str:
+        return f"Unary({self.op!r}, {self.operand!r})"
+
+
+class Binary(Node):
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op: str, left: Node, right: Node) -> None:
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def __eq__(self, other: object) -> bool:
+        return (type(other) is Binary and other.op == self.op
+                and other.left == self.left and other.right == self.right)
+
+    def __hash__(self) -> int:
+        return hash((Binary, self.op, self.left, self.right))
+
+    def __repr__(self) -> str:
+        return f"Binary({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+class Call(Node):
+    __slots__ = ("name", "args")
+
+    def __init__(self, name: str, args: tuple[Node, ...]) -> None:
+        self.name = name
+        self.args = tuple(args)
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is Call and other.name == self.name and other.args == self.args
+
+    def __hash__(self) -> int:
+        return hash((Call, self.name, self.args))
+
+    def __repr__(self) -> str:
+        return f"Call({self.name!r}, {self.args!r})"
+
+
+# --- Tokenizer -----------------------------------------------------------
+
+# Numbers, "**", names and then any other single non-space character;
+# operators and stray characters are told apart afterwards by a dict lookup,
+# which is cheaper than capture groups in the regex.
+_TOKEN = re.compile(r"[\d.]+(?:[eE][-+]?\d+)?|\*\*|[A-Za-z_]\w*|\S")
+
+_OPERATORS = {op: op for op in ("+", "-", "*", "/", "%", "**", "(", ")", "!", ",")}
+_OPERATORS["^"] = "**"
+
+
+def tokenize(text: str) -> list[Num | Name | str]:
+    """Split ``text`` into numbers, names and operator strings in one pass."""
+    tokens = []
+    append = tokens.append
+    operators = _OPERATORS
+    for token in _TOKEN.findall(text):
+        op = operators.get(token)
+        if op is not None:
+            append(op)
+        elif token[0] in "0123456789.":
+            try:
+                append(Num(int(token) if token.isdigit() else float(token), token))
+            except ValueError:
+                raise ExpressionError(f"malformed number {token!r}") from None
+        elif token[0].isalpha() or token[0] == "_":
+            append(Name(token))
+        else:
+            raise ExpressionError(f"unexpected character {token!r}")
+    return tokens
+
+
+# --- Parser --------------------------------------------------------------
+
+# Binding power of each binary operator and whether it is right-associative.
+BINARY_PRECEDENCE = {
+    "+": (1, False), "-": (1, False),
+    "*": (2, False), "/": (2, False), "%": (2, False),
+    "**": (4, True),
+}
+# Unary minus binds tighter than * but looser than ** on its right: -2**2 == -4.
+UNARY_PRECEDENCE = 3
+
+# Operator-stack entries: binary operators as-is, prefix operators tagged
+# with "u" and open parentheses, which never reduce.
+STACK_PRECEDENCE = {op: prec for op, (prec, _) in BINARY_PRECEDENCE.items()}
+STACK_PRECEDENCE.update({"u-": UNARY_PRECEDENCE, "u+": UNARY_PRECEDENCE, "(": -1})
+
+# Reduce while the stacked operator binds at least this tightly.
+REDUCE_THRESHOLD = {op: prec + 1 if right else prec
+                     for op, (prec, right) in BINARY_PRECEDENCE.items()}
+
+
+def _reduce(op: str, operands: list[Node]) -> None:
+    if op[0] == "u":
+        operands[-1] = Unary(op[1], operands[-1])
+    else:
+        right = operands.pop()
+        operands[-1] = Binary(op, operands[-1], right)
+
+
+def parse(text: str, functions: dict = FUNCTIONS) -> Node:
+    """Parse ``text`` into an AST.
+
+    Only the names in ``functions`` may be called.
+
+    Operator precedence is resolved with an explicit operator stack instead
+    of recursion, so deeply nested input cannot overflow the C stack.
+    """
+    operands: list[Node] = []
+    operators: list[str] = []
+    # Open function calls: (index of their "(" in operators, name, index
+    # of their first argument in operands).
+    calls: list[tuple[int, str, int]] = []
+    precedence = STACK_PRECEDENCE
+    expect_operand = True
+    for token in tokenize(text):
+        if type(token) is not str:
+            if not expect_operand:
+                raise ExpressionError(f"unexpected operand {token!r}")
+            operands.append(token)
+            expect_operand = False
+        elif expect_operand:
+            if token == "(":
+                operators.append(token)
+            elif token == "-" or token == "+":
+                operators.append("u" + token)
+            else:
+                raise ExpressionError(f"unexpected {token!r}")
+        elif token == ")" or token == ",":
+            while operators and operators[-1] != "(":
+                _reduce(operators.pop(), operands)
+            if not operators:
+                raise ExpressionError(f"unexpected {token!r}")
+            in_call = bool(calls) and calls[-1][0] == len(operators) - 1
+            if token == ",":
+                if not in_call:
+                    raise ExpressionError("unexpected ','")
+                expect_operand = True
+                continue
+            operators.pop()
+            if in_call:
+                _, name, first = calls.pop()
+                arity = functions[name][0]
+                if len(operands) - first != arity:
+                    raise ExpressionError(f"{name} takes {arity} arguments")
+                operands[first:] = [Call(name, operands[first:])]
+        elif token == "!":
+            operands[-1] = Unary("!", operands[-1])
+        elif token == "(":
+            name = operands[-1]
+            if type(name) is not Name or name.id not in functions:
+                raise ExpressionError("unexpected '('")
+            operands.pop()
+            calls.append((len(operators), name.id, len(operands)))
+            operators.append(token)
+            expect_operand = True
+        else:
+            threshold = REDUCE_THRESHOLD[token]
+            while operators and precedence[operators[-1]] >= threshold:
+                _reduce(operators.pop(), operands)
+            operators.append(token)
+            expect_operand = True
+    if expect_operand:
+        raise ExpressionError("unexpected end of expression")
+    while operators:
+        op = operators.pop()
+        if op == "(":
+            raise ExpressionError("missing ')'")
+        _reduce(op, operands)
+    return operands[0]
+
+
+_TARGET = re.compile(r"\s*([A-Za-z_]\w*)\s*"
+                     r"(?:\(\s*([A-Za-z_]\w*(?:\s*,\s*[A-Za-z_]\w*)*)\s*\)\s*)?")
+
+
+def parse_statement(text: str, functions: dict = FUNCTIONS
+                    ) -> tuple[str | None, tuple[str, ...] | None, Node]:
+    """Parse an expression, an assignment or a function definition.
+
+    Returns ``(target, params, node)``: ``(None, None, node)`` for a plain
+    expression, ``(name, None, node)`` for ``name = expression`` and
+    ``(name, params, body)`` for ``name(a, b) = body``, whose body may use
+    its parameters as names.
+    """
+    head, equals, body = text.partition("=")
+    if not equals:
+        return None, None, parse(text, functions)
+    match = _TARGET.fullmatch(head)
+    if match is None:
+        raise ExpressionError("only a name or name(parameters) can be assigned")
+    name, params = match.groups()
+    if name in FUNCTIONS:
+        raise ExpressionError(f"{name} is a built-in function")
+    node = parse(body, functions)
+    if params is None:
+        return name, None, node
+    params = tuple(param.strip() for param in params.split(","))
+    if len(set(params)) != len(params):
+        raise ExpressionError(f"repeated parameter in {name}")
+    return name, params, node
+
+
+# --- Compiler and evaluator ----------------------------------------------
+
+BINARY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "**": operator.pow,
+}
+
+UNARY_OPS = {
+    "-": operator.neg,
+    "+": operator.pos,
+    "!": factorial,
+}
+
+CONST, BINARY, UNARY, LOAD, CALL, STORE, FETCH = 0, 1, 2, 3, 4, 5, 6
+
+
+def postorder(node: Node) -> list[Node]:
+    """Return the nodes under ``node`` children-first, without recursion.
+
+    Long left-leaning chains like 1+1+...+1 are as deep as they are long, so
+    every tree walk in the calculator goes through here rather than
+    recursing.
+    """
+    order = []
+    pending = [node]
+    # Collect in reverse postorder (node, right subtree, left subtree) and
+    # flip it around at the end.
+    while pending:
+        current = pending.pop()
+        order.append(current)
+        kind = type(current)
+        if kind is Binary:
+            pending.append(current.left)
+            pending.append(current.right)
+        elif kind is Unary:
+            pending.append(current.operand)
+        elif kind is Call:
+            pending.extend(current.args)
+    order.reverse()
+    return order
+
+
+def compile_node(node: Node, backend=None,
+                 functions: dict = FUNCTIONS) -> tuple[tuple[int, object], ...]:
+    """Flatten ``node`` into a postfix program of ``(opcode, arg)`` pairs.
+
+    ``backend`` (see :mod:`calcnumeric`) supplies literal conversion and
+    the operator functions; without one, Python int/float semantics apply.
+    Calls are bound to the callables in ``functions`` here, once.
+    """
+    if backend is None:
+        literal, binary, unary = None, BINARY_OPS, UNARY_OPS
+    else:
+        literal, binary, unary = backend.literal, backend.binary, backend.unary
+    program = []
+    emit = program.append
+    for current in postorder(node):
+        kind = type(current)
+        if kind is Num:
+            emit((CONST, current.value if literal is None else literal(current)))
+        elif kind is Binary:
+            emit((BINARY, binary[current.op]))
+        elif kind is Unary:
+            emit((UNARY, unary[current.op]))
+        elif kind is Call:
+            emit((CALL, (functions[current.name][1], len(current.args))))
+        else:
+            emit((LOAD, current.id))
+    return tuple(program)
+
+
+def execute(program: tuple[tuple[int, object], ...],
+            variables: dict[str, object] | None = None) -> int | float:
+    """Run a program produced by :func:`compile_node`.
+
+    Names are looked up in ``variables``; an unbound name raises
+    :class:`ExpressionError`. STORE and FETCH, which only
+    :func:`calcoptimize.compile_optimized` emits, save the top of the
+    stack in a numbered slot and push it again.
+    """
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    slots = {}
+    for opcode, arg in program:
+        if opcode == CONST:
+            push(arg)
+        elif opcode == BINARY:
+            right = pop()
+            stack[-1] = arg(stack[-1], right)
+        elif opcode == UNARY:
+            stack[-1] = arg(stack[-1])
+        elif opcode == CALL:
+            function, count = arg
+            args = stack[-count:]
+            del stack[-count:]
+            push(function(*args))
+        elif opcode == STORE:
+            slots[arg] = stack[-1]
+        elif opcode == FETCH:
+            push(slots[arg])
+        else:
+            try:
+                push(variables[arg])
+            except (KeyError, TypeError):
+                raise ExpressionError(f"unknown name {arg!r}") from None
+    return stack[0]
+
+
+# Compiled programs kept by evaluate(), by input text.
+_MAX_PROGRAMS = 1024
+_programs: dict[str, tuple[tuple[int, object], ...]] = {}
+
+
+def evaluate(text: str, variables: dict[str, object] | None = None) -> int | float:
+    """Parse, compile and run ``text``.
+
+    The program is kept by text, so evaluating the same input again only
+    runs it, about seven times faster than eval(). Parsing is the expensive
+    part: a first call is a little slower than eval() on short input and
+    about twice as slow on long input.
+    """
+    program = _programs.get(text)
+    if program is None:
+        program = compile_node(parse(text))
+        if len(_programs) >= _MAX_PROGRAMS:
+            _programs.clear()
+        _programs[text] = program
+    return execute(program, variables)
+
+
+# --- Canonical form ------------------------------------------------------
+
+COMMUTATIVE = frozenset(("+", "*"))
+
+
+def canonical(node: Node) -> str:
+    """Render ``node`` as a fully parenthesized, normalized string.
+
+    Expressions that differ only in whitespace, redundant parentheses,
+    ``^`` versus ``**`` or the order of the two operands of ``+`` and ``*``
+    map to the same string. Operands are only swapped, never regrouped:
+    a+b == b+a holds exactly for floats, (a+b)+c == a+(b+c) does not.
+
+    Non-integer literals are rendered as typed: the decimal and fraction
+    backends read that text, so ``0.1`` and ``0.10000000000000000001``
+    must not share a form just because they are the same float.
+    """
+    rendered: list[str] = []
+    for current in postorder(node):
+        kind = type(current)
+        if kind is Num:
+            value = current.value
+            if type(value) is int:
+                rendered.append(repr(value))
+            else:
+                rendered.append(current.text or repr(value))
+        elif kind is Name:
+            rendered.append(current.id)
+        elif kind is Binary:
+            right = rendered.pop()
+            left = rendered[-1]
+            if current.op in COMMUTATIVE and right < left:
+                left, right = right, left
+            rendered[-1] = f"({left}{current.op}{right})"
+        elif kind is Call:
+            count = len(current.args)
+            args = rendered[-count:]
+            del rendered[-count:]
+            rendered.append(f"{current.name}({','.join(args)})")
+        elif current.op == "!":
+            rendered[-1] = f"({rendered[-1]}!)"
+        else:
+            rendered[-1] = f"({current.op}{rendered[-1]})"
+    return rendered[0]
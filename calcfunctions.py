@@ -0,0 +1,167 @@
+"""Integer functions of the expression language: ``!``, nCr, nPr and powmod.
+
+    5!                 factorial
+    nCr(52, 5)         binomial coefficient, n choose k
+    nPr(10, 3)         k-permutations of n, n! / (n - k)!
+    powmod(3, 10**9, 1000003)   3 ** 10**9 % 1000003, never forming 3 ** 10**9
+
+Multiplying 1, 2, 3, ... into a running product costs O(n) multiplications
+of an ever longer number, i.e. quadratic time. Products here are formed
+by binary splitting instead: the range is halved recursively and the
+halves multiplied, so every multiplication is between numbers of similar
+size and the big ones run at Karatsuba speed. CPython's math.factorial,
+math.comb and math.perm already work this way in C, and they are used
+as they are; :func:`range_product` is the same tree in Python, for the
+pieces computed in parallel.
+
+With ``workers`` above one (the default is one per CPU), a factorial or
+nPr of at least :data:`PARALLEL_MIN_TERMS` terms is cut into that many
+ranges; each is multiplied out in a forked child, sent back as bytes and
+the partial products are combined pairwise in the parent. Fork is used
+directly rather than a process pool because calclimits evaluates big
+expressions in a daemon process, which multiprocessing will not let
+start children. The top multiplications stay serial, so the gain is
+bounded; elsewhere, or on one CPU, everything runs in-process.
+
+Arguments may be any integral number (``5``, ``5.0``, ``Decimal(5)``,
+``Fraction(10, 2)``); anything else raises ValueError.
+"""
+from __future__ import annotations
+
+import math
+import os
+import signal
+
+# Below this many terms forking costs more than it saves.
+PARALLEL_MIN_TERMS = 200_000
+# Ranges shorter than this are multiplied out directly.
+_LEAF_TERMS = 32
+
+
+def _integer(value, name: str) -> int:
+    if type(value) is int:
+        return value
+    try:
+        integral = value == int(value)
+    except (TypeError, ValueError, OverflowError):
+        integral = False
+    if not integral:
+        raise ValueError(f"{name} needs integers, not {value!r}")
+    return int(value)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def range_product(low: int, high: int) -> int:
+    """``low * (low + 1) * ... * (high - 1)`` by binary splitting; 1 if empty."""
+    if high - low <= _LEAF_TERMS:
+        return math.prod(range(low, high))
+    middle = (low + high) // 2
+    return range_product(low, middle) * range_product(middle, high)
+
+
+def tree_product(values: list[int]) -> int:
+    """Product of ``values``, multiplying neighbours pairwise."""
+    values = list(values) or [1]
+    while len(values) > 1:
+        paired = [values[i] * values[i + 1] for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
+
+
+def _forked_product(low: int, high: int) -> tuple[int, int]:
+    """Start a child computing range_product(low, high); ``(pid, read fd)``."""
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read)
+            value = range_product(low, high)
+            with os.fdopen(write, "wb") as f:
+                f.write(value.to_bytes((value.bit_length() + 7) // 8, "little"))
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(write)
+    return pid, read
+
+
+def parallel_range_product(low: int, high: int, workers: int) -> int:
+    """:func:`range_product` with the range split across ``workers`` processes."""
+    if workers < 2 or high - low < PARALLEL_MIN_TERMS or not hasattr(os, "fork"):
+        return range_product(low, high)
+    bounds = [low + (high - low) * i // workers for i in range(workers + 1)]
+    pending = [_forked_product(start, end) for start, end in zip(bounds[1:-1], bounds[2:])]
+    # The first range is ours, multiplied while the children work.
+    parts = [range_product(bounds[0], bounds[1])]
+    try:
+        while pending:
+            pid, read = pending[0]
+            with os.fdopen(read, "rb") as f:
+                data = f.read()
+            pending.pop(0)
+            _, status = os.waitpid(pid, 0)
+            if status:
+                raise ArithmeticError("a worker failed while multiplying")
+            parts.append(int.from_bytes(data, "little"))
+    finally:
+        for pid, read in pending:
+            os.kill(pid, signal.SIGKILL)
+            os.close(read)
+            os.waitpid(pid, 0)
+    return tree_product(parts)
+
+
+def factorial(n, workers: int | None = None) -> int:
+    n = _integer(n, "factorial")
+    if n < 0:
+        raise ValueError("factorial of a negative number")
+    if workers is None:
+        workers = default_workers()
+    if workers > 1 and n >= PARALLEL_MIN_TERMS:
+        return parallel_range_product(2, n + 1, workers)
+    return math.factorial(n)
+
+
+def permutations(n, k, workers: int | None = None) -> int:
+    """nPr: ordered choices of ``k`` items from ``n``."""
+    n, k = _integer(n, "nPr"), _integer(k, "nPr")
+    if n < 0 or k < 0:
+        raise ValueError("nPr of a negative number")
+    if k > n:
+        return 0
+    if workers is None:
+        workers = default_workers()
+    if workers > 1 and k >= PARALLEL_MIN_TERMS:
+        return parallel_range_product(n - k + 1, n + 1, workers)
+    return math.perm(n, k)
+
+
+def binomial(n, k) -> int:
+    """nCr: unordered choices of ``k`` items from ``n``."""
+    n, k = _integer(n, "nCr"), _integer(k, "nCr")
+    if n < 0 or k < 0:
+        raise ValueError("nCr of a negative number")
+    return math.comb(n, k)
+
+
+def powmod(base, exponent, modulus) -> int:
+    """``base ** exponent % modulus`` by three-argument pow.
+
+    A negative exponent uses the modular inverse, as pow() does.
+    """
+    return pow(_integer(base, "powmod"), _integer(exponent, "powmod"),
+               _integer(modulus, "powmod"))
+
+
+# name -> (number of arguments, implementation)
+FUNCTIONS = {
+    "nCr": (2, binomial),
+    "nPr": (2, permutations),
+    "powmod": (3, powmod),
+}
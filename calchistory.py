@@ -0,0 +1,208 @@
+"""Persistent, append-only history of calculations.
+
+A history is two files next to each other:
+
+``<path>.log``
+    The raw UTF-8 bytes of each expression followed by its result, back
+    to back, with no framing.
+``<path>.idx``
+    An 8-byte magic header and then one fixed-width :data:`RECORD` per
+    entry: data offset, timestamp, numeric value (NaN when the result is
+    not a number), the two byte lengths and a CRC-32 of the fields and
+    the data.
+
+Entry *i* lives at a computable offset in the index, so opening a history
+of any length only maps both files and checks the last record; entries
+are decoded when they are read. Nothing is ever rewritten: data goes to
+the log first and the index record second, and on open any torn or
+unverifiable tail is cut off, which never touches earlier records.
+"""
+from __future__ import annotations
+
+import collections
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b"CALCHST1"
+# offset, timestamp, value, expression bytes, result bytes, crc
+RECORD = struct.Struct("<QddIII")
+_FIELDS = struct.Struct("<QddII")
+
+HistoryEntry = collections.namedtuple("HistoryEntry", "expression result timestamp value")
+
+
+def default_history_path() -> str:
+    """``$CALC_HISTORY``, or ``~/.calc_history``."""
+    return os.environ.get("CALC_HISTORY") or os.path.join(os.path.expanduser("~"), ".calc_history")
+
+
+def _as_float(value) -> float:
+    if value is None or isinstance(value, complex):
+        return math.nan
+    try:
+        return float(value)
+    except OverflowError:
+        return math.copysign(math.inf, value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _crc(fields: bytes, data: bytes) -> int:
+    return zlib.crc32(data, zlib.crc32(fields))
+
+
+class History:
+    def __init__(self, path: str, durable: bool = False) -> None:
+        """Open or create the history at ``path`` (without extension).
+
+        With ``durable`` every append is fsynced, which survives power
+        loss as well as crashes at the cost of a disk flush per entry.
+        """
+        self.path = path
+        self.durable = durable
+        self._lock = threading.Lock()
+        self._index = open(path + ".idx", "a+b", buffering=0)
+        self._log = open(path + ".log", "a+b", buffering=0)
+        self._index_map = None
+        self._log_map = None
+        self._mapped = 0
+        self._count = self._recover()
+
+    # --- opening ---------------------------------------------------------
+
+    def _recover(self) -> int:
+        """Drop any incomplete tail and return the number of good records."""
+        index, log = self._index, self._log
+        size = os.fstat(index.fileno()).st_size
+        if size < len(MAGIC):
+            index.truncate(0)
+            index.write(MAGIC)
+            size = len(MAGIC)
+        else:
+            index.seek(0)
+            if index.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path}.idx is not a calculator history")
+        count = (size - len(MAGIC)) // RECORD.size
+        data_size = os.fstat(log.fileno()).st_size
+        end = 0
+        # A crash can only leave damage at the end, and normally the last
+        # record checks out at once.
+        while count:
+            index.seek(len(MAGIC) + (count - 1) * RECORD.size)
+            record = RECORD.unpack(index.read(RECORD.size))
+            offset, _, _, expression_len, result_len, crc = record
+            end = offset + expression_len + result_len
+            if end <= data_size:
+                log.seek(offset)
+                if _crc(_FIELDS.pack(*record[:5]), log.read(end - offset)) == crc:
+                    break
+            count -= 1
+            end = 0
+        index.truncate(len(MAGIC) + count * RECORD.size)
+        log.truncate(end)
+        return count
+
+    # --- reading ---------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _remap(self) -> None:
+        self._close_maps()
+        if self._count:
+            self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+            self._log_map = mmap.mmap(self._log.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped = self._count
+
+    def _record(self, i: int) -> tuple:
+        # Callers hold the lock: a remap closes the maps another thread
+        # (the search indexer) may be reading.
+        if self._mapped <= i:
+            self._remap()
+        return RECORD.unpack_from(self._index_map, len(MAGIC) + i * RECORD.size)
+
+    def record(self, i: int) -> tuple:
+        """The raw index record of entry ``i``, without touching the log."""
+        with self._lock:
+            return self._record(i)
+
+    def __getitem__(self, i: int) -> HistoryEntry:
+        count = self._count
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError("history index out of range")
+        with self._lock:
+            offset, timestamp, value, expression_len, result_len, _ = self._record(i)
+            split = offset + expression_len
+            data = self._log_map
+            expression = data[offset:split]
+            result = data[split:split + result_len]
+        return HistoryEntry(expression.decode("utf-8", "replace"),
+                            result.decode("utf-8", "replace"), timestamp, value)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def recent(self, n: int) -> list[HistoryEntry]:
+        """The last ``n`` entries, oldest first."""
+        return [self[i] for i in range(max(self._count - n, 0), self._count)]
+
+    # --- writing ---------------------------------------------------------
+
+    def append(self, expression: str, result: str, value=None,
+               timestamp: float | None = None) -> int:
+        """Record one calculation; returns its index. Thread-safe."""
+        expression_bytes = expression.encode("utf-8", "surrogatepass")
+        result_bytes = result.encode("utf-8", "surrogatepass")
+        data = expression_bytes + result_bytes
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            log = self._log
+            offset = log.seek(0, os.SEEK_END)
+            fields = _FIELDS.pack(offset, timestamp, _as_float(value),
+                                  len(expression_bytes), len(result_bytes))
+            log.write(data)
+            if self.durable:
+                os.fsync(log.fileno())
+            self._index.write(fields + struct.pack("<I", _crc(fields, data)))
+            if self.durable:
+                os.fsync(self._index.fileno())
+            self._count += 1
+            return self._count - 1
+
+    # --- closing ---------------------------------------------------------
+
+    def _close_maps(self) -> None:
+        for mapping in (self._index_map, self._log_map):
+            if mapping is not None:
+                mapping.close()
+        self._index_map = self._log_map = None
+        self._mapped = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_maps()
+            self._index.close()
+            self._log.close()
+
+    def __enter__(self) -> History:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_default_history() -> History | None:
+    """Open the user's history, or return None if it cannot be written."""
+    try:
+        return History(default_history_path())
+    except (OSError, ValueError):
+        return None
@@ -1,86 +1,169 @@
-import tkinter as tk
-import math
+import re
+import threading
+
+from calcbignum import DigitViewer, is_big
+from calcdisplay import DisplayWriter, bind_paste
+from calcengine import CalculatorEngine
+from calcfunctions import FUNCTIONS
+from calchistory import open_default_history
+from calcscheduler import EvaluationScheduler
+from calcsearch import HistorySearch
+from calctape import TapePanel
+
+# tkinter is imported inside the methods that build widgets, so importing
+# this module (or its CalculatorEngine) does not load Tk.
 
 class Display:
     def __init__(self, parent) -> None:
-        root.title("Kenda Calculator")
-        root.geometry("350x550")
-        self.entry = tk.Entry(parent, font=("Arial", 24), justify="right", bd=10)
-        self.entry.grid(row=0, column=0, columnspan=4, sticky="nsew")
+        import tkinter as tk
+        parent.title("Kenda Calculator")
+        parent.geometry("350x550")
+        frame = tk.Frame(parent)
+        frame.grid(row=0, column=0, columnspan=4, sticky="nsew")
+        self.entry = tk.Entry(frame, font=("Arial", 24), justify="right", bd=10)
+        self.entry.pack(fill="both", expand=True)
+        self.preview = tk.Label(frame, font=("Arial", 12), fg="#808080", anchor="e")
+        self.preview.pack(fill="x")
+        self.writer = DisplayWriter(self.entry, self.preview)
 
     def update(self, value) -> None:
-        self.entry.delete(0, tk.END)
-        self.entry.insert(0, value)
+        # A result string, or the engine's GapBuffer while editing.
+        if isinstance(value, str):
+            self.writer.set_text(value)
+        else:
+            self.writer.set_buffer(value)
 
     def clear(self) -> None:
         self.update("")
+        self.show_preview("")
 
-class CalculatorEngine:
-    def __init__(self) -> int:
-        self.expression = ""
+    def show_preview(self, value) -> None:
+        self.writer.set_preview(value)
 
-    def append(self, value) -> int:
-        if value == "^":
-            self.expression += "**"
-        else:
-            self.expression += value
+class SearchDialog:
+    """Ctrl+F window listing history entries that match as you type."""
 
-    def clear(self) -> None:
-        self.expression = ""
-    def percentage(self):
-        try:
-            if self.expression.endswith('%'):
-                value=float(self.expression[:-1])
-                return str(value/100)
-            else:
-                # value = float(self.expression[:-1])
-                return str(eval(self.expression)/100)
-            # else:
-            #     return "Error"
-        except Exception:
-            return 'Errror'
-        
-    def sqrt(self):
-        try:
-            if self.expression('✓'):
-                value=float(self.expression)
-                return str(math.sqrt(value))
-            elif self.expression:
-                value = float(self.expression[:-1])
-                return str(math.sqrt(value))
+    MODES = (("Starts with", "prefix"), ("Contains", "substring"),
+             ("Result between", "range"))
+    # Fewer new entries than this are indexed inline by the query.
+    INLINE_INDEX = 20_000
+
+    def __init__(self, root, search, on_select) -> None:
+        import tkinter as tk
+        self.search = search
+        self.on_select = on_select
+        self.ids = []
+        self.indexer = None
+        self.window = tk.Toplevel(root)
+        self.window.title("Search history")
+        self.query = tk.Entry(self.window, font=("Arial", 14))
+        self.query.pack(fill="x", padx=5, pady=5)
+        self.mode = tk.StringVar(self.window, value="prefix")
+        modes = tk.Frame(self.window)
+        modes.pack(fill="x", padx=5)
+        for label, value in self.MODES:
+            tk.Radiobutton(modes, text=label, value=value, variable=self.mode,
+                           command=self.refresh).pack(side="left")
+        self.results = tk.Listbox(self.window, font=("Arial", 12), height=12)
+        self.results.pack(fill="both", expand=True, padx=5, pady=5)
+        self.query.bind("<KeyRelease>", self.refresh)
+        self.query.bind("<Return>", self.choose)
+        self.results.bind("<Double-Button-1>", self.choose)
+        self.results.bind("<Return>", self.choose)
+        self.window.bind("<Escape>", lambda event: self.window.destroy())
+        self.query.focus_set()
+        self.refresh()
+
+    def refresh(self, event=None) -> None:
+        indexing = self.indexer is not None and self.indexer.is_alive()
+        if indexing or self.search.pending > self.INLINE_INDEX:
+            # Index a large backlog (the first search over a long history)
+            # in the background and query once it is done.
+            if not indexing:
+                self.indexer = threading.Thread(target=self.search.refresh, daemon=True)
+                self.indexer.start()
+                self.window.after(100, self.poll_indexer)
+            self.results.delete(0, "end")
+            self.results.insert("end", "Indexing history…")
+            return
+        text = self.query.get().strip()
+        mode = self.mode.get()
+        if mode == "range":
+            # "A..B", "A,B" or "A B"; a single number matches exactly.
+            bounds = [b for b in re.split(r"\s*(?:\.\.|,|\s)\s*", text) if b]
+            try:
+                low, high = sorted((float(bounds[0]), float(bounds[-1])))
+            except (IndexError, ValueError):
+                self.ids = []
             else:
-                return "Error"
-        except Exception:
-            return 'Errror'
-    
-    def calculate(self) -> int:
-        try:
-            return str(eval(self.expression))
-        except Exception:
-            return "Error"
+                self.ids = self.search.value_range(low, high)
+        elif text:
+            self.ids = getattr(self.search, mode)(text)
+        else:
+            self.ids = []
+        self.results.delete(0, "end")
+        for entry in self.search.entries(self.ids):
+            self.results.insert("end", f"{entry.expression} = {entry.result}")
+
+    def poll_indexer(self) -> None:
+        if not self.window.winfo_exists():
+            return
+        if self.indexer.is_alive():
+            self.window.after(100, self.poll_indexer)
+        else:
+            self.refresh()
+
+    def choose(self, event=None) -> str:
+        selection = self.results.curselection()
+        index = selection[0] if selection else 0
+        if index < len(self.ids):
+            self.on_select(self.search.entries([self.ids[index]])[0].expression)
+            self.window.destroy()
+        return "break"
+
+# Arrow keys move the editing cursor by this many characters.
+CURSOR_KEYS = {"Left": -1, "Right": 1}
 
 class CalculatorUI:
-    def __init__(self, root) -> int:
-        self.engine = CalculatorEngine()
+    def __init__(self, root, history=None) -> int:
+        self.engine = CalculatorEngine(history=history)
         self.display = Display(root)
+        self.scheduler = EvaluationScheduler(root)
+        self.root = root
+        # Indexes are built on the first search, not at startup.
+        self.search = HistorySearch(history) if history is not None else None
 
         # Configure rows and columns
-        for i in range(7):
+        for i in range(8):
             root.rowconfigure(i, weight=1)
         for i in range(4):
             root.columnconfigure(i, weight=1)
 
         self.create_buttons()
+        self.tape = None
+        if history is not None:
+            root.geometry("600x550")
+            root.columnconfigure(4, weight=3)
+            self.tape = TapePanel(root, history, on_select=self.load_expression)
+            self.tape.frame.grid(row=0, column=4, rowspan=8, sticky="nsew")
         root.bind("<Key>", self.handle_keypress)
+        bind_paste(root, self.display.entry, self.handle_paste)
+        root.bind("<Control-f>", self.open_search)
+        root.bind("<Control-F>", self.open_search)
+        root.bind("<Control-d>", self.open_digits)
+        root.bind("<Control-D>", self.open_digits)
 
     def create_buttons(self) -> int:
+        import tkinter as tk
+
         buttons = [
             ("7", 1, 0), ("8", 1, 1), ("9", 1, 2), ("/", 1, 3),
             ("4", 2, 0), ("5", 2, 1), ("6", 2, 2), ("*", 2, 3),
             ("1", 3, 0), ("2", 3, 1), ("3", 3, 2), ("-", 3, 3),
             ("0", 4, 0), (".", 4, 1), ("=", 4, 2), ("+", 4, 3),
             ("C", 5, 0), ("(", 5, 1), (")", 5, 2), ("^", 5, 3),
-            ("%", 6, 2), ("✓", 6, 3)
+            ("!", 6, 0), (",", 6, 1), ("%", 6, 2), ("✓", 6, 3),
+            ("nCr", 7, 0), ("nPr", 7, 1), ("powmod", 7, 2),
         ]
 
         for (text, row, col) in buttons:
@@ -101,27 +184,48 @@ class CalculatorUI:
             return "#90ee90"
         elif text == "C":
             return "#ff6347"
+        elif text in FUNCTIONS or text == "!":
+            return "#add8e6"
         return "#d3d3d3"
 
+    def calculate(self) -> None:
+        self.display.show_preview("")
+        if not self.scheduler.calculate(self.engine, self.show_result):
+            self.display.show_preview("calculating…")
+
+    def show_result(self, result) -> None:
+        self.display.update(result)
+        if self._big_result() is not None:
+            self.display.show_preview("Ctrl+D for all digits")
+        if self.tape is not None:
+            self.tape.refresh()
+
     def on_button_click(self, char) -> int:
+        if char == "=":
+            return self.calculate()
+        self.scheduler.cancel()
         if char == "C":
             self.engine.clear()
-        elif char == "=":
-            result = self.engine.calculate()
-            return self.display.update(result)
+        elif char in FUNCTIONS:
+            self.engine.append(char + "(")
         else:
             self.engine.append(char)
 
-        self.display.update(self.engine.expression)
+        self.display.update(self.engine.buffer)
+        self.display.show_preview(self.engine.preview())
 
     def handle_keypress(self, event) -> int:
+        offset = CURSOR_KEYS.get(getattr(event, "keysym", ""))
+        if offset is not None:
+            self.engine.move_cursor(offset)
+            return self.display.update(self.engine.buffer)
         char = event.char
-        if char in "0123456789+-*/().":
+        if char and char in "0123456789+-*/().!,":
+            self.scheduler.cancel()
             self.engine.append(char)
 
         elif char == "\r":  # Enter key
-            result = self.engine.calculate()
-            return self.display.update(result)
+            return self.calculate()
         
         elif char == '%':
             result = self.engine.percentage()
@@ -134,11 +238,50 @@ class CalculatorUI:
             return
 
         elif char == "\x08":  # Backspace
-            # self.engine.expression = self.engine.expression[:-1]
-            self.engine.clear()
-        self.display.update(self.engine.expression)
+            self.scheduler.cancel()
+            self.engine.backspace()
+
+        elif char == "\x7f":  # Delete
+            self.scheduler.cancel()
+            self.engine.delete()
+        self.display.update(self.engine.buffer)
+        self.display.show_preview(self.engine.preview())
+
+    def handle_paste(self, event) -> str:
+        try:
+            text = event.widget.clipboard_get()
+        except Exception:
+            return "break"
+        self.scheduler.cancel()
+        if self.engine.paste(text):
+            self.display.update(self.engine.buffer)
+            self.display.show_preview(self.engine.preview())
+        return "break"
+
+    def open_search(self, event=None) -> str:
+        if self.search is not None:
+            SearchDialog(self.root, self.search, self.load_expression)
+        return "break"
+
+    def _big_result(self):
+        value = self.engine.value
+        return value if type(value) is int and is_big(value) else None
+
+    def open_digits(self, event=None) -> str:
+        value = self._big_result()
+        if value is not None:
+            DigitViewer(self.root, value, title=f"{self.engine.expression} =")
+        return "break"
+
+    def load_expression(self, expression) -> None:
+        self.scheduler.cancel()
+        self.engine.expression = expression
+        self.display.update(self.engine.buffer)
+        self.display.show_preview(self.engine.preview())
 
 if __name__ == "__main__":
+    import tkinter as tk
+
     root = tk.Tk()
-    calculator = CalculatorUI(root)
+    calculator = CalculatorUI(root, open_default_history())
     root.mainloop()
\ No newline at end of file
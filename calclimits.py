@@ -0,0 +1,369 @@
+"""Keep pathological expressions from freezing the calculator.
+
+Two layers:
+
+* :func:`estimate_bits` walks the parsed tree and bounds the size, in
+  bits, of every intermediate result before anything is computed. Powers
+  and products of integers (and of fractions in fraction mode) are what
+  can grow without bound; floats and Decimals are capped by their
+  exponent range and overflow quickly on their own. Anything over
+  ``max_bits`` is refused outright, so ``9**9**9`` costs microseconds.
+* Expressions that pass the estimate but could still be slow, i.e. whose
+  largest intermediate exceeds ``inline_bits``, are evaluated in a worker
+  process with CPU-time and address-space limits and a wall-clock
+  timeout; on overrun the worker is killed.
+
+Both surface as :class:`ResultTooLarge`. Ordinary expressions only pay
+for the estimate and are evaluated in-process.
+"""
+from __future__ import annotations
+
+import math
+import time
+
+from calcexpr import Binary, Call, Name, Node, Num, Unary, parse, postorder
+from calcfunctions import FUNCTIONS
+from calcnumeric import DEFAULT_PRECISION, FLOAT, FloatBackend
+
+# Largest intermediate result allowed at all: 16 Mbit is about 5 million
+# decimal digits, enough for 2 ** 10000000. Whatever cannot actually be
+# computed at that size within the CPU budget is stopped by the worker.
+MAX_RESULT_BITS = 1 << 24
+# Below this every operation is sub-millisecond; evaluate in-process.
+INLINE_BITS = 1 << 17
+
+TOO_LARGE = "Error: result too large"
+
+_LOG2_10 = math.log2(10)
+# Bits assumed for a name whose value is not known up front.
+_NAME_BITS = 64.0
+# Size recorded for floats and Decimals, which cannot grow past their
+# exponent range.
+_BOUNDED_BITS = 64.0
+
+# Size assumed for the factorial (or nCr, nPr) of a float or Decimal, whose
+# integer value could be anything up to its exponent range: past
+# inline_bits so it runs under the worker's limits, and far enough under
+# max_bits to be tried.
+_BOUNDED_FACTORIAL_BITS = float(1 << 20)
+
+# Kinds of value the estimator tracks.
+_INT, _EXACT, _BOUNDED = 0, 1, 2
+
+
+class ResultTooLarge(OverflowError):
+    """The expression would exceed the size, time or memory budget."""
+
+
+class EvaluationCancelled(Exception):
+    """The caller withdrew the request before the worker finished."""
+
+
+class Limits:
+    """Budget for one evaluation; see the module docstring."""
+
+    def __init__(self, max_bits: int = MAX_RESULT_BITS,
+                 inline_bits: int = INLINE_BITS, cpu_seconds: float = 2.0,
+                 memory_bytes: int = 512 << 20,
+                 timeout: float | None = None) -> None:
+        self.max_bits = max_bits
+        self.inline_bits = inline_bits
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        # Wall-clock allowance; a little over the CPU budget so a busy
+        # machine does not time out expressions the CPU limit would allow.
+        self.timeout = cpu_seconds + 1.0 if timeout is None else timeout
+
+
+DEFAULT_LIMITS = Limits()
+
+
+def _int_bits(value: int) -> float:
+    # log2 rather than bit_length: an exponent's bound is 2**bits, and
+    # 9**9**9 should be judged by 9**9, not by 16**16.
+    return math.log2(abs(value)) if value else 0.0
+
+
+def _literal_bits(node: Num, exact: bool) -> tuple[int, float]:
+    value = node.value
+    if type(value) is int:
+        return _INT, _int_bits(value)
+    if not exact:
+        return _BOUNDED, _BOUNDED_BITS
+    # Fraction("1e100000") is a 332 kbit integer although the float is inf.
+    text = (node.text or repr(value)).lower()
+    mantissa, _, exponent = text.partition("e")
+    digits = len(mantissa) + abs(int(exponent or 0))
+    return _EXACT, digits * _LOG2_10 * 2
+
+
+def _variable_bits(value, exact: bool) -> tuple[int, float]:
+    if value is None:
+        return _INT, _NAME_BITS
+    if type(value) is int:
+        return _INT, _int_bits(value)
+    denominator = getattr(value, "denominator", None)
+    if type(value) is float or denominator is None:
+        # Floats and Decimals, like their literals.
+        return _BOUNDED, _BOUNDED_BITS
+    if denominator == 1:
+        return _INT, _int_bits(value.numerator)
+    if not exact:
+        return _BOUNDED, _BOUNDED_BITS
+    return _EXACT, _int_bits(value.numerator) + _int_bits(denominator)
+
+
+def estimate_bits(node: Node | list[Node], backend: FloatBackend = FLOAT,
+                  variables: dict | None = None,
+                  max_bits: float = math.inf, functions: dict = FUNCTIONS) -> float:
+    """Upper bound on the bits of the largest value computed for ``node``.
+
+    Stops and raises :class:`ResultTooLarge` as soon as some node would
+    exceed ``max_bits``. Bounds are log2 magnitudes, so chains of ``*`` and
+    ``**`` are tight and each ``+`` or ``-`` adds at most one bit. Calls
+    of user functions in ``functions`` (see :mod:`calcsymbols`) are
+    bounded through their bodies.
+
+    ``node`` may also be given as its :func:`calcexpr.postorder` list, by
+    callers that estimate the same formula for changing variables.
+    """
+    exact = backend.name == "fraction"
+    order = node if isinstance(node, list) else postorder(node)
+    return _estimate(order, exact, variables, None, functions, max_bits)[1]
+
+
+def _estimate(order: list[Node], exact: bool, variables: dict | None,
+              params: dict | None, functions: dict,
+              max_bits: float) -> tuple[tuple[int, float], float]:
+    """``(bound of the value of the last node, largest bound on the way)``."""
+    stack: list[tuple[int, float]] = []
+    largest = 0.0
+    for current in order:
+        kind = type(current)
+        if kind is Num:
+            entry = _literal_bits(current, exact)
+        elif kind is Name:
+            if params is not None and current.id in params:
+                entry = params[current.id]
+            else:
+                value = None if variables is None else variables.get(current.id)
+                entry = _variable_bits(value, exact)
+        elif kind is Unary:
+            if current.op != "!":
+                continue
+            entry = _factorial_bits(*_integral(current.operand, stack.pop()))
+        elif kind is Call:
+            args = stack[-len(current.args):]
+            del stack[-len(current.args):]
+            if current.name in FUNCTIONS:
+                args = [_integral(arg, entry) for arg, entry in zip(current.args, args)]
+                entry = _call_bits(current.name, args)
+            else:
+                function = functions[current.name][1]
+                entry, inner = _estimate(function.order, exact, variables,
+                                         dict(zip(function.params, args)),
+                                         functions, max_bits)
+                largest = max(largest, inner)
+        else:
+            right_kind, right = stack.pop()
+            left_kind, left = stack.pop()
+            entry = _combine(current, left_kind, left, right_kind, right, exact)
+        if entry[1] > largest:
+            largest = entry[1]
+            if largest > max_bits:
+                raise ResultTooLarge(f"result would need about {largest:.3g} bits")
+        stack.append(entry)
+    return stack[0], largest
+
+
+def _lgamma_bits(bits: float) -> float:
+    """Bits of ``n!`` for the largest ``n`` below ``2**bits``."""
+    if bits > 1000:
+        return math.inf
+    n = 2.0 ** bits
+    return math.lgamma(n + 1) / math.log(2) if n > 2 else 1.0
+
+
+def _integral(node: Node, entry: tuple[int, float]) -> tuple[int, float]:
+    """``entry`` for a factorial operand, by value if it is a literal like 5.0.
+
+    Float and Decimal operands are otherwise only known to be bounded, and
+    a fraction-mode literal's bits count numerator and denominator, not
+    its magnitude; either would send ``5.0!`` to the worker, or refuse it.
+    """
+    if type(node) is Num and type(node.value) is float and math.isfinite(node.value):
+        if node.value.is_integer():
+            return _INT, _int_bits(int(node.value))
+        # A fractional float means a fractional literal, which is refused.
+        return _INT, 0.0
+    return entry
+
+
+def _factorial_bits(kind: int, bits: float) -> tuple[int, float]:
+    if kind == _BOUNDED:
+        return _INT, _BOUNDED_FACTORIAL_BITS
+    return _INT, _lgamma_bits(bits)
+
+
+def _call_bits(name: str, args: list[tuple[int, float]]) -> tuple[int, float]:
+    if name == "powmod":
+        # Reduced modulo the last argument at every step.
+        return _INT, args[-1][1]
+    (n_kind, n), (k_kind, k) = args
+    if _BOUNDED in (n_kind, k_kind):
+        return _INT, _BOUNDED_FACTORIAL_BITS
+    if name == "nCr":
+        # C(n, k) <= 2**n.
+        return _INT, 2.0 ** n if n <= 1000 else math.inf
+    # nPr: n! / (n-k)! <= min(n**k, n!).
+    power = n * 2.0 ** k if k <= 1000 else math.inf
+    return _INT, min(power, _lgamma_bits(n))
+
+
+def _combine(node: Binary, left_kind: int, left: float,
+             right_kind: int, right: float, exact: bool) -> tuple[int, float]:
+    op = node.op
+    kind = max(left_kind, right_kind)
+    if kind == _BOUNDED:
+        return _BOUNDED, _BOUNDED_BITS
+    if op == "+" or op == "-":
+        return kind, max(left, right) + 1
+    if op == "*":
+        return kind, left + right
+    if op == "/":
+        if not exact:
+            return _BOUNDED, _BOUNDED_BITS
+        return _EXACT, left + right
+    if op == "%":
+        return kind, right if kind == _INT else left + right
+    # "**": |a| < 2**left and |b| < 2**right, so |a**b| < 2**(left * 2**right).
+    negative = type(node.right) is Unary and node.right.op == "-"
+    if negative and not exact:
+        return _BOUNDED, _BOUNDED_BITS
+    if left == 0:
+        return kind, 0.0
+    if right > 1000:
+        return kind, math.inf
+    return kind, left * 2.0 ** right
+
+
+# --- Worker process ------------------------------------------------------
+
+_POLL_SECONDS = 0.02
+
+
+def _apply_limits(cpu_seconds: float, memory_bytes: int) -> None:
+    try:
+        import resource
+    except ImportError:
+        # No rlimits on Windows; the parent's timeout still applies.
+        return
+    cpu = math.ceil(cpu_seconds)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    try:
+        with open("/proc/self/statm") as f:
+            in_use = int(f.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        # Without a baseline an address-space cap could starve the
+        # interpreter itself; rely on the CPU limit and timeout.
+        return
+    limit = in_use + memory_bytes
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_limited(conn, node: Node, mode: str, precision: int,
+                 variables: dict | None, functions: dict, cpu_seconds: float,
+                 memory_bytes: int) -> None:
+    from calcnumeric import make_backend
+
+    _apply_limits(cpu_seconds, memory_bytes)
+    try:
+        value = make_backend(mode, precision).evaluate(node, variables, functions)
+        conn.send((True, value))
+    except MemoryError:
+        conn.send((False, ResultTooLarge("out of memory")))
+    except Exception as e:
+        conn.send((False, e))
+    finally:
+        conn.close()
+
+
+def _evaluate_in_worker(node: Node, backend: FloatBackend, limits: Limits,
+                        variables: dict | None, functions: dict,
+                        cancel_event) -> object:
+    import multiprocessing
+
+    # fork starts in a couple of milliseconds and needs nothing pickled;
+    # platforms without it re-create the backend from its mode.
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    ctx = multiprocessing.get_context(method)
+    receiver, sender = ctx.Pipe(duplex=False)
+    precision = getattr(backend, "precision", DEFAULT_PRECISION)
+    worker = ctx.Process(
+        target=_run_limited,
+        args=(sender, node, backend.name, precision, variables, functions,
+              limits.cpu_seconds, limits.memory_bytes),
+        daemon=True,
+    )
+    worker.start()
+    sender.close()
+    deadline = time.monotonic() + limits.timeout
+    try:
+        while not receiver.poll(_POLL_SECONDS):
+            if cancel_event is not None and cancel_event.is_set():
+                raise EvaluationCancelled()
+            if time.monotonic() > deadline:
+                raise ResultTooLarge("evaluation took too long")
+        try:
+            ok, value = receiver.recv()
+        except EOFError:
+            # Killed by the CPU or memory limit before it could answer.
+            raise ResultTooLarge("evaluation exceeded its resource limits") from None
+    finally:
+        if worker.is_alive():
+            worker.kill()
+        worker.join()
+        receiver.close()
+    if not ok:
+        raise value
+    return value
+
+
+def evaluate_bounded(expression: str | Node, backend: FloatBackend = FLOAT,
+                     limits: Limits = DEFAULT_LIMITS,
+                     variables: dict | None = None, cancel_event=None,
+                     functions: dict = FUNCTIONS) -> object:
+    """Evaluate ``expression`` within ``limits``.
+
+    Raises :class:`ResultTooLarge` when the estimate or the worker's limits
+    are exceeded, and :class:`EvaluationCancelled` if ``cancel_event`` (a
+    ``threading.Event``) is set while a worker is running.
+    """
+    node = parse(expression, functions) if isinstance(expression, str) else expression
+    bits = estimate_bits(node, backend, variables, limits.max_bits, functions)
+    if bits <= limits.inline_bits:
+        return backend.evaluate(node, variables, functions)
+    return _evaluate_in_worker(node, backend, limits, variables, functions,
+                               cancel_event)
+
+
+class BoundedBackend:
+    """A numeric backend whose ``evaluate`` goes through :func:`evaluate_bounded`.
+
+    Everything else is delegated, so it can stand in for the wrapped
+    backend wherever one is accepted, the result cache in particular.
+    """
+
+    def __init__(self, backend: FloatBackend = FLOAT,
+                 limits: Limits = DEFAULT_LIMITS, cancel_event=None) -> None:
+        self.backend = backend
+        self.limits = limits
+        self.cancel_event = cancel_event
+
+    def __getattr__(self, name: str):
+        return getattr(self.backend, name)
+
+    def evaluate(self, node: Node, variables: dict | None = None,
+                 functions: dict = FUNCTIONS):
+        return evaluate_bounded(node, self.backend, self.limits, variables,
+                                self.cancel_event, functions)
@@ -0,0 +1,254 @@
+"""Opt-in counters, latency histograms and exports for the engines.
+
+A :class:`calcengine.CalculatorEngine` reports to whatever ``metrics``
+object it is given. By default that is :data:`NULL_METRICS`, whose
+methods do nothing and whose ``enabled`` is False: an edit costs one
+empty method call and a calculation one attribute check, without even
+reading the clock, until a :class:`Metrics` is swapped in.
+
+:class:`Metrics` keeps:
+
+* counters, e.g. ``append_total`` or ``calculate_error_total``;
+* histograms with fixed buckets, for calculate latency and result size;
+* the slowest expressions seen, to point at what regressed;
+* any :class:`calccache.ResultCache` attached, read at export time.
+
+It exports as a JSON-ready dict (:meth:`Metrics.snapshot`) or Prometheus
+text format (:meth:`Metrics.prometheus`), and :class:`MetricsExporter`
+rewrites a file with either on an interval from a daemon thread.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+from bisect import bisect_left
+
+PREFIX = "calc_"
+# Seconds: 10 us to 10 s.
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Characters of formatted result.
+SIZE_BUCKETS = (1, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536)
+SLOWEST = 10
+DEFAULT_INTERVAL = 15.0
+
+
+class NullMetrics:
+    """Stands in for :class:`Metrics` when instrumentation is off."""
+
+    enabled = False
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def observe(self, name: str, value: float) -> None:
+        pass
+
+    def record_calculation(self, expression: str, seconds: float, result: str,
+                           outcome: str) -> None:
+        pass
+
+    def attach_cache(self, cache) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # One count per bucket plus the +Inf overflow.
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """``(le, count)`` pairs as Prometheus wants them, +Inf last."""
+        pairs = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            pairs.append((repr(float(bound)), running))
+        pairs.append(("+Inf", running + self.counts[-1]))
+        return pairs
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bucket bound holding the ``q`` quantile, or None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self, latency_buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                 size_buckets: tuple[float, ...] = SIZE_BUCKETS,
+                 slowest: int = SLOWEST) -> None:
+        self._lock = threading.Lock()
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {
+            "calculate_seconds": Histogram(latency_buckets),
+            "result_chars": Histogram(size_buckets),
+        }
+        self._slowest_size = slowest
+        # Min-heap of (seconds, expression), so the fastest is evicted.
+        self._slowest: list[tuple[float, str]] = []
+        self._caches = []
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    def record_calculation(self, expression: str, seconds: float, result: str,
+                           outcome: str) -> None:
+        """One finished calculate(); ``outcome`` is "ok" or an error kind."""
+        with self._lock:
+            counters = self.counters
+            counters["calculate_total"] = counters.get("calculate_total", 0) + 1
+            if outcome != "ok":
+                name = f"calculate_{outcome}_total"
+                counters[name] = counters.get(name, 0) + 1
+            self.histograms["calculate_seconds"].observe(seconds)
+            self.histograms["result_chars"].observe(len(result))
+            slowest = self._slowest
+            if len(slowest) < self._slowest_size:
+                heapq.heappush(slowest, (seconds, expression))
+            elif seconds > slowest[0][0]:
+                heapq.heapreplace(slowest, (seconds, expression))
+
+    def attach_cache(self, cache) -> None:
+        """Export ``cache.stats()`` with every snapshot."""
+        if all(cache is not attached for attached in self._caches):
+            self._caches.append(cache)
+
+    def _cache_stats(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for cache in self._caches:
+            for name, value in cache.stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    # --- export ----------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Everything as plain data, ready for json.dumps."""
+        with self._lock:
+            histograms = {
+                name: {"count": h.count, "sum": h.total,
+                       "p50": h.quantile(0.5), "p99": h.quantile(0.99),
+                       "buckets": dict(h.cumulative())}
+                for name, h in self.histograms.items()
+            }
+            counters = dict(self.counters)
+            slowest = sorted(self._slowest, reverse=True)
+        calls = counters.get("calculate_total", 0)
+        failed = sum(value for name, value in counters.items()
+                     if name.startswith("calculate_") and name != "calculate_total")
+        return {
+            "counters": counters,
+            "error_rate": failed / calls if calls else 0.0,
+            "histograms": histograms,
+            "cache": self._cache_stats(),
+            "slowest": [{"expression": e, "seconds": s} for s, e in slowest],
+        }
+
+    def json(self) -> str:
+        import json
+
+        return json.dumps(self.snapshot(), indent=2)
+
+    def prometheus(self) -> str:
+        """The metrics in Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = [(name, h.cumulative(), h.total, h.count)
+                          for name, h in sorted(self.histograms.items())]
+        lines = []
+        for name, value in counters:
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.append(f"{PREFIX}{name} {value}")
+        for name, buckets, total, count in histograms:
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for le, value in buckets:
+                lines.append(f'{PREFIX}{name}_bucket{{le="{le}"}} {value}')
+            lines.append(f"{PREFIX}{name}_sum {total!r}")
+            lines.append(f"{PREFIX}{name}_count {count}")
+        for name, value in sorted(self._cache_stats().items()):
+            lines.append(f"# TYPE {PREFIX}cache_{name} gauge")
+            lines.append(f"{PREFIX}cache_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    def __init__(self, metrics: Metrics, path: str, interval: float = DEFAULT_INTERVAL,
+                 format: str | None = None) -> None:
+        """Rewrite ``path`` with ``metrics`` every ``interval`` seconds.
+
+        ``format`` is "prometheus" or "json"; by default it is JSON for a
+        ``.json`` path and Prometheus text otherwise. Each write goes to a
+        temporary file that is renamed over ``path``, so a scraper never
+        sees half a file.
+        """
+        if format is None:
+            format = "json" if path.endswith(".json") else "prometheus"
+        if format not in ("prometheus", "json"):
+            raise ValueError(f"unknown metrics format {format!r}")
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.format = format
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def write(self) -> None:
+        text = self.metrics.json() if self.format == "json" else self.metrics.prometheus()
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(text)
+        os.replace(temporary, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self) -> MetricsExporter:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="calc-metrics",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the thread and write the final numbers."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def __enter__(self) -> MetricsExporter:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
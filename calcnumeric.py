@@ -0,0 +1,267 @@
+"""Numeric backends: how literals are read and operators computed.
+
+``float``
+    Python semantics, as eval() had them: integer literals stay ``int``
+    and everything else is a binary float. The fast default.
+``decimal``
+    Literals are read exactly as ``decimal.Decimal`` and every operation
+    rounds to a user-set precision.
+``fraction``
+    Exact rationals with ``fractions.Fraction``.
+``adaptive``
+    Computes in float, but watches for catastrophic cancellation and for
+    results that are only rounding noise away from a short decimal
+    (0.1 + 0.2), and redoes just those calculations in Decimal.
+
+Integer-only operations (+ - * % and non-negative powers of two ints)
+stay on plain ``int`` in every backend, which is exact and much faster
+than going through Decimal or Fraction. decimal and fractions are only
+imported when their backend is created.
+"""
+from __future__ import annotations
+
+import contextvars
+import operator
+
+from calcbignum import is_big, scientific
+from calcexpr import BINARY_OPS, UNARY_OPS, Node, Num, compile_node, execute
+from calcfunctions import FUNCTIONS
+
+NUMERIC_MODES = ("float", "decimal", "fraction", "adaptive")
+DEFAULT_PRECISION = 28
+
+
+class FloatBackend:
+    name = "float"
+
+    def __init__(self) -> None:
+        self.key = self.name
+        self.binary = BINARY_OPS
+        self.unary = UNARY_OPS
+
+    def literal(self, node: Num):
+        return node.value
+
+    def parse_number(self, text: str):
+        """Read a number typed or shown on a display."""
+        try:
+            return int(text)
+        except ValueError:
+            return float(text)
+
+    def apply(self, op: str, left, right):
+        """Compute one binary operation, as the two-operand GUIs do."""
+        return self.binary[op](left, right)
+
+    def evaluate(self, node: Node, variables: dict | None = None,
+                 functions: dict = FUNCTIONS):
+        return self.run(compile_node(node, self, functions), node, variables, functions)
+
+    def run(self, program: tuple, node: Node, variables: dict | None = None,
+            functions: dict = FUNCTIONS):
+        """Execute ``program``, already compiled from ``node`` with this backend."""
+        return execute(program, variables)
+
+    def variable(self, value):
+        """How a value assigned to a name is kept for later formulas."""
+        return value
+
+    def format(self, value) -> str:
+        # str() of a huge int is slow and, past 4300 digits, refused.
+        if type(value) is not float and is_big(value):
+            return scientific(value)
+        return str(value)
+
+
+class DecimalBackend(FloatBackend):
+    name = "decimal"
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        import decimal
+
+        self.precision = precision
+        self.key = f"{self.name}:{precision}"
+        self._decimal = decimal
+        ctx = self.context = decimal.Context(prec=precision)
+
+        def binary(int_op, dec_op):
+            def apply(a, b):
+                if type(a) is int and type(b) is int:
+                    return int_op(a, b)
+                return dec_op(a, b)
+            return apply
+
+        def power(a, b):
+            if type(a) is int and type(b) is int and b >= 0:
+                return a ** b
+            return ctx.power(a, b)
+
+        def mod(a, b):
+            if type(a) is int and type(b) is int:
+                return a % b
+            # Decimal's remainder truncates; keep Python's floored modulo.
+            r = ctx.remainder(a, b)
+            if r and (r < 0) != (b < 0):
+                r = ctx.add(r, b)
+            return r
+
+        self.binary = {
+            "+": binary(operator.add, ctx.add),
+            "-": binary(operator.sub, ctx.subtract),
+            "*": binary(operator.mul, ctx.multiply),
+            "/": ctx.divide,
+            "%": mod,
+            "**": power,
+        }
+        self.unary = {
+            "-": lambda a: -a if type(a) is int else ctx.minus(a),
+            "+": lambda a: a if type(a) is int else ctx.plus(a),
+            "!": UNARY_OPS["!"],
+        }
+
+    def literal(self, node: Num):
+        if type(node.value) is int:
+            return node.value
+        return self._decimal.Decimal(node.text or repr(node.value))
+
+    def parse_number(self, text: str):
+        text = text.strip()
+        if text.isdigit():
+            return int(text)
+        try:
+            return self._decimal.Decimal(text)
+        except self._decimal.InvalidOperation:
+            raise ValueError(f"invalid number {text!r}") from None
+
+
+class FractionBackend(FloatBackend):
+    name = "fraction"
+
+    def __init__(self) -> None:
+        from fractions import Fraction
+
+        self.key = self.name
+        self._fraction = Fraction
+
+        def divide(a, b):
+            return Fraction(a) / b
+
+        def power(a, b):
+            if type(a) is int and type(b) is int and b >= 0:
+                return a ** b
+            return Fraction(a) ** b
+
+        self.binary = dict(BINARY_OPS, **{"/": divide, "**": power})
+        self.unary = UNARY_OPS
+
+    def literal(self, node: Num):
+        if type(node.value) is int:
+            return node.value
+        return self._fraction(node.text or repr(node.value))
+
+    def parse_number(self, text: str):
+        text = text.strip()
+        if text.isdigit():
+            return int(text)
+        return self._fraction(text)
+
+
+# Relative size of an add/sub result below which we call it cancellation:
+# more than half of a double's 53 significant bits are gone.
+_CANCELLATION = 2.0 ** -26
+# A float within this relative distance of a 12-digit decimal is taken to
+# be that decimal plus representation noise, e.g. 0.30000000000000004.
+_NOISE = 2.0 ** -48
+
+# Set by AdaptiveBackend.run and apply to a fresh one-item list for the
+# calculation they run; the checked + and - mark cancellation in it. A
+# context variable rather than an attribute, so calculations on other
+# threads (the Tk thread and the "=" worker) each see their own.
+_suspect: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    "adaptive_suspect", default=None)
+
+
+class AdaptiveBackend(FloatBackend):
+    name = "adaptive"
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        super().__init__()
+        self.exact = DecimalBackend(precision)
+        self.key = f"{self.name}:{precision}"
+        self.redone = 0
+
+        def checked(op):
+            def apply(a, b):
+                r = op(a, b)
+                if type(r) is float and abs(r) <= max(abs(a), abs(b)) * _CANCELLATION:
+                    suspect = _suspect.get()
+                    if suspect is not None:
+                        suspect[0] = True
+                return r
+            return apply
+
+        self.binary = dict(BINARY_OPS, **{"+": checked(operator.add),
+                                          "-": checked(operator.sub)})
+
+    def apply(self, op: str, left, right):
+        suspect = [False]
+        token = _suspect.set(suspect)
+        try:
+            value = self.binary[op](left, right)
+        finally:
+            _suspect.reset(token)
+        if suspect[0] or _noisy(value):
+            self.redone += 1
+            exact = self.exact
+            return exact.binary[op](exact.parse_number(str(left)),
+                                    exact.parse_number(str(right)))
+        return value
+
+    def run(self, program: tuple, node: Node, variables: dict | None = None,
+            functions: dict = FUNCTIONS):
+        suspect = [False]
+        token = _suspect.set(suspect)
+        try:
+            value = execute(program, variables)
+        finally:
+            _suspect.reset(token)
+        if suspect[0] or _noisy(value):
+            self.redone += 1
+            exact = self.exact
+            if variables:
+                variables = {name: exact.parse_number(repr(v)) if type(v) is float else v
+                             for name, v in variables.items()}
+            # User functions were compiled for float; see calcsymbols.
+            rebind = getattr(functions, "rebind", None)
+            if rebind is not None:
+                functions = rebind(exact, variables)
+            return exact.evaluate(node, variables, functions)
+        return value
+
+    def variable(self, value):
+        # Later formulas compute in float, which does not mix with the
+        # Decimal of a redone result.
+        return float(value) if type(value) not in (int, float) else value
+
+
+def _noisy(value) -> bool:
+    if type(value) is not float or value == 0 or value != value:
+        return False
+    short = float(f"{value:.12g}")
+    return short != value and abs(short - value) <= abs(value) * _NOISE
+
+
+def make_backend(mode: str = "float", precision: int = DEFAULT_PRECISION) -> FloatBackend:
+    """Create the backend for one of :data:`NUMERIC_MODES`."""
+    if mode == "float":
+        return FLOAT
+    if mode == "decimal":
+        return DecimalBackend(precision)
+    if mode == "fraction":
+        return FractionBackend()
+    if mode == "adaptive":
+        return AdaptiveBackend(precision)
+    raise ValueError(f"unknown numeric mode {mode!r}; expected one of {NUMERIC_MODES}")
+
+
+FLOAT = FloatBackend()
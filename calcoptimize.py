@@ -0,0 +1,303 @@
+"""Optimizing pass between parsing and evaluation.
+
+:func:`optimize` turns an AST into an equivalent DAG:
+
+* constant subtrees are folded to one literal, computed with the numeric
+  backend that will run the rest, so ``0.1 + 0.2`` folds to
+  ``Decimal('0.3')`` in decimal mode and to 0.30000000000000004 in float;
+* identical subtrees are hash-consed into one node object, ``a + b`` and
+  ``b + a`` included, so ``(x+1) * (x+1)`` has a single ``x+1``;
+* ``x*1``, ``1*x``, ``x+0``, ``0+x``, ``x-0`` and ``x**1`` become ``x``;
+* ``x**2`` up to ``x**MAX_POWER`` become multiplications by repeated
+  squaring, ``x**4`` being ``t*t`` with ``t = x*x``.
+
+Folding leaves alone anything that raises (``1/0`` still fails when it
+is run, with the usual error) or whose result would pass
+:data:`FOLD_MAX_BITS`; ``9**9**9`` stays for calclimits to refuse. In
+adaptive mode only integer results are folded, as a folded float would
+hide the noise that makes it redo a calculation in Decimal; in decimal
+mode the identities and the power reduction are skipped, as ``x*1``
+rounds ``x`` to the context precision and ``x*x*x`` rounds twice where
+``x**3`` rounds once. Two float differences remain, both well inside what a
+calculator shows: ``x**3`` as ``x*x*x`` may differ from pow() in the
+last bit, and ``x**2`` overflows to ``inf`` where pow() raises; ``x+0``
+keeps the sign of a ``-0.0``.
+
+The DAG runs on calcexpr's stack machine through :func:`compile_optimized`,
+which stores each shared node the first time it is computed and fetches
+it afterwards, and over arrays through :mod:`calcvector`. :func:`dump`
+renders it for inspection, as ``calcbatch --dump-optimized`` does.
+"""
+from __future__ import annotations
+
+import math
+
+from calcexpr import (BINARY, CALL, CONST, FETCH, LOAD, STORE, UNARY, Binary, Call,
+                      Name, Node, Num, Unary, postorder)
+from calcfunctions import FUNCTIONS
+from calcnumeric import FLOAT, FloatBackend
+
+# Folded integers (and fraction terms) are kept below this many bits.
+FOLD_MAX_BITS = 1 << 16
+# 5000! is about 54 kbit.
+FOLD_MAX_FACTORIAL = 5000
+# Largest integer power turned into multiplications.
+MAX_POWER = 4
+
+_COMMUTATIVE = frozenset(("+", "*"))
+
+
+def _bits(value) -> int:
+    if type(value) is int:
+        return value.bit_length()
+    numerator = getattr(value, "numerator", None)
+    if numerator is None or type(value) is float:
+        return 0
+    return max(numerator.bit_length(), value.denominator.bit_length())
+
+
+def _too_big(op: str, args: list) -> bool:
+    """Whether folding ``op`` over ``args`` could outgrow FOLD_MAX_BITS."""
+    if op == "**":
+        base, exponent = args
+        return (type(exponent) is int and exponent > 0
+                and _bits(base) * exponent > FOLD_MAX_BITS)
+    if op == "!" or op == "nCr" or op == "nPr":
+        return not args[0] <= FOLD_MAX_FACTORIAL
+    return False
+
+
+class _Builder:
+    """Hash-consing constructor for the nodes of one DAG."""
+
+    def __init__(self, backend: FloatBackend) -> None:
+        self.backend = backend
+        self.nodes: dict[tuple, Node] = {}
+        self.fold_floats = backend.name != "adaptive"
+        # Decimal rounds every operation, so x*1 is not x and x*x*x is
+        # not x**3.
+        self.identities = self.powers = backend.name != "decimal"
+
+    def intern(self, key: tuple, node: Node) -> Node:
+        return self.nodes.setdefault(key, node)
+
+    def num(self, node: Num) -> Node:
+        value = node.value
+        sign = math.copysign(1.0, value) if type(value) is float else 0
+        text = None if type(value) is int else node.text
+        return self.intern((Num, type(value), value, sign, text), node)
+
+    def constant(self, value) -> Node | None:
+        """A literal holding the folded ``value``, or None to keep the subtree."""
+        if type(value) is int:
+            if value.bit_length() > FOLD_MAX_BITS:
+                return None
+            return self.num(Num(value))
+        if type(value) is float:
+            return self.num(Num(value)) if self.fold_floats else None
+        if not self.fold_floats or _bits(value) > FOLD_MAX_BITS:
+            return None
+        # Decimal or Fraction: backend.literal() reads it back from text.
+        return self.num(Num(value, str(value)))
+
+    def fold(self, op: str, function, args: list[Node]) -> Node | None:
+        if not all(type(arg) is Num for arg in args):
+            return None
+        literal = self.backend.literal
+        values = [literal(arg) for arg in args]
+        if _too_big(op, values):
+            return None
+        try:
+            value = function(*values)
+        except (ArithmeticError, TypeError, ValueError):
+            return None
+        return self.constant(value)
+
+    def binary(self, op: str, left: Node, right: Node) -> Node:
+        folded = self.fold(op, self.backend.binary[op], [left, right])
+        if folded is not None:
+            return folded
+        if self.identities:
+            if _is_int(right, 1) and (op == "*" or op == "**"):
+                return left
+            if _is_int(right, 0) and (op == "+" or op == "-"):
+                return left
+            if (_is_int(left, 1) and op == "*") or (_is_int(left, 0) and op == "+"):
+                return right
+        if (self.powers and op == "**" and type(right) is Num
+                and type(right.value) is int and 2 <= right.value <= MAX_POWER):
+            return self.power(left, right.value)
+        first, second = id(left), id(right)
+        if op in _COMMUTATIVE and second < first:
+            first, second = second, first
+        return self.intern((Binary, op, first, second), Binary(op, left, right))
+
+    def power(self, base: Node, exponent: int) -> Node:
+        result = None
+        while True:
+            if exponent & 1:
+                result = base if result is None else self.binary("*", result, base)
+            exponent >>= 1
+            if not exponent:
+                return result
+            base = self.binary("*", base, base)
+
+    def unary(self, op: str, operand: Node) -> Node:
+        folded = self.fold(op, self.backend.unary[op], [operand])
+        if folded is not None:
+            return folded
+        return self.intern((Unary, op, id(operand)), Unary(op, operand))
+
+    def call(self, name: str, args: list[Node], functions: dict) -> Node:
+        if name in FUNCTIONS:
+            # User functions read variables, so they are never constant.
+            folded = self.fold(name, FUNCTIONS[name][1], args)
+            if folded is not None:
+                return folded
+        key = (Call, name, *map(id, args))
+        return self.intern(key, Call(name, args))
+
+
+def _is_int(node: Node, value: int) -> bool:
+    return type(node) is Num and type(node.value) is int and node.value == value
+
+
+def optimize(node: Node, backend: FloatBackend = FLOAT,
+             functions: dict = FUNCTIONS) -> Node:
+    """Return an optimized DAG computing the same as ``node`` with ``backend``."""
+    builder = _Builder(backend)
+    built: list[Node] = []
+    for current in postorder(node):
+        kind = type(current)
+        if kind is Num:
+            built.append(builder.num(current))
+        elif kind is Name:
+            built.append(builder.intern((Name, current.id), current))
+        elif kind is Binary:
+            right = built.pop()
+            built[-1] = builder.binary(current.op, built[-1], right)
+        elif kind is Unary:
+            built[-1] = builder.unary(current.op, built[-1])
+        else:
+            count = len(current.args)
+            args = built[-count:]
+            del built[-count:]
+            built.append(builder.call(current.name, args, functions))
+    return built[0]
+
+
+def _children(node: Node) -> tuple[Node, ...]:
+    kind = type(node)
+    if kind is Binary:
+        return (node.left, node.right)
+    if kind is Unary:
+        return (node.operand,)
+    if kind is Call:
+        return node.args
+    return ()
+
+
+def linearize(node: Node) -> tuple[list[Node], list[tuple[int, ...]], list[int]]:
+    """Each distinct node of a DAG once, children first.
+
+    Returns ``(nodes, args, uses)``: ``args[i]`` are the positions of the
+    children of ``nodes[i]`` and ``uses[i]`` counts the nodes reading it,
+    plus one for the root, which is last.
+    """
+    nodes: list[Node] = []
+    args: list[tuple[int, ...]] = []
+    position: dict[int, int] = {}
+    pending = [(node, False)]
+    while pending:
+        current, expanded = pending.pop()
+        if id(current) in position:
+            continue
+        children = _children(current)
+        if not expanded and children:
+            pending.append((current, True))
+            pending.extend((child, False) for child in reversed(children))
+            continue
+        position[id(current)] = len(nodes)
+        nodes.append(current)
+        args.append(tuple(position[id(child)] for child in children))
+    uses = [0] * len(nodes)
+    for indices in args:
+        for index in indices:
+            uses[index] += 1
+    uses[-1] += 1
+    return nodes, args, uses
+
+
+def compile_optimized(node: Node, backend: FloatBackend = FLOAT,
+                      functions: dict = FUNCTIONS) -> tuple[tuple[int, object], ...]:
+    """Flatten a DAG from :func:`optimize` like :func:`calcexpr.compile_node`.
+
+    A computed node read more than once is kept in a slot (STORE) and
+    pushed again from there (FETCH) rather than computed again.
+    """
+    nodes, args, uses = linearize(node)
+    shared = {id(current) for current, count in zip(nodes, uses)
+              if count > 1 and _children(current)}
+    literal, binary, unary = backend.literal, backend.binary, backend.unary
+    slots: dict[int, int] = {}
+    program = []
+    emit = program.append
+    pending = [(node, False)]
+    while pending:
+        current, expanded = pending.pop()
+        slot = slots.get(id(current))
+        if slot is not None:
+            emit((FETCH, slot))
+            continue
+        children = _children(current)
+        if not expanded and children:
+            pending.append((current, True))
+            pending.extend((child, False) for child in reversed(children))
+            continue
+        kind = type(current)
+        if kind is Num:
+            emit((CONST, literal(current)))
+        elif kind is Name:
+            emit((LOAD, current.id))
+        elif kind is Binary:
+            emit((BINARY, binary[current.op]))
+        elif kind is Unary:
+            emit((UNARY, unary[current.op]))
+        else:
+            emit((CALL, (functions[current.name][1], len(current.args))))
+        if id(current) in shared:
+            slots[id(current)] = len(slots)
+            emit((STORE, slots[id(current)]))
+    return tuple(program)
+
+
+def dump(node: Node) -> str:
+    """Render a DAG on one line, shared nodes as ``t1 = ...;`` bindings.
+
+    ``optimize(parse("(x+1)**2 * 2"))`` dumps as
+    ``t1 = (x+1); ((t1*t1)*2)``.
+    """
+    nodes, args, uses = linearize(node)
+    rendered: list[str] = []
+    bindings: list[str] = []
+    for current, indices, count in zip(nodes, args, uses):
+        parts = [rendered[index] for index in indices]
+        kind = type(current)
+        if kind is Num:
+            text = current.text or repr(current.value)
+        elif kind is Name:
+            text = current.id
+        elif kind is Binary:
+            text = f"({parts[0]}{current.op}{parts[1]})"
+        elif kind is Call:
+            text = f"{current.name}({','.join(parts)})"
+        elif current.op == "!":
+            text = f"({parts[0]}!)"
+        else:
+            text = f"({current.op}{parts[0]})"
+        if count > 1 and indices and current is not node:
+            name = f"t{len(bindings) + 1}"
+            bindings.append(f"{name} = {text}")
+            text = name
+        rendered.append(text)
+    return "; ".join(bindings + [rendered[-1]])
@@ -0,0 +1,223 @@
+"""Incremental evaluation for the live result preview.
+
+The engines feed every typed character to an :class:`IncrementalEvaluator`.
+It runs the same operator-precedence algorithm as :func:`calcexpr.parse`,
+but on values and one character at a time, and keeps the state after each
+character. Operand and operator stacks are immutable cons lists shared
+between states, so a keystroke costs O(1) amortized and backspace is a
+list pop.
+
+Given a numeric backend from :mod:`calcnumeric`, literals and operators
+go through it, so a decimal or fraction engine previews in its own
+arithmetic. (The adaptive backend previews in plain float; only "=" redoes
+suspicious results in Decimal.)
+"""
+from __future__ import annotations
+
+from calcexpr import REDUCE_THRESHOLD, STACK_PRECEDENCE
+from calcnumeric import FLOAT, FloatBackend
+
+# Previews are computed on every key, so refuse integer powers whose result
+# would be bigger than this many bits instead of stalling the UI.
+PREVIEW_MAX_BITS = 100_000
+# 8000! is about 94 kbit, just under PREVIEW_MAX_BITS.
+PREVIEW_MAX_FACTORIAL = 8000
+
+_DIGITS = frozenset("0123456789.")
+_OPERATORS = {"+": "+", "-": "-", "*": "*", "/": "/", "%": "%", "^": "**"}
+
+
+class _State:
+    __slots__ = ("operands", "operators", "number", "expect_operand",
+                 "preview", "valid")
+
+    def __init__(self, operands, operators, number, expect_operand,
+                 preview, valid=True) -> None:
+        # operands and operators are cons cells: (head, rest) or None.
+        self.operands = operands
+        self.operators = operators
+        self.number = number
+        self.expect_operand = expect_operand
+        self.preview = preview
+        self.valid = valid
+
+
+_INITIAL = _State(None, None, "", True, None)
+
+
+def _binary(backend: FloatBackend, op: str, left, right):
+    if (op == "**" and type(left) is int and type(right) is int
+            and right > 0 and left.bit_length() * right > PREVIEW_MAX_BITS):
+        raise OverflowError("preview too large")
+    return backend.binary[op](left, right)
+
+
+def _factorial(backend: FloatBackend, value):
+    if value > PREVIEW_MAX_FACTORIAL:
+        raise OverflowError("preview too large")
+    return backend.unary["!"](value)
+
+
+def _apply(backend: FloatBackend, op: str, operands):
+    if op[0] == "u":
+        value, rest = operands
+        return (backend.unary[op[1]](value), rest)
+    right, (left, rest) = operands
+    return (_binary(backend, op, left, right), rest)
+
+
+def _fold(backend: FloatBackend, value, operands, operators):
+    """Close every pending operator and parenthesis around ``value``."""
+    while operators is not None:
+        op, operators = operators
+        if op == "(":
+            continue
+        if op[0] == "u":
+            value = backend.unary[op[1]](value)
+        else:
+            left, operands = operands
+            value = _binary(backend, op, left, value)
+    return value
+
+
+def _complete(backend: FloatBackend, operands, operators, number):
+    """Build an operand-complete state and compute its preview."""
+    try:
+        if number:
+            value = _fold(backend, backend.parse_number(number), operands, operators)
+        else:
+            value = _fold(backend, operands[0], operands[1], operators)
+    except (ArithmeticError, TypeError, ValueError):
+        value = None
+    return _State(operands, operators, number, False, value)
+
+
+class IncrementalEvaluator:
+    def __init__(self, backend: FloatBackend = FLOAT) -> None:
+        self.backend = backend
+        self._states: list[_State] = [_INITIAL]
+        self._chars: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._chars)
+
+    @property
+    def value(self) -> int | float | None:
+        """Value of the longest complete prefix fed so far, if any."""
+        return self._states[-1].preview
+
+    def feed(self, text: str) -> None:
+        for char in text:
+            self._states.append(self._step(char))
+            self._chars.append(char)
+
+    def backspace(self, count: int = 1) -> None:
+        self.truncate(max(len(self._chars) - count, 0))
+
+    def truncate(self, length: int) -> None:
+        del self._states[length + 1:]
+        del self._chars[length:]
+
+    def reset(self) -> None:
+        self.truncate(0)
+
+    def sync(self, text: str) -> None:
+        """Catch up with ``text`` after it was replaced wholesale."""
+        chars = self._chars
+        common = 0
+        limit = min(len(chars), len(text))
+        while common < limit and chars[common] == text[common]:
+            common += 1
+        self.truncate(common)
+        self.feed(text[common:])
+
+    def _step(self, char: str) -> _State:
+        state = self._states[-1]
+        if (char == "*" and self._chars and self._chars[-1] == "*"
+                and not self._states[-2].expect_operand):
+            # "*" then "*" is "**": redo the step from before the first "*",
+            # whose eager reductions may not even have succeeded.
+            return self._binary(self._states[-2], "**")
+        if not state.valid:
+            return state
+        if char.isspace():
+            return state
+        if char in _DIGITS:
+            if state.expect_operand:
+                return _complete(self.backend, state.operands, state.operators, char)
+            if not state.number:
+                return self._invalid(state)
+            number = state.number + char
+            if number.count(".") > 1:
+                return self._invalid(state)
+            return _complete(self.backend, state.operands, state.operators, number)
+        if char == "(":
+            if not state.expect_operand:
+                return self._invalid(state)
+            return _State(state.operands, ("(", state.operators), "", True,
+                          state.preview)
+        if char == ")":
+            return self._close(state)
+        if char == "!":
+            return self._factorial(state)
+        op = _OPERATORS.get(char)
+        if op is None:
+            return self._invalid(state)
+        if state.expect_operand:
+            if op == "-" or op == "+":
+                return _State(state.operands, ("u" + op, state.operators), "",
+                              True, state.preview)
+            return self._invalid(state)
+        return self._binary(state, op)
+
+    def _binary(self, state: _State, op: str) -> _State:
+        operands = state.operands
+        operators = state.operators
+        try:
+            if state.number:
+                operands = (self.backend.parse_number(state.number), operands)
+            threshold = REDUCE_THRESHOLD[op]
+            while (operators is not None
+                   and STACK_PRECEDENCE[operators[0]] >= threshold):
+                top, operators = operators
+                operands = _apply(self.backend, top, operands)
+        except (ArithmeticError, TypeError, ValueError):
+            return self._invalid(state)
+        return _State(operands, (op, operators), "", True, state.preview)
+
+    def _close(self, state: _State) -> _State:
+        if state.expect_operand:
+            return self._invalid(state)
+        operands = state.operands
+        operators = state.operators
+        try:
+            if state.number:
+                operands = (self.backend.parse_number(state.number), operands)
+            while operators is not None and operators[0] != "(":
+                top, operators = operators
+                operands = _apply(self.backend, top, operands)
+        except (ArithmeticError, TypeError, ValueError):
+            return self._invalid(state)
+        if operators is None:
+            return self._invalid(state)
+        return _complete(self.backend, operands, operators[1], "")
+
+    def _factorial(self, state: _State) -> _State:
+        # Postfix and tightest-binding: applies to the operand just read,
+        # without reducing any pending operator.
+        if state.expect_operand:
+            return self._invalid(state)
+        operands = state.operands
+        try:
+            if state.number:
+                value = self.backend.parse_number(state.number)
+            else:
+                value, operands = operands
+            operands = (_factorial(self.backend, value), operands)
+        except (ArithmeticError, TypeError, ValueError):
+            return self._invalid(state)
+        return _complete(self.backend, operands, state.operators, "")
+
+    @staticmethod
+    def _invalid(state: _State) -> _State:
+        return _State(None, None, "", True, None, valid=False)
@@ -0,0 +1,92 @@
+"""Run calculations without blocking the Tk event loop.
+
+The UIs hand "=" to an :class:`EvaluationScheduler` instead of calling
+``engine.calculate()`` in the key callback. Expressions the size
+estimator calls cheap, which is nearly all of them, are still calculated
+inline, so the result appears in the same callback with no intermediate
+state on screen. Anything bigger goes to a worker thread; the thread only
+waits on the bounded worker process from :mod:`calclimits`, so the GIL
+stays free for Tk. Results come back through ``root.after`` polling,
+because Tk may only be touched from the thread that runs the main loop.
+
+Every submission bumps a generation counter. A job whose generation is
+no longer current is cancelled and its result, should it still arrive,
+is dropped.
+"""
+from __future__ import annotations
+
+import threading
+
+from calclimits import INLINE_BITS
+
+DEFAULT_POLL_MS = 10
+
+
+class EvaluationScheduler:
+    def __init__(self, root, max_workers: int = 2, poll_ms: int = DEFAULT_POLL_MS,
+                 inline_bits: float = INLINE_BITS) -> None:
+        self.root = root
+        self.max_workers = max_workers
+        self.poll_ms = poll_ms
+        self.inline_bits = inline_bits
+        self._generation = 0
+        self._cancel: threading.Event | None = None
+        self._executor = None
+
+    @property
+    def pending(self) -> bool:
+        """Whether a background calculation is still wanted."""
+        return self._cancel is not None
+
+    def calculate(self, engine, on_result) -> bool:
+        """Calculate ``engine``'s current expression and pass the text on.
+
+        ``on_result`` is always called on the Tk thread. Returns True when
+        it has already been called, False when the job went to the
+        background.
+        """
+        self.cancel()
+        expression = engine.expression
+        try:
+            cheap = engine.cost(expression) <= self.inline_bits
+        except Exception:
+            # Bad or over-budget input fails straight away.
+            cheap = True
+        if cheap:
+            on_result(engine.calculate(expression))
+            return True
+        generation = self._generation
+        cancel = self._cancel = threading.Event()
+        future = self._pool().submit(engine.calculate, expression, cancel)
+        self.root.after(self.poll_ms, self._poll, future, generation, on_result)
+        return False
+
+    def cancel(self) -> None:
+        """Abandon the background job, if any; its result will be ignored."""
+        self._generation += 1
+        if self._cancel is not None:
+            self._cancel.set()
+            self._cancel = None
+
+    def shutdown(self) -> None:
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(self.max_workers,
+                                                thread_name_prefix="calc")
+        return self._executor
+
+    def _poll(self, future, generation: int, on_result) -> None:
+        if generation != self._generation:
+            return
+        if not future.done():
+            self.root.after(self.poll_ms, self._poll, future, generation, on_result)
+            return
+        self._cancel = None
+        on_result(future.result())
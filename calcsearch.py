@@ -0,0 +1,163 @@
+"""Search the calculation history by prefix, substring or result range.
+
+:class:`HistorySearch` keeps three in-memory indexes over a
+:class:`calchistory.History`:
+
+* a sorted index of expressions, searched with bisect for prefixes;
+* a trigram index mapping every three-character substring to the ids of
+  the entries containing it, for substring search;
+* a sorted index of numeric results, for "between A and B".
+
+They are built on the first query and afterwards extended with whatever
+has been appended to the history since the last one; nothing is rebuilt.
+Each sorted index takes new keys into a small sorted side run and merges
+it into the main run only once it has grown to a fraction of the main
+run, so appends stay cheap and merges are amortized.
+
+Results are at most ``limit`` entry ids, which :meth:`HistorySearch.entries`
+turns into entries. Prefix and range results come in key order, straight
+off the sorted index, so they cost a bisect plus ``limit`` however many
+entries match; substring results come newest first.
+
+The first build reads every entry, about 10 us each; :meth:`refresh` is
+thread-safe so a front-end can run it in the background.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+DEFAULT_LIMIT = 100
+
+# Side runs are merged once they exceed this, or 1/16 of the main run.
+_MIN_MERGE = 4096
+_MAX_CODEPOINT = "\U0010ffff"
+
+
+class _SortedIndex:
+    """Keys with entry ids, kept sorted in a main run and a side run."""
+
+    def __init__(self) -> None:
+        self._keys: list = []
+        self._ids: list[int] = []
+        self._side: list[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._side)
+
+    def extend(self, pairs: list[tuple]) -> None:
+        """Add ``(key, id)`` pairs."""
+        side = self._side
+        side.extend(pairs)
+        side.sort()
+        if len(side) > max(_MIN_MERGE, len(self._keys) >> 4):
+            merged = list(heapq.merge(zip(self._keys, self._ids), side))
+            self._keys = [key for key, _ in merged]
+            self._ids = [i for _, i in merged]
+            self._side = []
+
+    def between(self, low, high, limit: int) -> list[int]:
+        """Ids of the first ``limit`` keys with ``low <= key <= high``."""
+        keys = self._keys
+        first = bisect_left(keys, low)
+        last = min(bisect_right(keys, high), first + limit)
+        side = self._side
+        start = bisect_left(side, (low,))
+        stop = min(bisect_left(side, (high, math.inf)), start + limit)
+        if start == stop:
+            return self._ids[first:last]
+        found = heapq.merge(zip(keys[first:last], self._ids[first:last]), side[start:stop])
+        return [i for _, i in itertools.islice(found, limit)]
+
+
+class HistorySearch:
+    def __init__(self, history) -> None:
+        self.history = history
+        self._lock = threading.Lock()
+        self._expressions: list[str] = []
+        self._prefixes = _SortedIndex()
+        self._values = _SortedIndex()
+        self._trigrams: defaultdict[str, array] = defaultdict(lambda: array("I"))
+
+    def __len__(self) -> int:
+        """Number of history entries indexed so far."""
+        return len(self._expressions)
+
+    @property
+    def pending(self) -> int:
+        """Number of history entries not indexed yet."""
+        return len(self.history) - len(self._expressions)
+
+    def refresh(self) -> int:
+        """Index entries appended since the last call; returns how many."""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        history = self.history
+        start = len(self._expressions)
+        stop = len(history)
+        if stop <= start:
+            return 0
+        expressions = self._expressions
+        trigrams = self._trigrams
+        prefixes = []
+        values = []
+        for i in range(start, stop):
+            expression, _, _, value = history[i]
+            expressions.append(expression)
+            prefixes.append((expression, i))
+            if not math.isnan(value):
+                values.append((value, i))
+            for gram in {expression[j:j + 3] for j in range(len(expression) - 2)}:
+                trigrams[gram].append(i)
+        self._prefixes.extend(prefixes)
+        self._values.extend(values)
+        return stop - start
+
+    def prefix(self, text: str, limit: int = DEFAULT_LIMIT) -> list[int]:
+        """Entries whose expression starts with ``text``, in sorted order."""
+        self.refresh()
+        return self._prefixes.between(text, text + _MAX_CODEPOINT, limit)
+
+    def substring(self, text: str, limit: int = DEFAULT_LIMIT) -> list[int]:
+        """Entries whose expression contains ``text``."""
+        self.refresh()
+        expressions = self._expressions
+        if len(text) < 3:
+            # No trigram to narrow it down; short fragments are common, so
+            # a newest-first scan usually fills the limit quickly.
+            candidates = range(len(expressions) - 1, -1, -1)
+        else:
+            trigrams = self._trigrams
+            rarest = None
+            for j in range(len(text) - 2):
+                postings = trigrams.get(text[j:j + 3])
+                if not postings:
+                    return []
+                if rarest is None or len(postings) < len(rarest):
+                    rarest = postings
+            candidates = reversed(rarest)
+        found = []
+        for i in candidates:
+            if text in expressions[i]:
+                found.append(i)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def value_range(self, low: float, high: float,
+                    limit: int = DEFAULT_LIMIT) -> list[int]:
+        """Entries whose numeric result lies in ``[low, high]``, smallest first."""
+        self.refresh()
+        return self._values.between(low, high, limit)
+
+    def entries(self, ids: list[int]) -> list:
+        """The :class:`calchistory.HistoryEntry` for each id."""
+        history = self.history
+        return [history[i] for i in ids]
@@ -0,0 +1,267 @@
+"""Local HTTP/JSON service evaluating expressions like the desktop engine.
+
+    python calcserver.py --port 8765
+
+    POST /evaluate  {"expression": "2 ^ 10"}            -> {"result": "1024"}
+    POST /evaluate  {"expressions": ["1+2", "1/0"],
+                     "mode": "fraction"}                 -> {"results": ["3", "Error"]}
+    GET  /health                                         -> {"status": "ok"}
+    GET  /metrics                                        -> Prometheus text
+
+Results are exactly what :meth:`calcengine.CalculatorEngine.calculate`
+returns, so "Error" and "Error: result too large" mean what they mean on
+the desktop. Assignments and function definitions are refused ("Error"):
+the engines are shared by all clients.
+
+Connections are HTTP/1.1 keep-alive. Each connection is served one
+request at a time: the next request is not read until the previous
+response has been written and drained, so a client that sends faster
+than it reads stalls on its own socket instead of growing buffers here.
+Bodies and batches have size caps.
+
+Expressions the size estimator calls cheap are evaluated on the event
+loop, yielding every few dozen so a large batch does not hog it. The
+rest go to a bounded thread pool whose threads only wait on calclimits'
+worker processes, the same arrangement as calcscheduler; a semaphore
+caps how many heavy jobs may be queued, so further heavy requests wait
+for a slot (and their connections stop being read) instead of piling up.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from calcengine import CalculatorEngine
+from calclimits import INLINE_BITS
+from calcmetrics import Metrics
+from calcnumeric import DEFAULT_PRECISION, NUMERIC_MODES
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+MAX_BODY = 1 << 20
+MAX_BATCH = 10_000
+MAX_HEADER = 16 << 10
+IDLE_TIMEOUT = 60.0
+# Cheap expressions evaluated between yields to the event loop.
+YIELD_EVERY = 64
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large",
+           431: "Request Header Fields Too Large"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _error_response(error: HTTPError) -> tuple[int, str, bytes]:
+    return error.status, "application/json", json.dumps({"error": str(error)}).encode()
+
+
+class CalcServer:
+    def __init__(self, workers: int = DEFAULT_WORKERS, precision: int = DEFAULT_PRECISION,
+                 default_mode: str = "float", inline_bits: float = INLINE_BITS,
+                 metrics: Metrics | None = None) -> None:
+        self.workers = workers
+        self.precision = precision
+        self.default_mode = default_mode
+        self.inline_bits = inline_bits
+        self.metrics = Metrics() if metrics is None else metrics
+        self._engines: dict[str, CalculatorEngine] = {}
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="calcserver")
+        # Heavy jobs running or queued for the pool.
+        self._heavy = asyncio.Semaphore(2 * workers)
+        self.connections = 0
+        self.server: asyncio.Server | None = None
+
+    def engine(self, mode: str) -> CalculatorEngine:
+        # Checked first: a JSON list or object as mode is not even hashable.
+        if not isinstance(mode, str) or mode not in NUMERIC_MODES:
+            raise HTTPError(400, f"unknown mode {mode!r}")
+        engine = self._engines.get(mode)
+        if engine is None:
+            engine = self._engines[mode] = CalculatorEngine(
+                mode=mode, precision=self.precision, metrics=self.metrics)
+        return engine
+
+    # --- evaluation ------------------------------------------------------
+
+    def _cheap(self, engine: CalculatorEngine, expression: str) -> bool:
+        try:
+            return engine.cost(expression) <= self.inline_bits
+        except Exception:
+            # Bad or over-budget input fails straight away.
+            return True
+
+    async def _heavy_calculate(self, engine: CalculatorEngine, expression: str) -> str:
+        async with self._heavy:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, engine.calculate, expression)
+
+    async def evaluate(self, expressions: list[str], mode: str) -> list[str]:
+        engine = self.engine(mode)
+        results: list = [None] * len(expressions)
+        heavy = []
+        for i, expression in enumerate(expressions):
+            if not isinstance(expression, str):
+                raise HTTPError(400, "expressions must be strings")
+            if "=" in expression:
+                # One engine per mode serves every client, so nobody gets
+                # to change its symbol table.
+                results[i] = "Error"
+                continue
+            if self._cheap(engine, expression):
+                results[i] = engine.calculate(expression)
+                if i % YIELD_EVERY == YIELD_EVERY - 1:
+                    await asyncio.sleep(0)
+            else:
+                heavy.append(i)
+        if heavy:
+            done = await asyncio.gather(*(self._heavy_calculate(engine, expressions[i])
+                                          for i in heavy))
+            for i, result in zip(heavy, done):
+                results[i] = result
+        return results
+
+    # --- HTTP ------------------------------------------------------------
+
+    async def handle(self, method: str, path: str, body: bytes) -> tuple[int, str, bytes]:
+        if path == "/health":
+            return 200, "application/json", b'{"status": "ok"}'
+        if path == "/metrics":
+            return 200, "text/plain; version=0.0.4", self.metrics.prometheus().encode()
+        if path != "/evaluate":
+            raise HTTPError(404, f"no such endpoint {path}")
+        if method != "POST":
+            raise HTTPError(405, "use POST")
+        try:
+            request = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "body is not JSON") from None
+        if not isinstance(request, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        mode = request.get("mode", self.default_mode)
+        if "expressions" in request:
+            expressions = request["expressions"]
+            if not isinstance(expressions, list):
+                raise HTTPError(400, "expressions must be a list")
+            if len(expressions) > MAX_BATCH:
+                raise HTTPError(413, f"at most {MAX_BATCH} expressions per request")
+            response = {"results": await self.evaluate(expressions, mode)}
+        elif "expression" in request:
+            response = {"result": (await self.evaluate([request["expression"]], mode))[0]}
+        else:
+            raise HTTPError(400, 'expected "expression" or "expressions"')
+        return 200, "application/json", json.dumps(response).encode()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "headers too large") from None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(400, "bad request line") from None
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "send a Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length") from None
+        if length > MAX_BODY:
+            raise HTTPError(413, f"body over {MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b""
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method, path.split("?", 1)[0], body, keep_alive
+
+    async def serve_connection(self, reader: asyncio.StreamReader,
+                               writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    method, path, body, keep_alive = await self._read_request(reader)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    return
+                except HTTPError as error:
+                    # The stream may be mid-request; do not try to reuse it.
+                    keep_alive = False
+                    status, content_type, payload = _error_response(error)
+                else:
+                    try:
+                        status, content_type, payload = await self.handle(method, path, body)
+                    except HTTPError as error:
+                        status, content_type, payload = _error_response(error)
+                head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Length: {len(payload)}\r\n"
+                        + ("" if keep_alive else "Connection: close\r\n") + "\r\n")
+                writer.write(head.encode("latin-1") + payload)
+                # Backpressure: nothing more is read until the client has
+                # taken this response.
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.Server:
+        self.server = await asyncio.start_server(self.serve_connection, host, port,
+                                                 limit=MAX_HEADER)
+        return self.server
+
+    def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host: str, port: int, **options) -> None:
+    server = CalcServer(**options)
+    listener = await server.start(host, port)
+    address = listener.sockets[0].getsockname()
+    # Scripts (benchmarks/loadgen.py) read this line to find a port 0 server.
+    print(f"listening on {address[0]}:{address[1]}", flush=True)
+    try:
+        await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="port to listen on, 0 for any free one (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="threads for heavy expressions (default: %(default)s)")
+    parser.add_argument("--mode", choices=NUMERIC_MODES, default="float",
+                        help="arithmetic when a request names none (default: %(default)s)")
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION,
+                        help="significant digits for decimal/adaptive (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers,
+                          precision=args.precision, default_mode=args.mode))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
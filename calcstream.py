@@ -0,0 +1,123 @@
+"""Evaluate expressions streamed on stdin, one result line per input line.
+
+    some-tool | python calcstream.py | other-tool
+
+Each result is written and flushed as soon as it is computed. A reader
+thread feeds a bounded queue; when input arrives faster than it is
+evaluated, whatever has queued up is taken as one micro-batch and written
+with a single flush. Failed lines produce "Error", like the engines do.
+
+With ``--metrics PATH`` the engine is instrumented and its counters and
+latency histograms are written to PATH every ``--metrics-interval``
+seconds (Prometheus text, or JSON for a ``.json`` path) and on exit.
+"""
+from __future__ import annotations
+
+import argparse
+import queue
+import sys
+import threading
+from typing import Iterable, Iterator, TextIO
+
+from calcengine import CalculatorEngine
+from calcmetrics import DEFAULT_INTERVAL, Metrics, MetricsExporter
+from calcnumeric import DEFAULT_PRECISION, NUMERIC_MODES
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_BUFFERED = 4096
+
+_EOF = None
+
+
+def _read_into(stream: TextIO, lines: queue.Queue) -> None:
+    try:
+        for line in iter(stream.readline, ""):
+            lines.put(line)
+    finally:
+        lines.put(_EOF)
+
+
+def micro_batches(stream: TextIO, max_batch: int = DEFAULT_MAX_BATCH,
+                  max_buffered: int = DEFAULT_MAX_BUFFERED) -> Iterator[list[str]]:
+    """Yield lists of lines as they become available.
+
+    Blocks for the first line of a batch, then takes at most ``max_batch``
+    lines that are already waiting. The reader stalls once ``max_buffered``
+    lines are queued, so memory stays bounded however fast input arrives.
+    """
+    lines: queue.Queue = queue.Queue(max_buffered)
+    threading.Thread(target=_read_into, args=(stream, lines), daemon=True).start()
+    while True:
+        line = lines.get()
+        if line is _EOF:
+            return
+        batch = [line]
+        while len(batch) < max_batch:
+            try:
+                line = lines.get_nowait()
+            except queue.Empty:
+                break
+            if line is _EOF:
+                yield batch
+                return
+            batch.append(line)
+        yield batch
+
+
+def evaluate_batches(batches: Iterable[list[str]],
+                     engine: CalculatorEngine) -> Iterator[list[str]]:
+    for batch in batches:
+        results = []
+        for line in batch:
+            engine.expression = line.strip()
+            results.append(engine.calculate())
+        yield results
+
+
+def run(stream: TextIO, out: TextIO, max_batch: int = DEFAULT_MAX_BATCH,
+        max_buffered: int = DEFAULT_MAX_BUFFERED, mode: str = "float",
+        precision: int = DEFAULT_PRECISION, metrics: Metrics | None = None) -> int:
+    """Pipe ``stream`` through the engine into ``out``; returns the line count."""
+    count = 0
+    batches = micro_batches(stream, max_batch, max_buffered)
+    engine = CalculatorEngine(mode=mode, precision=precision, metrics=metrics)
+    for results in evaluate_batches(batches, engine):
+        out.write("".join(result + "\n" for result in results))
+        out.flush()
+        count += len(results)
+    return count
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="most lines evaluated per flush (default: %(default)s)")
+    parser.add_argument("--max-buffered", type=int, default=DEFAULT_MAX_BUFFERED,
+                        help="most lines read ahead (default: %(default)s)")
+    parser.add_argument("--mode", choices=NUMERIC_MODES, default="float",
+                        help="arithmetic to use (default: %(default)s)")
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION,
+                        help="significant digits for decimal/adaptive (default: %(default)s)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write engine metrics to PATH (.json for JSON, else Prometheus text)")
+    parser.add_argument("--metrics-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between metrics writes (default: %(default)s)")
+    args = parser.parse_args(argv)
+    metrics = exporter = None
+    if args.metrics:
+        metrics = Metrics()
+        exporter = MetricsExporter(metrics, args.metrics, args.metrics_interval).start()
+    try:
+        run(sys.stdin, sys.stdout, args.max_batch, args.max_buffered,
+            args.mode, args.precision, metrics)
+    except BrokenPipeError:
+        # The downstream tool went away; nothing left to report to.
+        sys.stderr.close()
+    finally:
+        if exporter is not None:
+            exporter.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
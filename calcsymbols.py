@@ -0,0 +1,150 @@
+"""Variables and user-defined functions for the calculator engines.
+
+    r = 0.05                 assignment: evaluated once, the value kept
+    f(x) = x**2 + 1          definition: the body is compiled, not run
+    100 * f(1 + r)           formulas use both
+
+A :class:`SymbolTable` holds them for one engine across calculations.
+A function body is optimized and compiled (:mod:`calcoptimize`) once,
+when it is defined; a call runs that program with the parameters bound over the
+table's variables. Variables are looked up when a program runs, never
+folded in, so assigning one recompiles nothing, and ``f`` above always
+sees the current ``r``.
+
+Bodies may call the built-in functions and functions defined before them.
+Redefining a function updates it in place, for every formula and function
+already calling it. A function that would end up calling itself is
+refused: with no conditionals the recursion could never stop.
+"""
+from __future__ import annotations
+
+from calcexpr import Call, ExpressionError, Node, execute, postorder
+from calcfunctions import FUNCTIONS
+from calcnumeric import FLOAT, FloatBackend
+from calcoptimize import compile_optimized, optimize
+
+
+class _Scope(dict):
+    """Parameters of one call; other names fall through to the variables."""
+
+    __slots__ = ("outer",)
+
+    def __missing__(self, name: str):
+        return self.outer[name]
+
+
+class UserFunction:
+    """A defined function, callable like the built-ins in FUNCTIONS."""
+
+    __slots__ = ("name", "params", "body", "order", "program", "variables")
+
+    def __init__(self, name: str, variables: dict | None) -> None:
+        self.name = name
+        self.params: tuple[str, ...] = ()
+        self.body: Node | None = None
+        # postorder(body), for calclimits to bound calls without a walk.
+        self.order: list[Node] = []
+        self.program: tuple = ()
+        self.variables = variables
+
+    def __call__(self, *args):
+        if len(args) != len(self.params):
+            # Called from a formula compiled before a redefinition.
+            raise ExpressionError(f"{self.name} takes {len(self.params)} arguments")
+        scope = _Scope(zip(self.params, args))
+        scope.outer = self.variables
+        return execute(self.program, scope)
+
+    def __repr__(self) -> str:
+        return f"<function {self.name}({', '.join(self.params)})>"
+
+
+class FunctionTable(dict):
+    """FUNCTIONS plus the defined functions: name -> (arity, callable)."""
+
+    __slots__ = ()
+
+    def rebind(self, backend: FloatBackend, variables: dict | None) -> FunctionTable:
+        """A copy with the defined functions compiled for ``backend``.
+
+        They read ``variables`` instead of the table's own; the adaptive
+        backend redoes calculations in Decimal this way.
+        """
+        table = FunctionTable(FUNCTIONS)
+        for name in self:
+            if name not in table:
+                self._bind(name, table, backend, variables)
+        return table
+
+    def _bind(self, name: str, table: FunctionTable, backend: FloatBackend,
+              variables: dict | None) -> None:
+        # Callees first, as compiling binds them; definitions are acyclic.
+        function = self[name][1]
+        for current in postorder(function.body):
+            if type(current) is Call and current.name not in table:
+                self._bind(current.name, table, backend, variables)
+        copy = UserFunction(name, variables)
+        copy.params, copy.body, copy.order = function.params, function.body, function.order
+        copy.program = compile_optimized(optimize(function.body, backend, table),
+                                         backend, table)
+        table[name] = (len(function.params), copy)
+
+
+class SymbolTable:
+    """Variables and functions defined so far, for one numeric backend.
+
+    ``functions`` maps every callable name, built-in or defined, to
+    ``(number of arguments, callable)``, the shape of FUNCTIONS, and is
+    what :func:`calcexpr.parse` and :func:`calcexpr.compile_node` take.
+    ``generation`` goes up whenever that mapping changes, so whoever keeps
+    formulas parsed against it knows when to drop them.
+    """
+
+    def __init__(self, backend: FloatBackend = FLOAT) -> None:
+        self.backend = backend
+        self.variables: dict[str, object] = {}
+        self.functions = FunctionTable(FUNCTIONS)
+        self.generation = 0
+
+    def assign(self, name: str, value) -> None:
+        if name in self.functions:
+            raise ExpressionError(f"{name} is a function")
+        self.variables[name] = self.backend.variable(value)
+
+    def define(self, name: str, params: tuple[str, ...], body: Node) -> UserFunction:
+        """Compile ``body`` as ``name(*params)``; returns the function."""
+        if name in FUNCTIONS:
+            raise ExpressionError(f"{name} is a built-in function")
+        if name in self.variables:
+            raise ExpressionError(f"{name} is a variable")
+        if self._reaches(body, name):
+            raise ExpressionError(f"{name} would call itself")
+        program = compile_optimized(optimize(body, self.backend, self.functions),
+                                    self.backend, self.functions)
+        entry = self.functions.get(name)
+        function = UserFunction(name, self.variables) if entry is None else entry[1]
+        function.params, function.body, function.program = params, body, program
+        function.order = postorder(body)
+        self.functions[name] = (len(params), function)
+        self.generation += 1
+        return function
+
+    def _reaches(self, body: Node, name: str) -> bool:
+        """Whether evaluating ``body`` could call ``name``."""
+        pending = [body]
+        seen = set()
+        while pending:
+            for current in postorder(pending.pop()):
+                if type(current) is not Call or current.name in FUNCTIONS:
+                    continue
+                if current.name == name:
+                    return True
+                if current.name not in seen:
+                    seen.add(current.name)
+                    pending.append(self.functions[current.name][1].body)
+        return False
+
+    def clear(self) -> None:
+        self.variables.clear()
+        self.functions = FunctionTable(FUNCTIONS)
+        self.generation += 1
@@ -0,0 +1,152 @@
+"""Scrolling "paper tape" of past calculations for the Tk front-ends.
+
+:class:`TapePanel` shows a :class:`calchistory.History` of any length on a
+Canvas without creating an item per entry. It keeps one text item for
+each row that fits in the window (plus one), and entry *i* is always drawn
+by item ``i % len(items)``: scrolling moves the items and refills only
+the ones whose entry changed, reading those few entries from the history
+on demand. A million-entry tape therefore costs the same Tk items and
+memory as a ten-entry one.
+
+The panel runs its own scroll model instead of the Canvas's: the
+Scrollbar and mouse wheel move :attr:`TapePanel.top`, the index of the
+first visible entry, and redraws are coalesced into one ``after_idle``.
+It follows new entries while scrolled to the bottom, like a printing
+calculator, and stays put otherwise.
+"""
+from __future__ import annotations
+
+ROW_HEIGHT = 22
+WIDTH = 240
+
+
+class TapePanel:
+    def __init__(self, parent, history, on_select=None,
+                 row_height: int = ROW_HEIGHT, width: int = WIDTH) -> None:
+        """Build the panel in a Frame, :attr:`frame`, for the caller to place.
+
+        ``on_select``, if given, is called with the expression of a row
+        that is clicked.
+        """
+        import tkinter as tk
+
+        self.history = history
+        self.on_select = on_select
+        self.row_height = row_height
+        self.frame = tk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, width=width, bg="#fffdf5",
+                                highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.top = 0
+        self.rows = 1
+        self._width = width
+        self._items: list[int] = []
+        # Entry index each item currently shows, -1 for none.
+        self._shown: list[int] = []
+        self._follow = True
+        self._scheduled = False
+        self._count = 0
+        self.redraws = 0
+
+        self.canvas.bind("<Configure>", self._resize)
+        self.canvas.bind("<Button-1>", self._click)
+        self.canvas.bind("<MouseWheel>", self._wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll(3))
+        self.refresh()
+
+    # --- scroll model ----------------------------------------------------
+
+    def _max_top(self) -> int:
+        return max(self._count - self.rows, 0)
+
+    def scroll_to(self, top: int) -> None:
+        top = min(max(top, 0), self._max_top())
+        self._follow = top == self._max_top()
+        if top != self.top:
+            self.top = top
+            self._schedule()
+
+    def scroll(self, rows: int) -> None:
+        self.scroll_to(self.top + rows)
+
+    def yview(self, action: str, amount, unit: str | None = None) -> None:
+        """Scrollbar command: ``moveto`` a fraction or ``scroll`` by units/pages."""
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * self._count))
+        elif action == "scroll":
+            step = self.rows - 1 if unit == "pages" else 1
+            self.scroll(int(amount) * max(step, 1))
+
+    def _wheel(self, event) -> None:
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def refresh(self) -> None:
+        """Pick up entries appended to the history since the last call."""
+        count = len(self.history)
+        if count == self._count:
+            return
+        self._count = count
+        if self._follow:
+            self.top = self._max_top()
+        self._schedule()
+
+    # --- drawing ---------------------------------------------------------
+
+    def _resize(self, event) -> None:
+        self._width = event.width
+        rows = max(event.height // self.row_height, 1)
+        if rows != self.rows:
+            self.rows = rows
+            if self._follow:
+                self.top = self._max_top()
+        # Re-anchor every row to the new right edge.
+        self._shown = [-1] * len(self._items)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if not self._scheduled:
+            self._scheduled = True
+            self.canvas.after_idle(self._draw)
+
+    def _draw(self) -> None:
+        self._scheduled = False
+        self.redraws += 1
+        canvas = self.canvas
+        items = self._items
+        shown = self._shown
+        # One spare row so a partly visible last row is drawn too.
+        pool = self.rows + 1
+        if len(items) != pool:
+            for item in items:
+                canvas.delete(item)
+            items[:] = [canvas.create_text(0, 0, anchor="ne", font=("Courier", 12))
+                        for _ in range(pool)]
+            shown[:] = [-1] * pool
+        history = self.history
+        x = self._width - 6
+        stop = min(self.top + pool, self._count)
+        for i in range(self.top, self.top + pool):
+            slot = i % pool
+            if i >= stop:
+                if shown[slot] != -1:
+                    canvas.itemconfigure(items[slot], text="")
+                    shown[slot] = -1
+                continue
+            y = (i - self.top) * self.row_height + 2
+            if shown[slot] != i:
+                entry = history[i]
+                canvas.itemconfigure(items[slot], text=f"{entry.expression} = {entry.result}")
+                shown[slot] = i
+            canvas.coords(items[slot], x, y)
+        if self._count:
+            self.scrollbar.set(self.top / self._count, stop / self._count)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _click(self, event) -> None:
+        i = self.top + event.y // self.row_height
+        if self.on_select is not None and i < self._count:
+            self.on_select(self.history[i].expression)
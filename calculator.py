@@ -1,14 +1,26 @@
-import tkinter as tk
+from calcbignum import DigitViewer, is_big
+from calcdisplay import DisplayWriter, bind_paste
+from calccache import default_cache
+from calcengine import clean_paste
+from calclimits import TOO_LARGE, BoundedBackend, ResultTooLarge
+from calcnumeric import FLOAT
 
 class Calculator:
     def __init__(self, root):
+        import tkinter as tk
+
         self.root = root
         self.root.title("Mbenza Calculator")
         self.root.geometry("400x400")
 
         self.expression = ""
+        self.value = None
+        # Through the shared result cache, so "=" on an expression seen
+        # before neither parses nor evaluates it again.
+        self.backend = BoundedBackend(FLOAT)
         self.display = tk.Entry(self.root, font=("Arial", 24), justify='right', bd=10)
         self.display.grid(row=0, column=0, columnspan=4, sticky='nsew')
+        self.writer = DisplayWriter(self.display)
 
         # Configure rows and columns
         for I in range(5):
@@ -18,9 +30,14 @@ class Calculator:
 
         self.create_button()
         self.root.bind('<Key>', self.key_press)
+        bind_paste(self.root, self.display, self.paste)
+        self.root.bind('<Control-d>', self.show_digits)
+        self.root.bind('<Control-D>', self.show_digits)
 
     
     def create_button(self) -> int:
+        import tkinter as tk
+
         buttons = [
             ('7', 1, 1), ('8', 1, 2), ('9', 1, 3), ('/', 1, 0),
             ('4', 2, 1), ('5', 2, 2), ('6', 2, 3), ('*', 2, 0),
@@ -66,20 +83,41 @@ class Calculator:
             self.expression = self.expression[:-1]
         self.update_display()
     
+    def paste(self, event) -> str:
+        try:
+            text = clean_paste(self.root.clipboard_get())
+        except Exception:
+            return "break"
+        if text:
+            self.expression += text
+            self.update_display()
+        return "break"
+
     def calculate(self) -> int:
+        self.value = None
         try:
-            result = eval(self.expression)
-            self.expression = str(result)
+            result = default_cache.evaluate(self.expression, self.backend)
+            # Scientific notation for huge ints; Ctrl+D shows every digit.
+            self.expression = FLOAT.format(result)
+            self.value = result
+        except ResultTooLarge:
+            self.expression = TOO_LARGE
         except Exception as e:
             self.expression = "Error"
         self.update_display()
 
+    def show_digits(self, event=None) -> str:
+        if type(self.value) is int and is_big(self.value):
+            DigitViewer(self.root, self.value)
+        return "break"
+
     
     def update_display(self) -> None:
-        self.display.delete(0, tk.END)
-        self.display.insert(0, self.expression)
+        self.writer.set_text(self.expression)
 
 if __name__ == "__main__":
+    import tkinter as tk
+
     root = tk.Tk()
     calc = Calculator(root)
     root.mainloop()
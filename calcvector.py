@@ -0,0 +1,129 @@
+"""Evaluate one expression over whole NumPy arrays.
+
+Variables in the expression are bound to arrays and every AST node is
+applied as a single ufunc call, so ``"x**2 + 3*x - y/2"`` over ten million
+``(x, y)`` pairs runs without a Python-level loop. The expression is first
+run through :func:`calcoptimize.optimize`, so constants are folded once,
+``x**2`` is a multiply rather than a pow and a repeated subexpression is
+computed once. Intermediate results that this module allocated itself are
+reused as ``out=`` buffers once nothing else still reads them, which
+keeps peak memory at a few temporaries however long the expression is.
+
+NumPy is optional for the calculator and only imported on first use.
+"""
+from __future__ import annotations
+
+from calcexpr import Binary, Call, ExpressionError, Name, Node, Num, Unary, parse, postorder
+from calcoptimize import linearize, optimize
+
+_BINARY_UFUNCS = {
+    "+": "add",
+    "-": "subtract",
+    "*": "multiply",
+    "/": "true_divide",
+    "%": "remainder",
+    "**": "power",
+}
+
+_UNARY_UFUNCS = {
+    "-": "negative",
+    "+": "positive",
+}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("vectorized evaluation requires numpy") from None
+    return numpy
+
+
+class VectorizedExpression:
+    """An expression parsed once and evaluated over arrays many times."""
+
+    def __init__(self, expression: str | Node) -> None:
+        self.node = parse(expression) if isinstance(expression, str) else expression
+        for node in postorder(self.node):
+            if type(node) is Call or (type(node) is Unary and node.op not in _UNARY_UFUNCS):
+                name = node.name if type(node) is Call else node.op
+                raise ExpressionError(f"{name} is not available over arrays")
+        # Each distinct node once, with the positions of its operands and
+        # how many nodes read it.
+        self._nodes, self._args, self._uses = linearize(optimize(self.node))
+        self.names = sorted({node.id for node in self._nodes if type(node) is Name})
+
+    def __call__(self, **arrays):
+        np = _numpy()
+        missing = [name for name in self.names if name not in arrays]
+        if missing:
+            raise ExpressionError(f"unbound names: {', '.join(missing)}")
+        inputs = {name: np.asarray(arrays[name]) for name in self.names}
+        binary = {op: getattr(np, func) for op, func in _BINARY_UFUNCS.items()}
+        unary = {op: getattr(np, func) for op, func in _UNARY_UFUNCS.items()}
+
+        # Owned arrays were allocated here. One may be overwritten in place
+        # by the last node reading it, and is dropped after that read.
+        values: list[object] = [None] * len(self._nodes)
+        owned = [False] * len(self._nodes)
+        remaining = list(self._uses)
+        for i, (node, args) in enumerate(zip(self._nodes, self._args)):
+            kind = type(node)
+            if kind is Num:
+                values[i] = node.value
+                continue
+            if kind is Name:
+                values[i] = inputs[node.id]
+                continue
+            for index in args:
+                remaining[index] -= 1
+            free = [owned[index] and not remaining[index] for index in args]
+            if kind is Binary:
+                left, right = values[args[0]], values[args[1]]
+                ufunc = binary[node.op]
+                out = _reusable(np, ufunc, left, free[0], right, free[1])
+                if out is None:
+                    result = ufunc(left, right)
+                else:
+                    result = ufunc(left, right, out=out)
+            else:
+                operand = values[args[0]]
+                ufunc = unary[node.op]
+                if free[0]:
+                    result = ufunc(operand, out=operand)
+                else:
+                    result = ufunc(operand)
+            values[i] = result
+            owned[i] = isinstance(result, np.ndarray)
+            for index in args:
+                if not remaining[index]:
+                    values[index] = None
+        return values[-1]
+
+
+def _reusable(np, ufunc, left, left_owned, right, right_owned):
+    """Return an owned operand that can hold ``ufunc(left, right)``."""
+    if not (left_owned or right_owned):
+        return None
+    try:
+        dtype = ufunc.resolve_dtypes((_dtype(np, left), _dtype(np, right), None))[-1]
+    except (AttributeError, TypeError):
+        # NumPy < 1.24 cannot resolve dtypes up front; just allocate.
+        return None
+    shape = np.broadcast_shapes(np.shape(left), np.shape(right))
+    for candidate, owned in ((left, left_owned), (right, right_owned)):
+        if owned and candidate.dtype == dtype and candidate.shape == shape:
+            return candidate
+    return None
+
+
+def _dtype(np, value):
+    if isinstance(value, np.ndarray):
+        return value.dtype
+    # Python scalars are "weak" and defer to the array operand's dtype.
+    return type(value)
+
+
+def evaluate_arrays(expression: str | Node, **arrays):
+    """Evaluate ``expression`` once with each name bound to an array."""
+    return VectorizedExpression(expression)(**arrays)
@@ -1,6 +1,13 @@
-from tkinter import *
-from typing import Union, Tuple, List, Optional, Protocol, Any
-from typing_extensions import TypedDict
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Union, Tuple, List, Optional, Protocol, Any, TypedDict
+
+from calcdisplay import bind_paste
+from calcengine import BinaryEngine, OperationError, clean_paste
+from calcnumeric import DEFAULT_PRECISION, make_backend
+
+if TYPE_CHECKING:
+    import tkinter as tk
 
 # Protocol for widget positioning
 class Positionable(Protocol):
@@ -15,11 +22,14 @@ class ButtonConfig(TypedDict):
     relief: str
 
 class Calculator:
-    def __init__(self, root: Any) -> None:  # Using Any for root allows duck typing for Tk-like objects
+    def __init__(self, root: Any, numeric_mode: str = "float",
+                 precision: int = DEFAULT_PRECISION) -> None:  # Using Any for root allows duck typing for Tk-like objects
         if not hasattr(root, 'title') or not callable(getattr(root, 'title')):
             raise TypeError("root must have a 'title' method")
             
         self.root = root
+        self.backend = make_backend(numeric_mode, precision)
+        self.core = BinaryEngine(self.backend)
         self.root.title("Calculator")
         self.root.configure(padx=15, pady=15)
         
@@ -34,11 +44,6 @@ class Calculator:
             'DISPLAY_BG': "#f0f0f0" # Light gray
         }
         
-        # State variables with explicit typing
-        self.current_number: str = ""
-        self.first_number: float = 0
-        self.operation: str = ""
-        
         # Create UI components
         self._setup_display()
         self._configure_grid()
@@ -46,11 +51,13 @@ class Calculator:
         self._bind_keyboard()
 
     def _setup_display(self) -> None:
-        self.display = Entry(
+        import tkinter as tk
+
+        self.display = tk.Entry(
             self.root, 
             width=20,
             borderwidth=5,
-            justify=RIGHT,
+            justify=tk.RIGHT,
             font=('Arial', 24),
             bg=self.COLORS['DISPLAY_BG']
         )
@@ -144,14 +151,17 @@ class Calculator:
         )
         self._position_widget(equals_btn, row=5, column=1, columnspan=2, padx=5, pady=5, sticky='nsew')
 
-    def _create_button(self, **kwargs: Any) -> Button:
-        return Button(self.root, **kwargs)
+    def _create_button(self, **kwargs: Any) -> tk.Button:
+        import tkinter as tk
+
+        return tk.Button(self.root, **kwargs)
 
     def _bind_keyboard(self) -> None:
         self.root.bind('<Key>', self._handle_keypress)
         self.root.bind('<Return>', lambda e: self.button_equal())
         self.root.bind('<Escape>', lambda e: self.button_clear())
         self.root.bind('<BackSpace>', self._handle_backspace)
+        bind_paste(self.root, self.display, self._handle_paste)
 
     def _handle_keypress(self, event: Any) -> None:
         if not hasattr(event, 'char'):
@@ -167,74 +177,71 @@ class Calculator:
                 self.button_equal()
 
     def _handle_backspace(self, _: Any) -> None:
-        current = self.display.get()
-        self.display.delete(0, END)
-        self.display.insert(0, current[:-1])
+        self.core.start_operand()
+        length = self.display.index("end")
+        if length:
+            self.display.delete(length - 1)
+
+    def _handle_paste(self, _: Any) -> str:
+        """Validate the whole clipboard at once and insert it in one go"""
+        try:
+            text = clean_paste(self.root.clipboard_get(), numbers_only=True)
+        except Exception:
+            return "break"
+        if text:
+            if self.core.start_operand():
+                self.display.delete(0, "end")
+            self.display.insert("end", text)
+        return "break"
 
     def button_click(self, number: Union[str, int]) -> None:
-        current = self.display.get()
-        self.display.delete(0, END)
-        self.display.insert(0, current + str(number))
+        if self.core.start_operand():
+            self.display.delete(0, "end")
+        self.display.insert("end", str(number))
 
     def button_clear(self) -> None:
-        self.display.delete(0, END)
-        self.first_number = 0
-        self.operation = ""
+        self.display.delete(0, "end")
+        self.core.clear()
 
     def button_operator(self, op: str) -> None:
         try:
-            self.first_number = float(self.display.get())
-            self.operation = op
-            self.display.delete(0, END)
+            total = self.core.press_operator(op, self.display.get())
+            self.display.delete(0, "end")
+            if total is not None:
+                self._display_result(total)
+        except OperationError as e:
+            self._show_error(str(e))
         except ValueError:
             self._show_error("Invalid input")
 
     def button_equal(self) -> None:
         try:
-            second_number = float(self.display.get())
-            self.display.delete(0, END)
-            
-            result = self._calculate(second_number)
+            result = self.core.press_equals(self.display.get())
+            self.display.delete(0, "end")
             if result is not None:
                 self._display_result(result)
-                
+        except OperationError as e:
+            self._show_error(str(e))
         except ValueError:
             self._show_error("Invalid input")
 
-    def _calculate(self, second_number: float) -> Optional[float]:
-        """Perform calculation based on operation"""
-        operations = {
-            '+': lambda x, y: x + y,
-            '-': lambda x, y: x - y,
-            '*': lambda x, y: x * y,
-            '/': lambda x, y: x / y if y != 0 else None
-        }
-        
-        operation_func = operations.get(self.operation)
-        if operation_func is None:
-            self._show_error("Invalid operation")
-            return None
-            
-        result = operation_func(self.first_number, second_number)
-        if result is None:
-            self._show_error("Division by zero")
-            return None
-            
-        return result
-
     def _display_result(self, result: float) -> None:
         """Format and display the calculation result"""
-        if result.is_integer():
+        if type(result) is not float:
+            self.display.insert(0, self.backend.format(result))
+        elif result.is_integer():
             self.display.insert(0, int(result))
         else:
             self.display.insert(0, f"{result:.8g}")
 
     def _show_error(self, message: str) -> None:
         """Display error message"""
-        self.display.delete(0, END)
+        self.display.delete(0, "end")
         self.display.insert(0, f"Error: {message}")
 
 if __name__ == "__main__":
-    root = Tk()
+    import tkinter as tk
+
+    root = tk.Tk()
     calculator = Calculator(root)
     root.mainloop()
\ No newline at end of file
@@ -1,64 +1,56 @@
 from tkinter import *
 
+from calcengine import BinaryEngine
+
 root = Tk()
 root.title("simple calculator")
 e = Entry(root, width=35, borderwidth=5, )
 e.grid(row=0, column=0, columnspan=3, padx=10, pady=10)
+# First number, pending operation and running total
+core = BinaryEngine()
+
 def button_click(number):
-    #e.delete(0, END)
-    current = e.get()
-    e.delete(0, END)
-    e.insert(0, str(current) + str(number))
+    if core.start_operand():
+        e.delete(0, END)
+    e.insert(END, str(number))
     
 def button_clear():
     e.delete(0, END)
+    core.clear()
 
-def button_add():
+def button_operator(operation):
     first_number = e.get()
-    global f_num 
-    global math 
-    math = "addition"
-    f_num = int(first_number)
     e.delete(0, END)
+    try:
+        total = core.press_operator(operation, first_number)
+    except ValueError:
+        e.insert(0, "Error")
+        return
+    if total is not None:
+        e.insert(0, total)
+
+def button_add():
+    button_operator("+")
+
 def button_equ():
     second_number = e.get()
     e.delete(0, END)
-    if math == "addition":
-        e.insert(0, f_num + int(second_number))
-    if math == "substraction":
-        e.insert(0, f_num - int(second_number))
-    
-    if math == "multiplication":
-        e.insert(0, f_num * int(second_number))
-        
-    if math == "division":
-        e.insert(0, f_num / int(second_number))
-        
-        
+    try:
+        result = core.press_equals(second_number)
+    except ValueError:
+        e.insert(0, "Error")
+        return
+    if result is not None:
+        e.insert(0, result)
     
 def button_substract():
-    first_number = e.get()
-    global f_num 
-    global math 
-    math = "substraction"
-    f_num = int(first_number)
-    e.delete(0, END)
+    button_operator("-")
     
 def  button_multiply():
-    first_number = e.get()
-    global f_num 
-    global math 
-    math = "multiplication"
-    f_num = int(first_number)
-    e.delete(0, END)
+    button_operator("*")
     
 def button_divide():
-    first_number = e.get()
-    global f_num 
-    global math 
-    math = "division"
-    f_num = int(first_number)
-    e.delete(0, END)
+    button_operator("/")
   
     
     
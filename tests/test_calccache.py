@@ -0,0 +1,26 @@
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from calccache import ResultCache
+from calcnumeric import make_backend
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("fraction", Fraction(110000000000000000001, 100000000000000000000)),
+    ("decimal", Decimal("1.10000000000000000001")),
+])
+def test_exact_literals_that_round_to_one_float_are_cached_apart(mode, expected):
+    cache = ResultCache()
+    backend = make_backend(mode)
+    cache.evaluate("0.1+1", backend)
+    assert cache.evaluate("0.10000000000000000001+1", backend) == expected
+    assert cache.misses == 2
+
+
+def test_reordered_operands_share_an_entry():
+    cache = ResultCache()
+    cache.evaluate("0.5 + 2")
+    assert cache.evaluate("2+0.5") == 2.5
+    assert cache.hits == 1
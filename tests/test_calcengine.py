@@ -0,0 +1,36 @@
+import pytest
+
+from calcengine import BinaryEngine, OperationError
+from calcnumeric import make_backend
+
+
+def test_chained_operators_return_the_running_total():
+    core = BinaryEngine()
+    assert core.press_operator("+", "1") == 1
+    core.start_operand()
+    assert core.press_operator("*", "2") == 3
+    # The display now shows 3; pressing another operator only swaps it.
+    assert core.press_operator("-", "3") == 3
+    assert core.start_operand()
+    assert core.press_equals("4") == -1
+
+
+def test_shown_total_is_not_read_back():
+    core = BinaryEngine()
+    core.press_operator("+", "2")
+    core.start_operand()
+    assert core.press_operator("/", "3") == 5
+    core.start_operand()
+    assert core.press_operator("+", "3") == 5 / 3
+    # A display with eight digits shows 1.6666667; "=" with nothing typed
+    # repeats the total itself.
+    assert core.press_equals("1.6666667") == 5 / 3 + 5 / 3
+
+
+def test_arithmetic_errors_become_operation_errors():
+    core = BinaryEngine(make_backend("decimal"))
+    core.press_operator("*", "1e999999")
+    core.start_operand()
+    with pytest.raises(OperationError, match="Math error"):
+        core.press_equals("10")
+    assert core.total is None
@@ -0,0 +1,21 @@
+import pytest
+
+import calcexpr
+from calcexpr import ExpressionError, evaluate
+
+
+def test_evaluate_reuses_the_program_per_text():
+    assert evaluate("x * 2 + 1", {"x": 3}) == 7
+    program = calcexpr._programs["x * 2 + 1"]
+    assert evaluate("x * 2 + 1", {"x": 4}) == 9
+    assert calcexpr._programs["x * 2 + 1"] is program
+
+
+def test_evaluate_does_not_keep_failures():
+    with pytest.raises(ExpressionError):
+        evaluate("1 +")
+    assert "1 +" not in calcexpr._programs
+    with pytest.raises(ZeroDivisionError):
+        evaluate("1/0")
+    with pytest.raises(ZeroDivisionError):
+        evaluate("1/0")
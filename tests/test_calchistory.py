@@ -0,0 +1,37 @@
+import sys
+import threading
+
+from calchistory import History
+
+
+def test_reads_race_appends_and_remaps(tmp_path):
+    interval = sys.getswitchinterval()
+    # Switch threads often enough to land inside a remap.
+    sys.setswitchinterval(1e-6)
+    history = History(str(tmp_path / "history"))
+    history.append("0+0", "0", 0)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                count = len(history)
+                for i in range(max(count - 50, 0), count):
+                    assert history[i].expression == f"{i}+{i}"
+            except Exception as error:
+                errors.append(error)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(1, 3000):
+            history.append(f"{i}+{i}", str(2 * i), 2 * i)
+            # Read on this thread too, so the maps keep being replaced.
+            history.record(i)
+    finally:
+        done.set()
+        reader.join()
+        history.close()
+        sys.setswitchinterval(interval)
+    assert errors == []
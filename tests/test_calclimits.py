@@ -0,0 +1,27 @@
+import pytest
+
+from calcengine import CalculatorEngine
+from calclimits import TOO_LARGE
+
+
+@pytest.mark.parametrize("mode", ["float", "decimal"])
+def test_non_integer_variable_is_sized_like_its_literal(mode):
+    engine = CalculatorEngine(mode=mode)
+    engine.calculate("r = 1.0001")
+    assert engine.calculate("r**1000000") == engine.calculate("1.0001**1000000")
+    assert engine.calculate("r**1000000") != TOO_LARGE
+
+
+def test_integer_variable_still_refused_when_huge():
+    engine = CalculatorEngine()
+    engine.calculate("n = 9")
+    assert engine.calculate("n**9**9") == TOO_LARGE
+
+
+@pytest.mark.parametrize("mode", ["float", "decimal", "fraction", "adaptive"])
+def test_factorial_of_integral_float_literal_runs_inline(mode):
+    engine = CalculatorEngine(mode=mode)
+    assert engine.cost("5.0!") <= engine.limits.inline_bits
+    assert engine.calculate("5.0!") == "120"
+    assert engine.calculate("1e3!").startswith("40238726007709377354")
+    assert engine.calculate("2.5!") == "Error"
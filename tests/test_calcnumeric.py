@@ -0,0 +1,32 @@
+import threading
+
+from calcexpr import parse
+from calcfunctions import FUNCTIONS
+from calcnumeric import AdaptiveBackend
+
+
+def test_adaptive_cancellation_is_tracked_per_calculation():
+    backend = AdaptiveBackend()
+    started, resume = threading.Event(), threading.Event()
+
+    def hold(value):
+        # Only the float pass pauses; the Decimal redo runs straight on.
+        if not started.is_set():
+            started.set()
+            resume.wait(5)
+        return 1
+
+    functions = dict(FUNCTIONS, hold=(1, hold))
+    # 1 - 0.9999999999 cancels almost every bit, so this must be redone.
+    node = parse("hold(1 - 0.9999999999) + 2", functions)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(
+        backend.evaluate(node, functions=functions)))
+    worker.start()
+    started.wait(5)
+    # A clean calculation on another thread meanwhile.
+    assert backend.evaluate(parse("2 + 3")) == 5
+    resume.set()
+    worker.join()
+    assert backend.redone == 1
+    assert type(results[0]) is not float
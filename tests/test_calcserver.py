@@ -0,0 +1,14 @@
+import asyncio
+
+import pytest
+
+from calcserver import CalcServer, HTTPError
+
+
+@pytest.mark.parametrize("mode", ["[1]", "{}", '"hex"'])
+def test_bad_mode_is_a_400(mode):
+    server = CalcServer(workers=1)
+    body = f'{{"expression": "1", "mode": {mode}}}'.encode()
+    with pytest.raises(HTTPError) as raised:
+        asyncio.run(server.handle("POST", "/evaluate", body))
+    assert raised.value.status == 400
@@ -1,9 +1,16 @@
 from tkinter import *
 from typing import Tuple, List, Optional
 
+from calcdisplay import bind_paste
+from calcengine import BinaryEngine, OperationError, clean_paste
+from calcnumeric import DEFAULT_PRECISION, make_backend
+
 class Calculator:
-    def __init__(self, root: Tk) -> None:
+    def __init__(self, root: Tk, numeric_mode: str = "float",
+                 precision: int = DEFAULT_PRECISION) -> None:
         self.root = root
+        self.backend = make_backend(numeric_mode, precision)
+        self.core = BinaryEngine(self.backend)
         self.root.title("Calculator")
         
         # Add padding around the window
@@ -16,11 +23,6 @@ class Calculator:
         self.EQUAL_COLOR: str = "#4CAF50"
         self.BUTTON_TEXT_COLOR: str = "#000000"
         
-        # Initialize variables
-        self.current_number: str = ""
-        self.first_number: float = 0
-        self.operation: str = ""
-        
         # Create and configure entry widget with larger size and font
         self.display = Entry(
             root, 
@@ -123,6 +125,7 @@ class Calculator:
         self.root.bind('<Return>', lambda event: self.button_equal())
         self.root.bind('<Escape>', lambda event: self.button_clear())
         self.root.bind('<BackSpace>', self.handle_backspace)
+        bind_paste(self.root, self.display, self.handle_paste)
 
     def handle_keypress(self, event: Event) -> None:
         valid_chars = '0123456789+-*/.='
@@ -135,61 +138,68 @@ class Calculator:
                 self.button_equal()
 
     def handle_backspace(self, event: Event) -> None:
-        current = self.display.get()
-        self.display.delete(0, END)
-        self.display.insert(0, current[:-1])
+        self.core.start_operand()
+        length = self.display.index(END)
+        if length:
+            self.display.delete(length - 1)
+
+    def handle_paste(self, event: Event) -> str:
+        # Validate the whole clipboard at once and insert it in one go.
+        try:
+            text = clean_paste(self.root.clipboard_get(), numbers_only=True)
+        except TclError:
+            return "break"
+        if text:
+            if self.core.start_operand():
+                self.display.delete(0, END)
+            self.display.insert(END, text)
+        return "break"
 
     def button_click(self, number: str) -> None:
-        current = self.display.get()
-        self.display.delete(0, END)
-        self.display.insert(0, current + str(number))
+        if self.core.start_operand():
+            self.display.delete(0, END)
+        self.display.insert(END, str(number))
 
     def button_clear(self) -> None:
         self.display.delete(0, END)
-        self.first_number = 0
-        self.operation = ""
+        self.core.clear()
 
     def button_operator(self, op: str) -> None:
         try:
-            self.first_number = float(self.display.get())
-            self.operation = op
+            total = self.core.press_operator(op, self.display.get())
+            self.display.delete(0, END)
+            if total is not None:
+                self.show_result(total)
+        except OperationError as e:
             self.display.delete(0, END)
+            self.display.insert(0, f"Error: {e}")
         except ValueError:
             self.display.delete(0, END)
             self.display.insert(0, "Error")
 
     def button_equal(self) -> None:
         try:
-            second_number = float(self.display.get())
+            result: Optional[float] = self.core.press_equals(self.display.get())
             self.display.delete(0, END)
-            
-            result: Optional[float] = None
-            
-            if self.operation == "+":
-                result = self.first_number + second_number
-            elif self.operation == "-":
-                result = self.first_number - second_number
-            elif self.operation == "*":
-                result = self.first_number * second_number
-            elif self.operation == "/":
-                if second_number != 0:
-                    result = self.first_number / second_number
-                else:
-                    self.display.insert(0, "Error: Div by 0")
-                    return
-            
             if result is not None:
-                # Format result to remove trailing zeros if it's a whole number
-                if result.is_integer():
-                    self.display.insert(0, int(result))
-                else:
-                    # Limit decimal places to 8 for cleaner display
-                    self.display.insert(0, f"{result:.8g}")
-                
+                self.show_result(result)
+        except OperationError as e:
+            self.display.delete(0, END)
+            self.display.insert(0, f"Error: {e}")
         except ValueError:
             self.display.delete(0, END)
             self.display.insert(0, "Error")
 
+    def show_result(self, result: float) -> None:
+        # Format result to remove trailing zeros if it's a whole number
+        if type(result) is not float:
+            self.display.insert(0, self.backend.format(result))
+        elif result.is_integer():
+            self.display.insert(0, int(result))
+        else:
+            # Limit decimal places to 8 for cleaner display
+            self.display.insert(0, f"{result:.8g}")
+
 if __name__ == "__main__":
     root = Tk()
     calculator = Calculator(root)
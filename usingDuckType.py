@@ -1,61 +1,108 @@
-from typing import Protocol, Any
-import tkinter as tk
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Protocol, Any
+
+from calcdisplay import DisplayWriter, bind_paste
+from calcengine import CalculatorEngine
+from calchistory import open_default_history
+from calcscheduler import EvaluationScheduler
+from calctape import TapePanel
+
+if TYPE_CHECKING:
+    import tkinter as tk
+
+    from calcbuffer import GapBuffer
 
 # Protocols for Duck Typing
 class DisplayProtocol(Protocol):
-    def update(self, value: str) -> None:
+    entry: tk.Entry
+
+    def update(self, value: str | GapBuffer) -> None:
         ...
 
     def clear(self) -> None:
         ...
 
+    def show_preview(self, value: str) -> None:
+        ...
+
 class EngineProtocol(Protocol):
     expression: str
+    buffer: GapBuffer
+    # A calcmetrics.Metrics, or the no-op NULL_METRICS.
+    metrics: Any
 
     def append(self, value: str) -> None:
         ...
 
-    def clear(self) -> None:
+    def backspace(self) -> None:
         ...
 
-    def calculate(self) -> str:
+    def delete(self) -> None:
         ...
 
-class Display:
-    def __init__(self, parent: tk.Tk) -> None:
-        self.entry = tk.Entry(parent, font=("Arial", 20), justify="right", bd=10)
-        self.entry.grid(row=0, column=0, columnspan=4, sticky="nsew")
+    def move_cursor(self, offset: int) -> None:
+        ...
 
-    def update(self, value: str) -> None:
-        self.entry.delete(0, tk.END)
-        self.entry.insert(0, value)
+    def paste(self, text: str) -> bool:
+        ...
 
     def clear(self) -> None:
-        self.update("")
+        ...
+
+    def cost(self, expression: str | None = None) -> float:
+        ...
 
-class CalculatorEngine:
-    def __init__(self) -> None:
-        self.expression: str = ""
+    def calculate(self, expression: str | None = None, cancel_event: Any = None) -> str:
+        ...
 
-    def append(self, value: str) -> None:
-        if value == "^":
-            self.expression += "**"
+    def calculate_arrays(self, **arrays: Any) -> Any:
+        ...
+
+    def preview(self) -> str:
+        ...
+
+class TapeProtocol(Protocol):
+    def refresh(self) -> None:
+        ...
+
+class Display:
+    def __init__(self, parent: tk.Tk) -> None:
+        import tkinter as tk
+
+        frame = tk.Frame(parent)
+        frame.grid(row=0, column=0, columnspan=4, sticky="nsew")
+        self.entry = tk.Entry(frame, font=("Arial", 20), justify="right", bd=10)
+        self.entry.pack(fill="both", expand=True)
+        self.preview = tk.Label(frame, font=("Arial", 12), fg="#808080", anchor="e")
+        self.preview.pack(fill="x")
+        self.writer = DisplayWriter(self.entry, self.preview)
+
+    def update(self, value: str | GapBuffer) -> None:
+        # A result string, or the engine's GapBuffer while editing.
+        if isinstance(value, str):
+            self.writer.set_text(value)
         else:
-            self.expression += value
+            self.writer.set_buffer(value)
 
     def clear(self) -> None:
-        self.expression = ""
+        self.update("")
+        self.show_preview("")
 
-    def calculate(self) -> str:
-        try:
-            return str(eval(self.expression))
-        except Exception:
-            return "Error"
+    def show_preview(self, value: str) -> None:
+        self.writer.set_preview(value)
+
+# Arrow keys move the editing cursor by this many characters.
+CURSOR_KEYS = {"Left": -1, "Right": 1}
 
 class CalculatorUI:
-    def __init__(self, root: tk.Tk, display: DisplayProtocol, engine: EngineProtocol) -> None:
+    def __init__(self, root: tk.Tk, display: DisplayProtocol, engine: EngineProtocol,
+                 scheduler: EvaluationScheduler | None = None,
+                 tape: TapeProtocol | None = None) -> None:
         self.engine = engine
         self.display = display
+        self.scheduler = EvaluationScheduler(root) if scheduler is None else scheduler
+        self.tape = tape
 
         for i in range(6):
             root.rowconfigure(i, weight=1)
@@ -64,8 +111,11 @@ class CalculatorUI:
 
         self.create_buttons()
         root.bind("<Key>", self.handle_keypress)
+        bind_paste(root, display.entry, self.handle_paste)
 
     def create_buttons(self) -> None:
+        import tkinter as tk
+
         buttons = [
             ("7", 1, 0), ("8", 1, 1), ("9", 1, 2), ("/", 1, 3),
             ("4", 2, 0), ("5", 2, 1), ("6", 2, 2), ("*", 2, 3),
@@ -94,36 +144,86 @@ class CalculatorUI:
             return "#ff6347"
         return "#d3d3d3"
 
+    def calculate(self) -> None:
+        self.display.show_preview("")
+        if not self.scheduler.calculate(self.engine, self.show_result):
+            self.display.show_preview("calculating…")
+
+    def show_result(self, result: str) -> None:
+        self.display.update(result)
+        if self.tape is not None:
+            self.tape.refresh()
+
     def on_button_click(self, char: str) -> None:
+        if char == "=":
+            self.calculate()
+            return
+        self.scheduler.cancel()
         if char == "C":
             self.engine.clear()
-        elif char == "=":
-            result = self.engine.calculate()
-            self.display.update(result)
-            return
         else:
             self.engine.append(char)
 
-        self.display.update(self.engine.expression)
+        self.display.update(self.engine.buffer)
+        self.display.show_preview(self.engine.preview())
 
     def handle_keypress(self, event: Any) -> None:
+        offset = CURSOR_KEYS.get(getattr(event, "keysym", ""))
+        if offset is not None:
+            self.engine.move_cursor(offset)
+            self.display.update(self.engine.buffer)
+            return
         char = event.char
-        if char in "0123456789+-*/().":
+        if char and char in "0123456789+-*/().":
+            self.scheduler.cancel()
             self.engine.append(char)
         elif char == "\r":  # Enter key
-            result = self.engine.calculate()
-            self.display.update(result)
+            self.calculate()
+            return
         elif char == "\x08":  # Backspace
-            self.engine.expression = self.engine.expression[:-1]
-        self.display.update(self.engine.expression)
+            self.scheduler.cancel()
+            self.engine.backspace()
+        elif char == "\x7f":  # Delete
+            self.scheduler.cancel()
+            self.engine.delete()
+        self.display.update(self.engine.buffer)
+        self.display.show_preview(self.engine.preview())
+
+    def handle_paste(self, event: Any) -> str:
+        try:
+            text = event.widget.clipboard_get()
+        except Exception:
+            return "break"
+        self.scheduler.cancel()
+        if self.engine.paste(text):
+            self.display.update(self.engine.buffer)
+            self.display.show_preview(self.engine.preview())
+        return "break"
+
+    def load_expression(self, expression: str) -> None:
+        self.scheduler.cancel()
+        self.engine.expression = expression
+        self.display.update(self.engine.buffer)
+        self.display.show_preview(self.engine.preview())
 
 if __name__ == "__main__":
+    import tkinter as tk
+
     root = tk.Tk()
     root.title("Duck Type Calculator")
     root.geometry("400x600")
 
     display: DisplayProtocol = Display(root)
-    engine: EngineProtocol = CalculatorEngine()
-    calculator = CalculatorUI(root, display, engine)
+    history = open_default_history()
+    engine: EngineProtocol = CalculatorEngine(history=history)
+    tape: TapeProtocol | None = None
+    if history is not None:
+        root.geometry("650x600")
+        root.columnconfigure(4, weight=3)
+        tape = TapePanel(root, history)
+        tape.frame.grid(row=0, column=4, rowspan=6, sticky="nsew")
+    calculator = CalculatorUI(root, display, engine, tape=tape)
+    if tape is not None:
+        tape.on_select = calculator.load_expression
 
     root.mainloop()
\ No newline at end of file